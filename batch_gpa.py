@@ -0,0 +1,304 @@
+# batch_gpa.py
+"""
+Columnar NumPy GPA engine for whole-campus statistics and ranking runs.
+
+GradeCalculator works one student at a time on lists of CourseGrade objects. This
+module takes every enrollment as parallel arrays (student index, course index,
+semester index, grade index, attempt number, credit hours) and computes, for all
+students at once: latest-attempt masks, semester GPAs, running CGPAs, completion
+credits and academic standings. The grade rules and the choice of the latest attempt
+come from GradeCalculator, so the results match it exactly (see verify_against_grade_calculator).
+
+Requires NumPy:  pip install numpy
+
+    python batch_gpa.py --db_path transcript_system.db --verify
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
+
+from database import TranscriptDatabase
+from grade_calculator import GradeCalculator
+from semester import semester_ordinal
+
+
+@dataclass
+class EnrollmentColumns:
+    """Every enrollment as parallel arrays; the index arrays point into the label lists."""
+    student_ids: List[str]
+    course_codes: List[str]
+    semester_labels: List[str]
+    grade_labels: List[str]
+    student: np.ndarray         # (n,) int64 index into student_ids
+    course: np.ndarray          # (n,) int64 index into course_codes
+    semester: np.ndarray        # (n,) int64 index into semester_labels
+    grade: np.ndarray           # (n,) int64 index into grade_labels
+    attempt: np.ndarray         # (n,) int64 attempt number
+    credit_hours: np.ndarray    # (n,) float64, curriculum_courses.credit_hours (0.0 outside the curriculum)
+
+    @property
+    def num_students(self) -> int:
+        return len(self.student_ids)
+
+
+@dataclass
+class BatchGPAResult:
+    """Per-student results; (students, semesters) arrays use chronological semester order."""
+    student_ids: List[str]
+    semesters: List[str]                # Chronological semester labels (columns of the 2-D arrays)
+    latest: np.ndarray                  # (n,) bool, enrollment is the latest attempt of its course
+    cgpa: np.ndarray                    # (students,)
+    total_points: np.ndarray
+    total_credits: np.ndarray
+    completed_credits: np.ndarray
+    passed_credits: np.ndarray
+    standing: np.ndarray                # (students,) object, GradeCalculator.get_academic_standing
+    has_semester: np.ndarray            # (students, semesters) bool, student enrolled that semester
+    semester_gpa: np.ndarray            # (students, semesters), 0.0 where has_semester is False
+    semester_points: np.ndarray
+    semester_credits: np.ndarray
+    cumulative_gpa: np.ndarray
+    cumulative_points: np.ndarray
+    cumulative_credits: np.ndarray
+
+    def semester_summary(self, student_index: int) -> Dict[str, Dict[str, float]]:
+        """One student's rows in the shape of GradeCalculator.calculate_semester_summary (without 'courses')."""
+        summary = {}
+        for t in np.flatnonzero(self.has_semester[student_index]).tolist():
+            summary[self.semesters[t]] = {
+                'semester_gpa': float(self.semester_gpa[student_index, t]),
+                'semester_points': float(self.semester_points[student_index, t]),
+                'semester_credits': float(self.semester_credits[student_index, t]),
+                'cumulative_gpa': float(self.cumulative_gpa[student_index, t]),
+                'cumulative_points': float(self.cumulative_points[student_index, t]),
+                'cumulative_credits': float(self.cumulative_credits[student_index, t]),
+            }
+        return summary
+
+
+def load_enrollment_columns(database: TranscriptDatabase, dept_id: Optional[str] = None,
+                            student_ids: Optional[List[str]] = None) -> EnrollmentColumns:
+    """Streams enrollments from the database into EnrollmentColumns (students in ID order)."""
+    students: List[str] = []
+    course_index: Dict[str, int] = {}
+    semester_index: Dict[str, int] = {}
+    grade_index: Dict[str, int] = {}
+    student_col, course_col, semester_col, grade_col, attempt_col, credit_col = [], [], [], [], [], []
+    for student_id, _, enrollments in database.iter_student_records(dept_id=dept_id, student_ids=student_ids):
+        s = len(students)
+        students.append(student_id)
+        for enrollment in enrollments:
+            student_col.append(s)
+            course_col.append(course_index.setdefault(enrollment['course_code'], len(course_index)))
+            semester_col.append(semester_index.setdefault(enrollment['semester'], len(semester_index)))
+            grade_col.append(grade_index.setdefault(enrollment['grade'], len(grade_index)))
+            attempt_col.append(enrollment['attempt_number'])
+            credit_col.append(enrollment['credit_hours'] or 0.0)
+    return EnrollmentColumns(
+        student_ids=students, course_codes=list(course_index), semester_labels=list(semester_index),
+        grade_labels=list(grade_index),
+        student=np.array(student_col, dtype=np.int64), course=np.array(course_col, dtype=np.int64),
+        semester=np.array(semester_col, dtype=np.int64), grade=np.array(grade_col, dtype=np.int64),
+        attempt=np.array(attempt_col, dtype=np.int64), credit_hours=np.array(credit_col, dtype=np.float64))
+
+
+class BatchGPAEngine:
+    """Vectorized equivalent of GradeCalculator's per-student CGPA, semester summary and completion status."""
+
+    def __init__(self, grade_calculator: Optional[GradeCalculator] = None):
+        self.grade_calculator = grade_calculator or GradeCalculator()
+
+    def _grade_tables(self, grade_labels: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Per grade label: points (0 where not counted), counts toward GPA, passed, counts toward completion."""
+        calc = self.grade_calculator
+        points = np.zeros(len(grade_labels))
+        in_gpa = np.zeros(len(grade_labels), dtype=bool)
+        passing = np.zeros(len(grade_labels), dtype=bool)
+        for i, label in enumerate(grade_labels):
+            grade_point_value = calc.get_grade_points(label)
+            # Counted in GPA sums only if it is a GPA grade *and* has a point value
+            in_gpa[i] = calc.is_gpa_grade(label) and grade_point_value is not None
+            points[i] = grade_point_value if in_gpa[i] else 0.0
+            passing[i] = calc.is_passing_grade(label)
+        # Completion counts GPA grades even without a point value (e.g. unknown grade codes)
+        completion = np.array([calc.is_gpa_grade(label) for label in grade_labels], dtype=bool)
+        return points, in_gpa, passing & completion, completion
+
+    def _round2(self, values: np.ndarray) -> np.ndarray:
+        # Python's round (not np.round) so x.xx5 cases round exactly as GradeCalculator does
+        return np.fromiter((round(v, 2) for v in values.ravel().tolist()), dtype=float,
+                           count=values.size).reshape(values.shape)
+
+    def compute(self, columns: EnrollmentColumns) -> BatchGPAResult:
+        calc = self.grade_calculator
+        num_students = columns.num_students
+        n = len(columns.student)
+        if n == 0:
+            return self._empty_result(columns)
+
+        # Semesters in ordinal order: both the running-CGPA order and the latest-attempt key
+        # (GradeCalculator.attempt_order_key) compare semester ordinals
+        chronological = sorted(range(len(columns.semester_labels)), key=lambda i: semester_ordinal(columns.semester_labels[i]))
+        num_semesters = len(chronological)
+        chronological_rank = np.empty(num_semesters, dtype=np.int64)
+        chronological_rank[chronological] = np.arange(num_semesters)
+        t = chronological_rank[columns.semester]
+
+        points_table, in_gpa_table, passed_table, completion_table = self._grade_tables(columns.grade_labels)
+        gpa_credits = np.where(in_gpa_table[columns.grade], columns.credit_hours, 0.0)
+        gpa_points = points_table[columns.grade] * columns.credit_hours * in_gpa_table[columns.grade]
+
+        # Latest attempt: within each (student, course), order rows by the attempt key descending
+        # (earlier rows win ties, like get_latest_grades' stable sort). A row stops counting from
+        # the first semester in which any row ranked above it has been taken.
+        group = columns.student * max(1, len(columns.course_codes)) + columns.course
+        order = np.lexsort((np.arange(n), -columns.attempt, -chronological_rank[columns.semester], group))
+        sorted_group = group[order]
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = sorted_group[1:] != sorted_group[:-1]
+        group_rank = np.cumsum(group_start) - 1
+        offset = group_rank * (num_semesters + 1)
+        # Segmented running minimum of t over the rows ranked above (exclusive)
+        running_min = np.minimum.accumulate(t[order] - offset) if n else np.zeros(0, dtype=np.int64)
+        superseded_sorted = np.full(n, num_semesters, dtype=np.int64)
+        inherit = ~group_start
+        superseded_sorted[inherit] = running_min[np.flatnonzero(inherit) - 1] + offset[inherit]
+        superseded = np.empty(n, dtype=np.int64)
+        superseded[order] = superseded_sorted
+        latest = superseded == num_semesters
+
+        # Running totals: each row counts from its semester until it is superseded
+        width = num_semesters + 1
+        active = superseded > t
+        start_cells = columns.student * width + t
+        end_cells = columns.student * width + superseded
+        diff_points = (np.bincount(start_cells[active], gpa_points[active], minlength=num_students * width)
+                       - np.bincount(end_cells[active], gpa_points[active], minlength=num_students * width))
+        diff_credits = (np.bincount(start_cells[active], gpa_credits[active], minlength=num_students * width)
+                        - np.bincount(end_cells[active], gpa_credits[active], minlength=num_students * width))
+        cumulative_points = np.cumsum(diff_points.reshape(num_students, width), axis=1)[:, :num_semesters]
+        cumulative_credits = np.cumsum(diff_credits.reshape(num_students, width), axis=1)[:, :num_semesters]
+
+        cells = columns.student * num_semesters + t
+        size = num_students * num_semesters
+        has_semester = (np.bincount(cells, minlength=size) > 0).reshape(num_students, num_semesters)
+        semester_points = np.bincount(cells, gpa_points, minlength=size).reshape(num_students, num_semesters)
+        semester_credits = np.bincount(cells, gpa_credits, minlength=size).reshape(num_students, num_semesters)
+
+        semester_gpa = self._ratio(semester_points, semester_credits, has_semester)
+        cumulative_gpa = self._ratio(cumulative_points, cumulative_credits, has_semester)
+
+        total_points = np.bincount(columns.student[latest], gpa_points[latest], minlength=num_students)
+        total_credits = np.bincount(columns.student[latest], gpa_credits[latest], minlength=num_students)
+        cgpa = self._ratio(total_points, total_credits, np.ones(num_students, dtype=bool))
+        completion_credits = np.where(completion_table[columns.grade], columns.credit_hours, 0.0)
+        completed_credits = np.bincount(columns.student[latest], completion_credits[latest], minlength=num_students)
+        passed = latest & passed_table[columns.grade]
+        # bincount returns int64 for empty weights, e.g. when nobody has passed anything yet
+        passed_credits = np.bincount(columns.student[passed], columns.credit_hours[passed],
+                                     minlength=num_students).astype(np.float64)
+
+        # Standing reuses GradeCalculator's thresholds on the (few) distinct CGPA values
+        unique_cgpa, inverse = np.unique(cgpa, return_inverse=True)
+        standing = np.array([calc.get_academic_standing(float(v)) for v in unique_cgpa], dtype=object)[inverse]
+
+        return BatchGPAResult(
+            student_ids=columns.student_ids, semesters=[columns.semester_labels[i] for i in chronological],
+            latest=latest, cgpa=cgpa, total_points=total_points, total_credits=total_credits,
+            completed_credits=completed_credits, passed_credits=passed_credits, standing=standing,
+            has_semester=has_semester, semester_gpa=semester_gpa, semester_points=semester_points,
+            semester_credits=semester_credits, cumulative_gpa=cumulative_gpa,
+            cumulative_points=cumulative_points, cumulative_credits=cumulative_credits)
+
+    def _empty_result(self, columns: EnrollmentColumns) -> BatchGPAResult:
+        """Result for a scope without enrollments: every student at 0.0 CGPA and no semesters."""
+        num_students = columns.num_students
+        zeros = np.zeros(num_students)
+        grid = np.zeros((num_students, 0))
+        standing = np.array([self.grade_calculator.get_academic_standing(0.0)] * num_students, dtype=object)
+        return BatchGPAResult(
+            student_ids=columns.student_ids, semesters=[], latest=np.zeros(0, dtype=bool),
+            cgpa=zeros, total_points=zeros.copy(), total_credits=zeros.copy(),
+            completed_credits=zeros.copy(), passed_credits=zeros.copy(), standing=standing,
+            has_semester=np.zeros((num_students, 0), dtype=bool), semester_gpa=grid, semester_points=grid.copy(),
+            semester_credits=grid.copy(), cumulative_gpa=grid.copy(), cumulative_points=grid.copy(),
+            cumulative_credits=grid.copy())
+
+    def _ratio(self, points: np.ndarray, credits: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """round(points / credits, 2), 0.0 where credits are 0 or mask is False."""
+        raw = np.divide(points, credits, out=np.zeros(points.shape, dtype=np.float64), where=mask & (credits > 0))
+        rounded = np.zeros_like(raw)
+        rounded[mask] = self._round2(raw[mask])
+        return rounded
+
+
+def verify_against_grade_calculator(database: TranscriptDatabase,
+                                    result: Optional[BatchGPAResult] = None) -> List[Tuple[str, str, Any, Any]]:
+    """
+    Recomputes every student with GradeCalculator (as TranscriptGenerator does) and compares.
+    Returns (student_id, field, batch value, GradeCalculator value) for each difference.
+    """
+    if result is None:
+        result = BatchGPAEngine().compute(load_enrollment_columns(database))
+    calc = GradeCalculator()
+    mismatches = []
+    for i, (student_id, _, enrollments) in enumerate(database.iter_student_records()):
+        if result.student_ids[i] != student_id:
+            mismatches.append((student_id, 'student_id', result.student_ids[i], student_id))
+            continue
+        course_grades = calc.process_course_grades(enrollments) if enrollments else []
+        cgpa, total_points, total_credits = calc.calculate_cgpa(course_grades)
+        completion_status = calc.calculate_completion_status(course_grades)
+        expected = {'cgpa': cgpa, 'total_points': total_points, 'total_credits': total_credits,
+                    'completed_credits': completion_status['completed_credits'],
+                    'passed_credits': completion_status['passed_credits'],
+                    'standing': calc.get_academic_standing(cgpa)}
+        for field, value in expected.items():
+            actual = getattr(result, field)[i]
+            if actual != value:
+                mismatches.append((student_id, field, actual, value))
+        expected_semesters = {semester: {k: v for k, v in data.items() if k != 'courses'}
+                              for semester, data in calc.calculate_semester_summary(
+                                  calc.group_grades_by_semester(course_grades)).items()}
+        actual_semesters = result.semester_summary(i)
+        if actual_semesters != expected_semesters or list(actual_semesters) != list(expected_semesters):
+            mismatches.append((student_id, 'semesters', actual_semesters, expected_semesters))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-campus GPA computation with NumPy")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Path to the database file")
+    parser.add_argument("--dept_id", help="Only students of this department")
+    parser.add_argument("--verify", action="store_true", help="Check every student against GradeCalculator")
+    args = parser.parse_args()
+
+    database = TranscriptDatabase(args.db_path)
+    start = time.perf_counter()
+    columns = load_enrollment_columns(database, dept_id=args.dept_id)
+    loaded = time.perf_counter()
+    result = BatchGPAEngine().compute(columns)
+    computed = time.perf_counter()
+    print(f"Loaded {len(columns.student)} enrollments of {columns.num_students} students in {loaded - start:.3f}s, "
+          f"computed in {computed - loaded:.3f}s")
+    if columns.num_students:
+        standings, counts = np.unique(result.standing, return_counts=True)
+        print(f"  Average CGPA: {result.cgpa.mean():.2f}, median {np.median(result.cgpa):.2f}")
+        print(f"  Academic standing: {dict(zip(standings.tolist(), counts.tolist()))}")
+    if args.verify:
+        if args.dept_id:
+            print("  --verify checks the whole campus; run it without --dept_id.")
+        else:
+            mismatches = verify_against_grade_calculator(database, result)
+            for mismatch in mismatches[:20]:
+                print(f"  Mismatch {mismatch}")
+            print(f"  Verified against GradeCalculator: {len(mismatches)} mismatch(es)")
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
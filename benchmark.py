@@ -0,0 +1,437 @@
+# benchmark.py
+"""
+Performance benchmarks for the METU NCC Transcript System.
+Run against an already populated database (see database.py):
+
+    python benchmark.py --db_path transcript_system.db
+"""
+
+import argparse
+import functools
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from class_ranking import ClassRanking
+from database import TranscriptDatabase
+from grade_calculator import CourseGrade, GradeCalculator
+from transcript_generator import TranscriptGenerator
+
+
+def _scratch_copy(db_path: str) -> str:
+    """Copies the database to a temporary file so write benchmarks leave the original untouched."""
+    scratch_path = os.path.join(tempfile.mkdtemp(prefix="transcript_bench_"), "scratch.db")
+    shutil.copyfile(db_path, scratch_path)
+    return scratch_path
+
+
+def _registration_candidates(db: TranscriptDatabase, limit: int = 20):
+    """(student_id, courses) pairs: each student's 7th-semester curriculum courses, to register for 2025-Fall."""
+    conn = db.get_connection()
+    try:
+        rows = conn.execute("""SELECT s.student_id, cc.course_code FROM students s
+                               JOIN curriculum_courses cc ON cc.curriculum_id = s.curriculum_id
+                               WHERE cc.semester_suggested = 7
+                               ORDER BY s.student_id, cc.course_code""").fetchall()
+    finally:
+        conn.close()
+    courses_by_student = {}
+    for student_id, course_code in rows:
+        courses_by_student.setdefault(student_id, []).append(course_code)
+    return list(courses_by_student.items())[:limit]
+
+
+def bench_connection_pool(db_path: str, rounds: int = 3):
+    """
+    Generates every transcript with and without the connection pool and reports
+    wall time plus physical connections opened per transcript after warm-up.
+    """
+    print("\n=== Connection pool ===")
+    for label, pool_size in [("per-call connections", 0), ("pooled (size 5)", 5)]:
+        generator = TranscriptGenerator(db_path=db_path, pool_size=pool_size)
+        student_ids = generator.database.get_all_students()
+
+        # Warm-up pass: lets the pool open its connections
+        with redirect_stdout(io.StringIO()):
+            for student_id in student_ids:
+                generator.generate_student_transcript(student_id)
+
+        opened_before = generator.database.connections_opened
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            for _ in range(rounds):
+                for student_id in student_ids:
+                    generator.generate_student_transcript(student_id)
+        elapsed = time.perf_counter() - start
+        transcripts = rounds * len(student_ids)
+        opened = generator.database.connections_opened - opened_before
+        generator.database.close()
+
+        print(f"  {label:<22} {transcripts} transcripts in {elapsed:.3f}s "
+              f"({transcripts / elapsed:.0f}/s), "
+              f"connections per transcript: {opened / transcripts:.2f}")
+
+
+def bench_bulk_loader(db_path: str, rounds: int = 3):
+    """Compares per-student loading (2 queries per student) with the bulk loader."""
+    print("\n=== Bulk transcript loader ===")
+    generator = TranscriptGenerator(db_path=db_path)
+    student_ids = generator.database.get_all_students()
+
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for student_id in student_ids:
+                generator.generate_student_transcript(student_id)
+        per_student = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            generator.generate_transcripts_bulk()
+        bulk = time.perf_counter() - start
+    generator.database.close()
+
+    print(f"  per-student queries    {per_student:.3f}s for {rounds} x {len(student_ids)} students")
+    print(f"  bulk loader            {bulk:.3f}s ({per_student / bulk:.1f}x faster)")
+
+
+def bench_prerequisite_cache(db_path: str):
+    """Counts prerequisite queries per semester registration once the graph cache is warm."""
+    print("\n=== Prerequisite graph cache ===")
+    db = TranscriptDatabase(_scratch_copy(db_path))
+    candidates = _registration_candidates(db)
+    if len(candidates) < 2:
+        print("  Not enough students to benchmark registration.")
+        return
+
+    with redirect_stdout(io.StringIO()):
+        warm_student, warm_courses = candidates[0]
+        db.register_for_semester(warm_student, "2025-Fall", warm_courses)
+        loads_before = db.prerequisite_graph_loads
+        start = time.perf_counter()
+        for student_id, courses in candidates[1:]:
+            db.register_for_semester(student_id, "2025-Fall", courses)
+        elapsed = time.perf_counter() - start
+    new_curricula = len({db.get_student_info(s)['curriculum_id'] for s, _ in candidates[1:]}
+                        - {db.get_student_info(warm_student)['curriculum_id']})
+    db.close()
+
+    registrations = len(candidates) - 1
+    print(f"  {registrations} semester registrations in {elapsed:.3f}s; "
+          f"prerequisite queries: {db.prerequisite_graph_loads - loads_before} "
+          f"(= first use of {new_curricula} other curricula, 0 per registration after that)")
+
+
+def bench_batch_registration(db_path: str):
+    """Registers every student for 2025-Fall one transaction per student vs. one for the whole cohort."""
+    print("\n=== Batch registration ===")
+    per_student_db = TranscriptDatabase(_scratch_copy(db_path))
+    cohort_db = TranscriptDatabase(_scratch_copy(db_path))
+    registrations = dict(_registration_candidates(per_student_db, limit=10 ** 9))
+
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for student_id, courses in registrations.items():
+            per_student_db.register_for_semester(student_id, "2025-Fall", courses)
+        per_student = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = cohort_db.register_cohort_for_semester("2025-Fall", registrations)
+        cohort = time.perf_counter() - start
+    per_student_db.close()
+    cohort_db.close()
+
+    accepted = sum(success for outcomes in results.values() for _, success, _ in outcomes)
+    print(f"  register_for_semester x{len(registrations)}   {per_student:.3f}s ({len(registrations)} commits)")
+    print(f"  register_cohort_for_semester  {cohort:.3f}s (1 commit, {accepted} courses accepted)")
+
+
+def bench_streaming(db_path: str):
+    """Peak Python memory and time to first transcript: list-building bulk run vs. the streaming iterator."""
+    print("\n=== Streaming transcripts ===")
+    generator = TranscriptGenerator(db_path=db_path)
+    with redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        start = time.perf_counter()
+        transcripts = generator.generate_all_transcripts()
+        first_list = time.perf_counter() - start
+        count = len(transcripts)
+        del transcripts
+        list_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        first_stream = None
+        for _ in generator.iter_all_transcripts():
+            if first_stream is None:
+                first_stream = time.perf_counter() - start
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    generator.database.close()
+
+    print(f"  generate_all_transcripts  peak {list_peak / 1024:.0f} KiB, first transcript after {first_list * 1000:.1f}ms ({count} students)")
+    print(f"  iter_all_transcripts      peak {stream_peak / 1024:.0f} KiB, first transcript after {(first_stream or 0) * 1000:.1f}ms")
+
+
+def _long_record(calc: GradeCalculator, rng: random.Random, num_semesters: int = 14, courses_per_semester: int = 6):
+    """Synthetic enrollment record: num_semesters semesters, about a third of the courses failed and retaken."""
+    grades = ['AA', 'BA', 'BB', 'CB', 'CC', 'DC', 'DD', 'FD', 'FF', 'NA', 'W', 'S', 'U']
+    semesters = [f"{2010 + i // 2}-{'Fall' if i % 2 == 0 else 'Spring'}" for i in range(num_semesters)]
+    enrollments, attempts, next_course = [], {}, 0
+    for semester in semesters:
+        retakes = [code for code, (grade, _) in attempts.items() if grade in ('FF', 'FD', 'NA', 'U', 'W')]
+        new_courses = [f"C{next_course + i:03d}" for i in range(max(courses_per_semester - len(retakes), 2))]
+        next_course += len(new_courses)
+        for code in retakes + new_courses:
+            attempt_number = attempts.get(code, (None, 0))[1] + 1
+            grade = rng.choice(grades) if rng.random() < 0.65 else rng.choice(['FF', 'FD', 'W'])
+            attempts[code] = (grade, attempt_number)
+            enrollments.append({'course_code': code, 'course_name': code, 'semester': semester, 'grade': grade,
+                                'attempt_number': attempt_number, 'metu_credits': f"{rng.choice([2, 3, 4])}(3-0)",
+                                'ects_credits': 6.0})
+    return calc.group_grades_by_semester(calc.process_course_grades(enrollments))
+
+
+def _reference_semester_summary(calc: GradeCalculator, semester_grades):
+    """The previous calculate_semester_summary: recomputes the CGPA of the whole prefix every semester."""
+    summary, seen = {}, []
+    for semester in sorted(semester_grades, key=functools.cmp_to_key(calc._compare_semesters)):
+        sem_gpa, sem_points, sem_credits = calc.calculate_semester_gpa(semester_grades[semester])
+        seen.extend(semester_grades[semester])
+        cgpa, cum_points, cum_credits = calc.calculate_cgpa(seen)
+        summary[semester] = {'semester_gpa': sem_gpa, 'semester_points': sem_points, 'semester_credits': sem_credits,
+                             'cumulative_gpa': cgpa, 'cumulative_points': cum_points,
+                             'cumulative_credits': cum_credits, 'courses': semester_grades[semester]}
+    return summary
+
+
+def bench_semester_summary(num_records: int = 300):
+    """Running-CGPA calculate_semester_summary vs. the old per-semester recomputation on long, retake-heavy records."""
+    print("\n=== Semester summary (running CGPA) ===")
+    calc = GradeCalculator()
+    rng = random.Random(14)
+    for num_semesters in (8, 14, 24):
+        records = [_long_record(calc, rng, num_semesters) for _ in range(num_records)]
+        start = time.perf_counter()
+        expected = [_reference_semester_summary(calc, record) for record in records]
+        reference = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = [calc.calculate_semester_summary(record) for record in records]
+        running = time.perf_counter() - start
+        enrollments = sum(len(grades) for record in records for grades in record.values()) / num_records
+        print(f"  {num_semesters:>2} semesters (~{enrollments:.0f} enrollments/student): "
+              f"recompute {reference * 1000:.1f}ms, running {running * 1000:.1f}ms "
+              f"({reference / running:.1f}x), identical: {actual == expected}")
+
+
+def bench_what_if(num_records: int = 200, scenarios_per_record: int = 50):
+    """What-if projections from cached latest-grade aggregates vs. recomputing the CGPA over the whole record."""
+    print("\n=== What-if CGPA projection ===")
+    calc = GradeCalculator()
+    rng = random.Random(18)
+    grades = ['AA', 'BA', 'BB', 'CB', 'CC', 'DC', 'DD', 'FF', 'W']
+    records = [[grade for semester in _long_record(calc, rng).values() for grade in semester] for _ in range(num_records)]
+    scenarios = []
+    for record in records:
+        codes = sorted({grade.course_code for grade in record}) + ["NEW1", "NEW2"]
+        for _ in range(scenarios_per_record):
+            scenarios.append((record, {code: rng.choice(grades) for code in rng.sample(codes, 3)}))
+    credit_hours = {"NEW1": 3.0, "NEW2": 4.0}
+
+    start = time.perf_counter()
+    expected = []
+    for record, hypothetical in scenarios:
+        latest_hours = {code: grade.credit_hours for code, grade in calc.get_latest_grades(record).items()}
+        retakes = [CourseGrade(code, code, "2099-Fall", grade, "", 0.0, 9, credit_hours.get(code, latest_hours.get(code)))
+                   for code, grade in hypothetical.items()]
+        expected.append(calc.calculate_cgpa(record + retakes))
+    recompute = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bases = {id(record): calc.projection_base(record) for record in records}
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = [calc.project_cgpa(bases[id(record)], hypothetical, credit_hours) for record, hypothetical in scenarios]
+    projected = time.perf_counter() - start
+    print(f"  {len(scenarios)} scenarios: recompute {len(scenarios) / recompute:,.0f}/s, "
+          f"projection {len(scenarios) / projected:,.0f}/s (+{build * 1000:.1f}ms to build {num_records} bases), "
+          f"identical: {actual == expected}")
+
+
+def bench_statistics(db_path: str):
+    """get_transcript_statistics from stored summaries and SQL aggregates vs. building every transcript."""
+    print("\n=== Transcript statistics ===")
+    generator = TranscriptGenerator(db_path)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        full = generator.get_transcript_statistics_full()
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = generator.get_transcript_statistics()
+    fast_seconds = time.perf_counter() - start
+    print(f"  {fast['total_students']} students: full transcripts {full_seconds * 1000:.0f}ms, "
+          f"aggregates {fast_seconds * 1000:.1f}ms ({full_seconds / fast_seconds:.0f}x), identical: {fast == full}")
+
+
+def bench_ranking(db_path: str, lookups: int = 100000):
+    """ClassRanking: index build, rank/percentile lookups, and an incremental refresh after grade changes."""
+    print("\n=== Class ranking ===")
+    db = TranscriptDatabase(_scratch_copy(db_path))
+    start = time.perf_counter()
+    ranking = ClassRanking(db)
+    build = time.perf_counter() - start
+    rng = random.Random(20)
+    student_ids = list(ranking.students)
+    queries = [(rng.choice(student_ids), rng.choice(ClassRanking.SCOPES)) for _ in range(lookups)]
+    start = time.perf_counter()
+    for student_id, scope in queries:
+        ranking.rank(student_id, scope)
+    lookup = time.perf_counter() - start
+
+    with redirect_stdout(io.StringIO()):
+        for student_id in rng.sample(student_ids, min(20, len(student_ids))):
+            enrollments = db.get_student_enrollments(student_id)
+            if enrollments:
+                db.update_grade(student_id, enrollments[0]['course_code'], enrollments[0]['semester'], 'AA')
+    start = time.perf_counter()
+    refreshed = ranking.refresh()
+    refresh = time.perf_counter() - start
+    db.close()
+    print(f"  build {len(student_ids)} students: {build * 1000:.1f}ms, {lookups / lookup:,.0f} rank lookups/s, "
+          f"refresh after {refreshed} changed students: {refresh * 1000:.1f}ms")
+
+
+def bench_degree_audit(db_path: str):
+    """Campus-wide degree audit in one streaming pass with bitmask curricula vs. per-student queries and sets."""
+    print("\n=== Degree audit ===")
+    generator = TranscriptGenerator(db_path)
+    database, calc = generator.database, generator.grade_calculator
+    start = time.perf_counter()
+    audits = dict(generator.degree_auditor.audit_students())
+    bitset = time.perf_counter() - start
+
+    start = time.perf_counter()
+    remaining = {}
+    with redirect_stdout(io.StringIO()):
+        for student_id in database.get_all_students():
+            student_info = database.get_student_info(student_id)
+            latest = calc.get_latest_grades(calc.process_course_grades(database.get_student_enrollments(student_id)))
+            passed = {code for code, grade in latest.items() if calc.is_passing_grade(grade.grade)}
+            remaining[student_id] = [course['course_code'] for course in database.get_curriculum_courses(student_info['curriculum_id'])
+                                     if course['is_required'] and course['course_code'] not in passed]
+    per_student = time.perf_counter() - start
+    identical = all(audits[student_id].missing_courses == remaining[student_id] for student_id in remaining)
+    print(f"  {len(audits)} students: per-student queries + sets {per_student * 1000:.0f}ms, "
+          f"streaming bitmask audit {bitset * 1000:.0f}ms ({per_student / bitset:.1f}x), identical: {identical}")
+
+
+def bench_eligibility(db_path: str, num_courses: int = 40):
+    """Batch eligibility (prerequisite closure, NumPy) vs. are_prerequisites_satisfied per (student, course)."""
+    print("\n=== Batch prerequisite eligibility ===")
+    try:
+        from prerequisite_closure import EligibilityEngine
+    except ImportError:
+        print("  skipped (needs NumPy: pip install numpy)")
+        return
+    database = TranscriptDatabase(db_path)
+    with database.connection() as conn:
+        courses = [row[0] for row in conn.execute(
+            "SELECT DISTINCT course_code FROM prerequisites ORDER BY course_code LIMIT ?", (num_courses,))]
+    students = {student_id: info['curriculum_id'] for student_id, info in database.get_students_info_bulk().items()}
+
+    engine = EligibilityEngine(database)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        eligible = engine.eligible_students(courses)
+    batch = time.perf_counter() - start
+    # Courses on or behind a prerequisite cycle are never eligible in the batch result
+    blocked = {}
+    for curriculum_id in set(students.values()):
+        closure = engine.get_closure(curriculum_id)
+        blocked[curriculum_id] = {course_code for course_code in courses if closure.is_blocked(course_code)}
+
+    start = time.perf_counter()
+    expected = {course_code: set() for course_code in courses}
+    for student_id, curriculum_id in students.items():
+        passed = set(database.get_student_passed_courses(student_id))
+        for course_code in courses:
+            if course_code in blocked[curriculum_id]:
+                continue
+            if course_code not in passed and database.are_prerequisites_satisfied(student_id, curriculum_id, course_code)[0]:
+                expected[course_code].add(student_id)
+    per_pair = time.perf_counter() - start
+    identical = all(set(eligible[course_code]) == expected[course_code] for course_code in courses)
+    print(f"  {len(students)} students x {len(courses)} courses: per pair {per_pair * 1000:.0f}ms, "
+          f"batch {batch * 1000:.0f}ms ({per_pair / batch:.0f}x), identical: {identical}")
+
+
+def bench_graduation_planner(db_path: str):
+    """Plans every student with remaining courses on campus (the nightly planning run)."""
+    print("\n=== Graduation planner ===")
+    try:
+        from graduation_planner import GraduationPlanner
+    except ImportError:
+        print("  skipped (needs NumPy: pip install numpy)")
+        return
+    planner = GraduationPlanner(TranscriptDatabase(db_path))
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        plans = list(planner.plan_students())
+    elapsed = time.perf_counter() - start
+    minimal = sum(plan.is_minimal for plan in plans)
+    print(f"  {len(plans)} plans in {elapsed * 1000:.0f}ms ({len(plans) / elapsed:,.0f}/s), "
+          f"{minimal} provably minimal")
+
+
+def bench_transcript_cache(db_path: str):
+    """Campus transcript generation with a cold and a warm TranscriptCache vs. no cache."""
+    print("\n=== Transcript cache ===")
+    cache_path = os.path.join(tempfile.mkdtemp(prefix="transcript_bench_"), "cache.db")
+    plain = TranscriptGenerator(db_path)
+    cached = TranscriptGenerator(db_path, cache_path=cache_path)
+    timings = {}
+    with redirect_stdout(io.StringIO()):
+        for label, generator in (("no cache", plain), ("cold cache", cached), ("warm cache", cached)):
+            start = time.perf_counter()
+            data = generator.generate_transcripts_bulk()
+            timings[label] = time.perf_counter() - start
+    stats = cached.cache.stats()
+    print(f"  {len(data)} students: " + ", ".join(f"{label} {seconds * 1000:.0f}ms" for label, seconds in timings.items())
+          + f"; {stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MiB, {stats['hits']} hits")
+    cached.cache.close()
+    shutil.rmtree(os.path.dirname(cache_path), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript system benchmarks")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Path to a populated database file")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed passes over all students (default: 3)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"Error: Database file '{args.db_path}' not found. Run database.py first.")
+        return
+
+    bench_connection_pool(args.db_path, args.rounds)
+    bench_bulk_loader(args.db_path, args.rounds)
+    bench_prerequisite_cache(args.db_path)
+    bench_batch_registration(args.db_path)
+    bench_streaming(args.db_path)
+    bench_semester_summary()
+    bench_what_if()
+    bench_statistics(args.db_path)
+    bench_ranking(args.db_path)
+    bench_degree_audit(args.db_path)
+    bench_eligibility(args.db_path)
+    bench_graduation_planner(args.db_path)
+    bench_transcript_cache(args.db_path)
+
+
+if __name__ == "__main__":
+    main()
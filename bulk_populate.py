@@ -0,0 +1,263 @@
+# bulk_populate.py
+"""
+Bulk sample-data population for load testing.
+
+populate_sample_data() in database.py goes through the regular one-row-per-call
+API, which is fine for 75 students but far too slow for 50k-100k. This module runs
+the same academic progression (retakes first, suggested-semester courses, prerequisite
+checks, attempt numbers, simulated grades) in memory and writes everything with
+executemany inside a handful of transactions.
+
+    python bulk_populate.py --db_path load_test.db --students 100000 --seed 7 --dept_mix CNG=2,EEE=1,SNG=1
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Tuple, Any
+
+from curriculum_data import SNG_CURRICULA_DATA, EEE_CURRICULA_DATA, CNG_CURRICULA_DATA
+from database import TranscriptDatabase
+from grade_calculator import GradeCalculator
+from semester import semester_ordinal
+
+CURRICULA_DATASETS = {
+    "CNG": CNG_CURRICULA_DATA,
+    "EEE": EEE_CURRICULA_DATA,
+    "SNG": SNG_CURRICULA_DATA,
+}
+
+
+class BulkPopulator:
+    """
+    Writes departments, curricula, students and simulated enrollments in bulk.
+    All randomness comes from one seeded random.Random, so a seed reproduces a database.
+    """
+
+    def __init__(self, database: TranscriptDatabase, seed: Optional[int] = None):
+        self.database = database
+        self.rng = random.Random(seed)
+        self.grade_calculator = GradeCalculator()
+        # curriculum_id -> {'courses_by_semester', 'prerequisites', 'credit_hours'}
+        self.curricula: Dict[int, Dict[str, Any]] = {}
+        self.curriculum_ids_by_dept: Dict[str, List[int]] = {}
+        self.rows_written = 0
+
+    def load_catalog(self, conn):
+        """Writes departments, course names, curricula and prerequisites, and keeps them in memory."""
+        c = conn.cursor()
+        c.executemany("INSERT OR IGNORE INTO departments (dept_id, dept_name) VALUES (?, ?)",
+                      TranscriptDatabase.SAMPLE_DEPARTMENTS)
+
+        course_names: Dict[str, Tuple[str, str]] = {}
+        for course_data in TranscriptDatabase.EXTERNAL_PREREQUISITE_COURSES:
+            course_names.setdefault(course_data['code'], (course_data['name'], course_data['dept_id']))
+        for dept_id, curriculum_data in CURRICULA_DATASETS.items():
+            for courses in curriculum_data.values():
+                for course_data in courses:
+                    course_names.setdefault(course_data['code'], (course_data['name'], dept_id))
+        c.executemany("INSERT OR IGNORE INTO course_names (course_code, course_name, dept_id) VALUES (?, ?, ?)",
+                      [(code, name, dept_id) for code, (name, dept_id) in course_names.items()])
+        known_codes = {row[0] for row in c.execute("SELECT course_code FROM course_names")}
+
+        for dept_id, curriculum_data in CURRICULA_DATASETS.items():
+            self.curriculum_ids_by_dept[dept_id] = []
+            for version_num, courses in curriculum_data.items():
+                c.execute("SELECT curriculum_id FROM curriculum_versions WHERE dept_id = ? AND version_number = ?",
+                          (dept_id, version_num))
+                row = c.fetchone()
+                if row:
+                    curriculum_id = row[0]
+                else:
+                    c.execute("INSERT INTO curriculum_versions (dept_id, version_number, version_name) VALUES (?, ?, ?)",
+                              (dept_id, version_num, f"{dept_id} Curriculum v{version_num} (Embedded)"))
+                    curriculum_id = c.lastrowid
+
+                course_rows, prereq_rows = {}, set()
+                for course_data in courses:
+                    course_rows.setdefault(course_data['code'], course_data)  # First entry wins, like INSERT OR IGNORE
+                    for prereq_code in course_data.get('prerequisites') or []:
+                        if prereq_code in known_codes and course_data['code'] in known_codes:
+                            prereq_rows.add((curriculum_id, course_data['code'], prereq_code))
+                c.executemany("""INSERT OR IGNORE INTO curriculum_courses
+                                 (curriculum_id, course_code, metu_credits, ects_credits, semester_suggested,
+                                  credit_hours, lecture_hours, lab_hours)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                              [(curriculum_id, code, d['metu'], d['ects'], d['sem'])
+                               + self.grade_calculator.parse_metu_credits(d['metu']) for code, d in course_rows.items()])
+                c.executemany("INSERT OR IGNORE INTO prerequisites (curriculum_id, course_code, prerequisite_code) VALUES (?, ?, ?)",
+                              sorted(prereq_rows))
+                self.database.invalidate_prerequisite_graph(curriculum_id)
+
+                # Keep what the database actually holds for the simulation
+                c.execute("SELECT course_code, semester_suggested, credit_hours FROM curriculum_courses WHERE curriculum_id = ?",
+                          (curriculum_id,))
+                courses_by_semester: Dict[int, List[str]] = {}
+                credit_hours: Dict[str, float] = {}
+                for course_code, semester_suggested, course_credit_hours in c.fetchall():
+                    courses_by_semester.setdefault(semester_suggested, []).append(course_code)
+                    credit_hours[course_code] = course_credit_hours
+                prerequisites: Dict[str, List[str]] = {}
+                c.execute("SELECT course_code, prerequisite_code FROM prerequisites WHERE curriculum_id = ?", (curriculum_id,))
+                for course_code, prereq_code in c.fetchall():
+                    prerequisites.setdefault(course_code, []).append(prereq_code)
+
+                self.curricula[curriculum_id] = {'courses_by_semester': courses_by_semester,
+                                                 'prerequisites': prerequisites,
+                                                 'credit_hours': credit_hours}
+                self.curriculum_ids_by_dept[dept_id].append(curriculum_id)
+        conn.commit()
+
+    def simulate_student(self, student_id: str, curriculum_id: int, num_semesters: int = 6) -> List[tuple]:
+        """
+        Runs the register_for_semester / random-grade progression for one student in memory.
+        Returns student_enrollments rows (student_id, course_code, semester, grade, attempt_number).
+        """
+        curriculum = self.curricula[curriculum_id]
+        prerequisites = curriculum['prerequisites']
+        credit_hours = curriculum['credit_hours']
+        passed = set()
+        attempts: Dict[str, int] = {}
+        taken_in_semester = set()  # (course_code, semester), mirrors UNIQUE(student_id, course_code, semester)
+        rows = []
+
+        for semester_num in range(1, num_semesters + 1):
+            semester = TranscriptDatabase.SAMPLE_SEMESTERS[semester_num - 1]
+            # Retakes of never-passed courses first, then the courses suggested for this semester
+            retakes = sorted(code for code in attempts if code not in passed)
+            new_courses = curriculum['courses_by_semester'].get(semester_num, [])
+            this_semester = []
+            for course_code in retakes + new_courses:
+                if course_code in passed or (course_code, semester) in taken_in_semester:
+                    continue
+                if any(prereq not in passed for prereq in prerequisites.get(course_code, ())):
+                    continue
+                attempts[course_code] = attempts.get(course_code, 0) + 1
+                taken_in_semester.add((course_code, semester))
+                this_semester.append((course_code, attempts[course_code]))
+
+            for course_code, attempt_number in this_semester:
+                if credit_hours.get(course_code, 0.0) == 0:
+                    grade = self.rng.choice(TranscriptDatabase.SIMULATED_PASS_FAIL_GRADES)
+                else:
+                    grade = self.rng.choices(TranscriptDatabase.SIMULATED_LETTER_GRADES,
+                                             weights=TranscriptDatabase.SIMULATED_LETTER_GRADE_WEIGHTS)[0]
+                if self.grade_calculator.is_passing_grade(grade):
+                    passed.add(course_code)
+                rows.append((student_id, course_code, semester, grade, attempt_number))
+        return rows
+
+    def _assign_departments(self, num_students: int, dept_mix: Dict[str, float]) -> List[str]:
+        """Splits num_students across departments in proportion to dept_mix."""
+        total_weight = sum(dept_mix.values())
+        dept_ids = list(dept_mix)
+        counts = [int(num_students * dept_mix[d] / total_weight) for d in dept_ids]
+        counts[-1] += num_students - sum(counts)
+        assignment = []
+        for dept_id, count in zip(dept_ids, counts):
+            assignment.extend([dept_id] * count)
+        return assignment
+
+    def _next_student_number(self, conn) -> int:
+        row = conn.execute("SELECT MAX(CAST(substr(student_id, 3) AS INTEGER)) FROM students WHERE student_id LIKE '26%'").fetchone()
+        return (row[0] or 0) + 1
+
+    @staticmethod
+    def _new_student_ids(first_number: int, end_number: int) -> List[str]:
+        return [f"26{str(number).zfill(5)}" for number in range(first_number, end_number)]
+
+    def populate(self, num_students: int = 75, dept_mix: Optional[Dict[str, float]] = None,
+                 batch_size: int = 5000, num_semesters: int = 6) -> Dict[str, Any]:
+        """
+        Creates num_students students (split by dept_mix, default equal CNG/EEE/SNG) with
+        simulated enrollments. Commits once per batch_size students.
+        Returns counts, elapsed seconds and rows/second.
+        """
+        dept_mix = dept_mix or {dept_id: 1.0 for dept_id in CURRICULA_DATASETS}
+        unknown = [d for d in dept_mix if d not in CURRICULA_DATASETS]
+        if unknown:
+            raise ValueError(f"No embedded curricula for department(s): {', '.join(unknown)}")
+
+        start = time.perf_counter()
+        students_written = enrollments_written = 0
+        conn = self.database.get_connection()
+        try:
+            self.load_catalog(conn)
+            student_number = self._next_student_number(conn)
+            first_student_number = student_number
+            c = conn.cursor()
+            student_rows, enrollment_rows = [], []
+            for dept_id in self._assign_departments(num_students, dept_mix):
+                student_id = f"26{str(student_number).zfill(5)}"
+                student_number += 1
+                curriculum_id = self.rng.choice(self.curriculum_ids_by_dept[dept_id])
+                student_rows.append((student_id, self.rng.choice(TranscriptDatabase.SAMPLE_FIRST_NAMES),
+                                     self.rng.choice(TranscriptDatabase.SAMPLE_LAST_NAMES),
+                                     dept_id, curriculum_id, self.rng.randint(2020, 2023)))
+                enrollment_rows.extend(self.simulate_student(student_id, curriculum_id, num_semesters))
+
+                if len(student_rows) >= batch_size:
+                    self._write_batch(c, student_rows, enrollment_rows)
+                    conn.commit()
+                    students_written += len(student_rows)
+                    enrollments_written += len(enrollment_rows)
+                    student_rows, enrollment_rows = [], []
+            if student_rows:
+                self._write_batch(c, student_rows, enrollment_rows)
+                conn.commit()
+                students_written += len(student_rows)
+                enrollments_written += len(enrollment_rows)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        # Materialize the GPA summaries of the new students in one pass
+        self.database.rebuild_gpa_summaries(self._new_student_ids(first_student_number, student_number))
+
+        elapsed = time.perf_counter() - start
+        rows = students_written + enrollments_written
+        self.rows_written += rows
+        return {'students': students_written, 'enrollments': enrollments_written, 'rows': rows,
+                'seconds': elapsed, 'rows_per_second': rows / elapsed if elapsed > 0 else 0.0}
+
+    def _write_batch(self, c, student_rows: List[tuple], enrollment_rows: List[tuple]):
+        c.executemany("""INSERT INTO students
+                         (student_id, first_name, last_name, dept_id, curriculum_id, enrollment_year)
+                         VALUES (?, ?, ?, ?, ?, ?)""", student_rows)
+        c.executemany("""INSERT INTO student_enrollments
+                         (student_id, course_code, semester, grade, attempt_number, semester_ordinal)
+                         VALUES (?, ?, ?, ?, ?, ?)""", [row + (semester_ordinal(row[2]),) for row in enrollment_rows])
+        self.database.mark_students_changed(c.connection, [row[0] for row in student_rows])
+
+
+def parse_dept_mix(text: str) -> Dict[str, float]:
+    """Parses "CNG=2,EEE=1,SNG=1" into {'CNG': 2.0, 'EEE': 1.0, 'SNG': 1.0}."""
+    mix = {}
+    for part in text.split(','):
+        dept_id, _, weight = part.partition('=')
+        mix[dept_id.strip().upper()] = float(weight) if weight else 1.0
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-populate a transcript database for load testing")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Database file to populate (created if missing)")
+    parser.add_argument("--students", type=int, default=75, help="Number of students to create (default: 75)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for a reproducible database")
+    parser.add_argument("--dept_mix", default="CNG=1,EEE=1,SNG=1", help="Department weights, e.g. CNG=2,EEE=1,SNG=1")
+    parser.add_argument("--batch_size", type=int, default=5000, help="Students per transaction (default: 5000)")
+    args = parser.parse_args()
+
+    database = TranscriptDatabase(db_name=args.db_path)
+    populator = BulkPopulator(database, seed=args.seed)
+    print(f"Populating {args.students} students into {args.db_path}...")
+    result = populator.populate(args.students, parse_dept_mix(args.dept_mix), batch_size=args.batch_size)
+    database.close()
+    print(f"Wrote {result['students']} students and {result['enrollments']} enrollments "
+          f"({result['rows']} rows) in {result['seconds']:.2f}s - {result['rows_per_second']:.0f} rows/second.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# class_ranking.py
+"""
+Class ranking by CGPA: an in-memory sorted index per scope group, built from the stored
+GPA summaries (student_gpa_summary) and kept current through the change log.
+
+Scopes: 'campus' (group None), 'department' (dept_id), 'curriculum' (curriculum_id) and
+'cohort' ((dept_id, enrollment_year)). Rank and percentile lookups are two binary searches;
+top-k and honor-roll extraction read a prefix of the group.
+"""
+
+import bisect
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from database import TranscriptDatabase
+from grade_calculator import GradeCalculator
+
+
+class RankingGroup:
+    """Students of one group, best CGPA first (ties by student ID)."""
+
+    def __init__(self):
+        # Parallel lists sorted by (-cgpa, student_id); negated so bisect works on ascending order
+        self.neg_cgpas: List[float] = []
+        self.student_ids: List[str] = []
+
+    @classmethod
+    def from_entries(cls, entries: List[Tuple[float, str]]) -> 'RankingGroup':
+        """A group built from (-cgpa, student_id) pairs with one sort; add() is for incremental updates."""
+        ranking_group = cls()
+        for neg_cgpa, student_id in sorted(entries):
+            ranking_group.neg_cgpas.append(neg_cgpa)
+            ranking_group.student_ids.append(student_id)
+        return ranking_group
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    def _position(self, student_id: str, cgpa: float) -> int:
+        low = bisect.bisect_left(self.neg_cgpas, -cgpa)
+        high = bisect.bisect_right(self.neg_cgpas, -cgpa)
+        return bisect.bisect_left(self.student_ids, student_id, low, high)
+
+    def add(self, student_id: str, cgpa: float):
+        i = self._position(student_id, cgpa)
+        self.neg_cgpas.insert(i, -cgpa)
+        self.student_ids.insert(i, student_id)
+
+    def remove(self, student_id: str, cgpa: float):
+        i = self._position(student_id, cgpa)
+        del self.neg_cgpas[i]
+        del self.student_ids[i]
+
+    def rank(self, cgpa: float) -> Tuple[int, float]:
+        """
+        (rank, percentile) of a CGPA: rank 1 is the best, equal CGPAs share a rank; the
+        percentile is the share of the group below it, counting ties as half.
+        """
+        higher = bisect.bisect_left(self.neg_cgpas, -cgpa)
+        not_lower = bisect.bisect_right(self.neg_cgpas, -cgpa)
+        lower = len(self.neg_cgpas) - not_lower
+        equal = not_lower - higher
+        return higher + 1, 100.0 * (lower + 0.5 * equal) / len(self.neg_cgpas)
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        return [(student_id, -neg_cgpa) for neg_cgpa, student_id in zip(self.neg_cgpas[:k], self.student_ids[:k])]
+
+
+class ClassRanking:
+    """
+    Rank, percentile, top-k and honor-roll queries over stored CGPAs. Call refresh() to
+    pick up grade changes made since the index was built (only changed students are re-read).
+    """
+    SCOPES = ('campus', 'department', 'curriculum', 'cohort')
+    HONOR_STANDINGS = ('High Honor', 'Honor')
+
+    def __init__(self, database: TranscriptDatabase, grade_calculator: Optional[GradeCalculator] = None):
+        self.database = database
+        self.grade_calculator = grade_calculator or GradeCalculator()
+        self.groups: Dict[Tuple[str, Hashable], RankingGroup] = {}
+        self.students: Dict[str, Tuple[float, Dict[str, Hashable]]] = {}  # student_id -> (cgpa, scope -> group)
+        self.change_seq = 0
+        with self.database.snapshot():
+            self.change_seq = self.database.get_change_watermark()
+            entries: Dict[Tuple[str, Hashable], List[Tuple[float, str]]] = {}
+            for student_id, dept_id, curriculum_id, enrollment_year, cgpa in self.database.get_ranking_rows():
+                group_keys = self._group_keys(dept_id, curriculum_id, enrollment_year)
+                for scope, group in group_keys.items():
+                    entries.setdefault((scope, group), []).append((-cgpa, student_id))
+                self.students[student_id] = (cgpa, group_keys)
+        self.groups = {key: RankingGroup.from_entries(group_entries) for key, group_entries in entries.items()}
+
+    def _group_keys(self, dept_id: str, curriculum_id: int, enrollment_year: int) -> Dict[str, Hashable]:
+        return {'campus': None, 'department': dept_id, 'curriculum': curriculum_id,
+                'cohort': (dept_id, enrollment_year)}
+
+    def _add(self, student_id: str, dept_id: str, curriculum_id: int, enrollment_year: int, cgpa: float):
+        group_keys = self._group_keys(dept_id, curriculum_id, enrollment_year)
+        for scope, group in group_keys.items():
+            self.groups.setdefault((scope, group), RankingGroup()).add(student_id, cgpa)
+        self.students[student_id] = (cgpa, group_keys)
+
+    def _remove(self, student_id: str):
+        cgpa, group_keys = self.students.pop(student_id)
+        for scope, group in group_keys.items():
+            ranking_group = self.groups[(scope, group)]
+            ranking_group.remove(student_id, cgpa)
+            if not ranking_group:
+                del self.groups[(scope, group)]
+
+    def refresh(self) -> int:
+        """Re-reads students changed since the index was built or last refreshed; returns how many."""
+        with self.database.snapshot():
+            change_seq = self.database.get_change_watermark()
+            if change_seq == self.change_seq:
+                return 0
+            changed = self.database.get_changed_students(since_seq=self.change_seq)
+            rows = self.database.get_ranking_rows(changed) if changed else []
+        for student_id in changed:
+            if student_id in self.students:
+                self._remove(student_id)
+        for row in rows:
+            self._add(*row)
+        self.change_seq = change_seq
+        return len(changed)
+
+    def _check_scope(self, scope: str):
+        if scope not in self.SCOPES:
+            raise ValueError(f"Unknown ranking scope '{scope}' (expected one of {', '.join(self.SCOPES)})")
+
+    def rank(self, student_id: str, scope: str = 'department') -> Optional[Dict[str, Any]]:
+        """A student's rank within their group for scope, or None if the student isn't indexed."""
+        self._check_scope(scope)
+        if student_id not in self.students:
+            return None
+        cgpa, group_keys = self.students[student_id]
+        ranking_group = self.groups[(scope, group_keys[scope])]
+        rank, percentile = ranking_group.rank(cgpa)
+        return {'student_id': student_id, 'scope': scope, 'group': group_keys[scope], 'cgpa': cgpa,
+                'rank': rank, 'group_size': len(ranking_group), 'percentile': percentile}
+
+    def top(self, k: int, scope: str = 'campus', group: Hashable = None) -> List[Tuple[str, float]]:
+        """The k best (student_id, cgpa) of a group, e.g. top(10, 'cohort', ('SNG', 2021))."""
+        self._check_scope(scope)
+        ranking_group = self.groups.get((scope, group))
+        return ranking_group.top(k) if ranking_group else []
+
+    def honor_roll(self, scope: str = 'campus', group: Hashable = None,
+                   standings: Tuple[str, ...] = HONOR_STANDINGS) -> List[Tuple[str, float, str]]:
+        """
+        (student_id, cgpa, standing) of every student in the group whose get_academic_standing
+        is in standings, best first. Standing only improves with CGPA, so this reads a prefix.
+        """
+        self._check_scope(scope)
+        ranking_group = self.groups.get((scope, group))
+        if not ranking_group:
+            return []
+        honor_roll = []
+        for neg_cgpa, student_id in zip(ranking_group.neg_cgpas, ranking_group.student_ids):
+            standing = self.grade_calculator.get_academic_standing(-neg_cgpa)
+            if standing not in standings:
+                if honor_roll:
+                    break
+                continue
+            honor_roll.append((student_id, -neg_cgpa, standing))
+        return honor_roll
+
+    def group_keys(self, scope: str) -> List[Hashable]:
+        """Every group of a scope that has at least one student."""
+        self._check_scope(scope)
+        return [group for group_scope, group in self.groups if group_scope == scope]
@@ -0,0 +1,287 @@
+# cohort_simulator.py
+"""
+Vectorized cohort progression simulator for capacity planning.
+
+simulate_student_progression() in database.py registers and grades one student at a
+time through the database. This module loads a curriculum once and runs the same
+progression (retakes of never-passed courses, suggested-semester courses, prerequisite
+gating, weighted simulated grades) for a whole cohort at once with NumPy arrays
+shaped (students, courses). Results can be summarised directly or bulk-written
+to the database.
+
+Requires NumPy:  pip install numpy
+
+    python cohort_simulator.py --db_path transcript_system.db --curriculum_id 1 --students 1000 --runs 100 --seed 7
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from database import TranscriptDatabase
+from grade_calculator import GradeCalculator
+from semester import next_regular_semester, semester_ordinal
+
+
+@dataclass
+class CohortResult:
+    """Grades drawn for a simulated cohort."""
+    curriculum_id: int
+    course_codes: List[str]
+    semesters: List[str]
+    grades: np.ndarray       # (semesters, students, courses) grade index into CohortSimulator.GRADES, -1 = not taken
+    attempts: np.ndarray     # (semesters, students, courses) attempt number of that enrollment, 0 = not taken
+
+    @property
+    def num_students(self) -> int:
+        return self.grades.shape[1]
+
+
+class CohortSimulator:
+    """
+    Simulates many students of one curriculum at once.
+    Grade rules (passing, GPA-affecting, points) come from GradeCalculator, and the grade
+    weights from TranscriptDatabase, so the output matches what the one-at-a-time
+    simulation would produce.
+    """
+    GRADES = TranscriptDatabase.SIMULATED_LETTER_GRADES + TranscriptDatabase.SIMULATED_PASS_FAIL_GRADES
+    # Students per vectorized pass in run_many; the grade arrays are semesters x students x courses
+    MAX_BATCH_STUDENTS = 200_000
+
+    def __init__(self, database: TranscriptDatabase, curriculum_id: int, seed: Optional[int] = None):
+        self.database = database
+        self.curriculum_id = curriculum_id
+        self.rng = np.random.default_rng(seed)
+        self.grade_calculator = GradeCalculator()
+
+        conn = database.get_connection()
+        try:
+            rows = conn.execute("""SELECT course_code, semester_suggested, credit_hours FROM curriculum_courses
+                                   WHERE curriculum_id = ? ORDER BY semester_suggested, course_code""",
+                                (curriculum_id,)).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            raise ValueError(f"Curriculum {curriculum_id} has no courses")
+
+        self.course_codes = [row[0] for row in rows]
+        course_index = {code: i for i, code in enumerate(self.course_codes)}
+        self.suggested_semester = np.array([row[1] for row in rows], dtype=np.int16)
+        self.credit_hours = np.array([row[2] for row in rows], dtype=float)
+        self.pass_fail_course = self.credit_hours == 0
+
+        # prereq_matrix[c, p] = 1 when course p is a prerequisite of course c. A prerequisite outside
+        # the curriculum can never be passed by these students, so such courses are always blocked.
+        num_courses = len(self.course_codes)
+        graph = database.get_prerequisite_graph(curriculum_id)
+        self.prereq_matrix = np.zeros((num_courses, num_courses), dtype=np.int32)
+        self.externally_blocked = np.zeros(num_courses, dtype=bool)
+        for course_code, prereqs in graph.prerequisites.items():
+            if course_code not in course_index:
+                continue
+            for prereq_code in prereqs:
+                if prereq_code in course_index:
+                    self.prereq_matrix[course_index[course_code], course_index[prereq_code]] = 1
+                else:
+                    self.externally_blocked[course_index[course_code]] = True
+
+        # Per-grade lookup tables
+        self.grade_passing = np.array([self.grade_calculator.is_passing_grade(g) for g in self.GRADES])
+        self.grade_points = np.array([self.grade_calculator.get_grade_points(g) or 0.0 for g in self.GRADES])
+        self.grade_in_gpa = np.array([self.grade_calculator.is_gpa_grade(g) and self.grade_calculator.get_grade_points(g) is not None
+                                      for g in self.GRADES])
+        weights = np.array(TranscriptDatabase.SIMULATED_LETTER_GRADE_WEIGHTS, dtype=float)
+        self.letter_weights = weights / weights.sum()
+
+    def _draw_grades(self, num_students: int) -> np.ndarray:
+        """Draws one grade per (student, course): weighted letters, or S/U for 0-credit courses."""
+        num_letters = len(TranscriptDatabase.SIMULATED_LETTER_GRADES)
+        letters = self.rng.choice(num_letters, size=(num_students, len(self.course_codes)), p=self.letter_weights)
+        pass_fail = num_letters + self.rng.integers(0, len(TranscriptDatabase.SIMULATED_PASS_FAIL_GRADES),
+                                                    size=(num_students, len(self.course_codes)))
+        return np.where(self.pass_fail_course, pass_fail, letters).astype(np.int8)
+
+    @staticmethod
+    def semester_labels(num_semesters: int) -> List[str]:
+        """Consecutive Fall/Spring labels from the first sample semester, as many as asked for."""
+        labels = [TranscriptDatabase.SAMPLE_SEMESTERS[0]]
+        while len(labels) < num_semesters:
+            labels.append(next_regular_semester(labels[-1]))
+        return labels[:num_semesters]
+
+    def simulate(self, num_students: int, num_semesters: int = 6,
+                 semesters: Optional[List[str]] = None) -> CohortResult:
+        """Runs num_semesters of registration and grading for num_students students."""
+        semesters = list(semesters or self.semester_labels(num_semesters))
+        if len(semesters) < num_semesters:
+            raise ValueError(f"{num_semesters} semesters to simulate but only {len(semesters)} labels given")
+        semesters = semesters[:num_semesters]
+        num_courses = len(self.course_codes)
+        passed = np.zeros((num_students, num_courses), dtype=bool)
+        attempts = np.zeros((num_students, num_courses), dtype=np.int16)
+        grades = np.full((num_semesters, num_students, num_courses), -1, dtype=np.int8)
+        attempt_log = np.zeros((num_semesters, num_students, num_courses), dtype=np.int16)
+
+        for t in range(num_semesters):
+            retakes = (attempts > 0) & ~passed
+            new_courses = self.suggested_semester == t + 1
+            missing_prereqs = (~passed).astype(np.int32) @ self.prereq_matrix.T
+            enrolled = (retakes | new_courses) & ~passed & (missing_prereqs == 0) & ~self.externally_blocked
+
+            drawn = self._draw_grades(num_students)
+            attempts += enrolled
+            grades[t] = np.where(enrolled, drawn, -1)
+            attempt_log[t] = np.where(enrolled, attempts, 0)
+            passed |= enrolled & self.grade_passing[drawn]
+
+        return CohortResult(self.curriculum_id, self.course_codes, list(semesters), grades, attempt_log)
+
+    def student_summaries(self, result: CohortResult) -> Dict[str, np.ndarray]:
+        """Per-student CGPA (latest attempt counts), credit totals and standing, as arrays."""
+        latest = np.full(result.grades.shape[1:], -1, dtype=np.int8)
+        for semester_grades in result.grades:
+            latest = np.where(semester_grades >= 0, semester_grades, latest)
+        taken = latest >= 0
+        safe_latest = np.where(taken, latest, 0)
+        in_gpa = taken & self.grade_in_gpa[safe_latest]
+        gpa_credits = np.where(in_gpa, self.credit_hours, 0.0)
+
+        total_points = (self.grade_points[safe_latest] * gpa_credits).sum(axis=1)
+        total_credits = gpa_credits.sum(axis=1)
+        raw_cgpa = np.divide(total_points, total_credits, out=np.zeros_like(total_points), where=total_credits > 0)
+        # Python's round (not np.round) so x.xx5 cases round exactly as GradeCalculator does
+        cgpa = np.fromiter((round(v, 2) for v in raw_cgpa.tolist()), dtype=float, count=len(raw_cgpa))
+        passed_credits = np.where(in_gpa & self.grade_passing[safe_latest], self.credit_hours, 0.0).sum(axis=1)
+
+        # Standing reuses GradeCalculator's thresholds on the (few) distinct CGPA values
+        unique_cgpa, inverse = np.unique(cgpa, return_inverse=True)
+        standing = np.array([self.grade_calculator.get_academic_standing(float(v)) for v in unique_cgpa], dtype=object)[inverse]
+        return {'cgpa': cgpa, 'total_points': total_points, 'total_credits': total_credits,
+                'passed_credits': passed_credits, 'standing': standing}
+
+    def statistics(self, result: CohortResult) -> Dict[str, Any]:
+        """Cohort-level numbers for capacity planning."""
+        summaries = self.student_summaries(result)
+        taken = result.grades >= 0
+        safe_grades = np.where(taken, result.grades, 0)
+        failed = taken & ~self.grade_passing[safe_grades]
+        standings, counts = np.unique(summaries['standing'], return_counts=True)
+        seats_per_semester = taken.sum(axis=1)  # (semesters, courses)
+        return {
+            'students': result.num_students,
+            'enrollments': int(taken.sum()),
+            'retakes': int((result.attempts > 1).sum()),
+            'average_cgpa': float(summaries['cgpa'].mean()),
+            'cgpa_percentiles': {p: float(np.percentile(summaries['cgpa'], p)) for p in (10, 25, 50, 75, 90)},
+            'average_passed_credits': float(summaries['passed_credits'].mean()),
+            'standing_counts': dict(zip(standings.tolist(), counts.tolist())),
+            'course_fail_rates': {code: float(failed[:, :, i].sum() / max(1, taken[:, :, i].sum()))
+                                  for i, code in enumerate(result.course_codes)},
+            'seats_per_semester': {semester: {code: int(n) for code, n in zip(result.course_codes, row) if n}
+                                   for semester, row in zip(result.semesters, seats_per_semester)},
+        }
+
+    def run_many(self, num_students: int, runs: int, num_semesters: int = 6) -> Dict[str, Any]:
+        """
+        Simulates `runs` independent cohorts of num_students, several cohorts per vectorized
+        pass (up to MAX_BATCH_STUDENTS students, so memory stays flat however many runs),
+        and reports the spread of the per-cohort average CGPA and fail counts.
+        """
+        runs_per_batch = max(1, self.MAX_BATCH_STUDENTS // max(1, num_students))
+        run_means, fails_per_run = [], []
+        for first_run in range(0, runs, runs_per_batch):
+            batch_runs = min(runs_per_batch, runs - first_run)
+            result = self.simulate(num_students * batch_runs, num_semesters)
+            cgpa = self.student_summaries(result)['cgpa'].reshape(batch_runs, num_students)
+            taken = result.grades >= 0
+            failed = taken & ~self.grade_passing[np.where(taken, result.grades, 0)]
+            fails_per_run.append(failed.sum(axis=(0, 2)).reshape(batch_runs, num_students).sum(axis=1))
+            run_means.append(cgpa.mean(axis=1))
+        run_means = np.concatenate(run_means)
+        fails_per_run = np.concatenate(fails_per_run)
+        return {'runs': runs, 'students_per_run': num_students,
+                'average_cgpa_mean': float(run_means.mean()), 'average_cgpa_std': float(run_means.std()),
+                'average_cgpa_min': float(run_means.min()), 'average_cgpa_max': float(run_means.max()),
+                'failed_enrollments_mean': float(fails_per_run.mean())}
+
+    def write_to_database(self, result: CohortResult, dept_id: Optional[str] = None, enrollment_year: int = 2021,
+                          first_name: str = "Simulated", last_name: str = "Student") -> List[str]:
+        """
+        Bulk-writes the cohort as new students (IDs continue the "26xxxxx" sequence) with their
+        enrollments, in one transaction. dept_id defaults to the curriculum's department.
+        Returns the new student IDs.
+        """
+        conn = self.database.get_connection()
+        try:
+            if dept_id is None:
+                dept_id = conn.execute("SELECT dept_id FROM curriculum_versions WHERE curriculum_id = ?",
+                                       (result.curriculum_id,)).fetchone()[0]
+            row = conn.execute("SELECT MAX(CAST(substr(student_id, 3) AS INTEGER)) FROM students WHERE student_id LIKE '26%'").fetchone()
+            first_number = (row[0] or 0) + 1
+            student_ids = [f"26{str(first_number + i).zfill(5)}" for i in range(result.num_students)]
+
+            semester_idx, student_idx, course_idx = np.nonzero(result.grades >= 0)
+            ordinals = [semester_ordinal(semester) for semester in result.semesters]
+            enrollment_rows = [
+                (student_ids[s], result.course_codes[c], result.semesters[t], self.GRADES[result.grades[t, s, c]],
+                 int(result.attempts[t, s, c]), ordinals[t])
+                for t, s, c in zip(semester_idx.tolist(), student_idx.tolist(), course_idx.tolist())
+            ]
+            c = conn.cursor()
+            c.executemany("""INSERT INTO students
+                             (student_id, first_name, last_name, dept_id, curriculum_id, enrollment_year)
+                             VALUES (?, ?, ?, ?, ?, ?)""",
+                          [(sid, first_name, last_name, dept_id, result.curriculum_id, enrollment_year) for sid in student_ids])
+            c.executemany("""INSERT INTO student_enrollments
+                             (student_id, course_code, semester, grade, attempt_number, semester_ordinal)
+                             VALUES (?, ?, ?, ?, ?, ?)""", enrollment_rows)
+            self.database.mark_students_changed(conn, student_ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        self.database.rebuild_gpa_summaries(student_ids)
+        return student_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized cohort progression simulator")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Database with the curricula")
+    parser.add_argument("--curriculum_id", type=int, required=True, help="Curriculum to simulate")
+    parser.add_argument("--students", type=int, default=1000, help="Students per cohort (default: 1000)")
+    parser.add_argument("--runs", type=int, default=1, help="Independent cohorts to simulate (default: 1)")
+    parser.add_argument("--semesters", type=int, default=6, help="Semesters to simulate (default: 6)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--write", action="store_true", help="Write the simulated cohort to the database (single run only)")
+    args = parser.parse_args()
+
+    database = TranscriptDatabase(db_name=args.db_path)
+    simulator = CohortSimulator(database, args.curriculum_id, seed=args.seed)
+    start = time.perf_counter()
+    if args.runs > 1:
+        summary = simulator.run_many(args.students, args.runs, args.semesters)
+        print(f"Simulated {args.runs} cohorts of {args.students} students in {time.perf_counter() - start:.2f}s")
+        print(f"  Average CGPA across cohorts: {summary['average_cgpa_mean']:.3f} "
+              f"(std {summary['average_cgpa_std']:.3f}, range {summary['average_cgpa_min']:.3f}-{summary['average_cgpa_max']:.3f})")
+        print(f"  Failed enrollments per cohort: {summary['failed_enrollments_mean']:.1f}")
+        return
+
+    result = simulator.simulate(args.students, args.semesters)
+    stats = simulator.statistics(result)
+    print(f"Simulated {args.students} students over {args.semesters} semesters in {time.perf_counter() - start:.2f}s")
+    print(f"  Enrollments: {stats['enrollments']} ({stats['retakes']} retakes)")
+    print(f"  Average CGPA: {stats['average_cgpa']:.2f}, median {stats['cgpa_percentiles'][50]:.2f}")
+    print(f"  Academic standing: {stats['standing_counts']}")
+    if args.write:
+        student_ids = simulator.write_to_database(result)
+        print(f"  Wrote {len(student_ids)} students ({student_ids[0]}..{student_ids[-1]}) to {args.db_path}")
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
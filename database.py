@@ -1,10 +1,458 @@
 import sqlite3
+import bisect
+import functools
+import inspect
 import os
-from typing import List, Tuple, Optional, Dict, Any
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Tuple, Optional, Dict, Any, Iterator, Callable
 import random
 # NEW: Import the curriculum data from the separate file
 from curriculum_data import SNG_CURRICULA_DATA, EEE_CURRICULA_DATA, CNG_CURRICULA_DATA
 from grade_calculator import GradeCalculator
+from semester import Semester, semester_ordinal
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a pooled sqlite3 connection.
+    Behaves like a normal connection, except close() hands it back to the pool.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, pool: "ConnectionPool"):
+        self._conn = conn
+        self._pool = pool
+
+    def close(self):
+        """Returns the connection to the pool instead of closing it."""
+        self._pool.release(self)
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+
+class ConnectionPool:
+    """
+    Keeps up to `size` open SQLite connections and hands them out per thread.
+    A thread that already holds a connection gets the same one back (nested calls
+    such as register_for_semester -> enroll_student -> add_enrollment share it),
+    so the pool never deadlocks on itself.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int = 5, timeout: float = 30.0):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_count = 0
+        # Statistics (used by benchmark.py)
+        self.connections_opened = 0
+        self.checkouts = 0
+
+    def _open(self) -> sqlite3.Connection:
+        conn = self._connect()
+        self.connections_opened += 1
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """Checks out a connection, reusing the one this thread already holds if any."""
+        held = getattr(self._local, 'conn', None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        try:
+            raw_conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._open_count < self.size
+                if can_open:
+                    self._open_count += 1
+            if can_open:
+                raw_conn = self._open()
+            else:
+                try:
+                    raw_conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a pooled connection")
+
+        self.checkouts += 1
+        wrapper = PooledConnection(raw_conn, self)
+        self._local.conn = wrapper
+        self._local.depth = 1
+        return wrapper
+
+    def release(self, wrapper: PooledConnection):
+        """Returns a connection to the pool once its outermost user closes it."""
+        if getattr(self._local, 'conn', None) is not wrapper:
+            return  # Already released (double close) or owned by another thread
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+        raw_conn = wrapper._conn
+        if raw_conn.in_transaction:
+            raw_conn.rollback()  # Same as sqlite3: uncommitted work is discarded on close
+        self._idle.put(raw_conn)
+
+    def close_all(self):
+        """Closes every idle connection. The pool reopens connections on demand afterwards."""
+        while True:
+            try:
+                raw_conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            raw_conn.close()
+            with self._lock:
+                self._open_count -= 1
+
+
+class QueryStats:
+    """
+    Opt-in query instrumentation for TranscriptDatabase (instrument=True).
+    A trace callback on every connection sees each statement SQLite runs, including
+    implicit BEGIN/COMMITs and every row of an executemany. A statement's latency is
+    the time until the next statement on the thread or until its method returns (for
+    generator methods: the current step), so it includes fetching the rows. Statements run outside TranscriptDatabase methods
+    are only counted.
+    """
+
+    LATENCY_BUCKETS_MS = (1, 5, 20, 100, 500)  # Histogram upper bounds; one more bucket for slower
+    _LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    _IN_LISTS = re.compile(r"\((?:\?, )+\?\)")
+
+    def __init__(self, slow_query_ms: float = 100.0, log_slow_queries: bool = True):
+        self.slow_query_ms = slow_query_ms
+        self.log_slow_queries = log_slow_queries
+        self.methods: Dict[str, Dict[str, Any]] = {}     # name -> calls, rows, statements, seconds
+        self.statements: Dict[str, Dict[str, Any]] = {}  # normalized SQL -> count, seconds, max_ms, histogram
+        self.slow_queries: List[Tuple[str, str, float]] = []  # (method, SQL, ms)
+        self.untimed_statements = 0
+        self.database_seconds = 0.0  # Wall time inside outermost TranscriptDatabase method calls
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def normalize(cls, sql: str) -> str:
+        """Collapses whitespace and replaces literals (the trace sees bound values) with '?'."""
+        sql = cls._LITERALS.sub('?', ' '.join(sql.split()))
+        return cls._IN_LISTS.sub('(?, ...)', sql)
+
+    def install(self, conn: sqlite3.Connection):
+        conn.set_trace_callback(self._on_statement)
+
+    def _stack(self) -> List[str]:
+        if not hasattr(self._local, 'methods'):
+            self._local.methods = []
+            self._local.pending = None
+        return self._local.methods
+
+    def _on_statement(self, sql: str):
+        now = time.perf_counter()
+        stack = self._stack()
+        self._finish_statement(now)
+        if not stack:
+            with self._lock:
+                self.untimed_statements += 1
+            return
+        self._local.pending = (stack[-1], sql, now)
+        with self._lock:
+            self.methods[stack[-1]]['statements'] += 1
+
+    def _finish_statement(self, now: float):
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            return
+        self._local.pending = None
+        method, sql, started = pending
+        elapsed_ms = (now - started) * 1000
+        bucket = bisect.bisect_left(self.LATENCY_BUCKETS_MS, elapsed_ms)
+        key = self.normalize(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {'count': 0, 'seconds': 0.0, 'max_ms': 0.0,
+                                                'histogram': [0] * (len(self.LATENCY_BUCKETS_MS) + 1)}
+            stats['count'] += 1
+            stats['seconds'] += elapsed_ms / 1000
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['histogram'][bucket] += 1
+            if elapsed_ms >= self.slow_query_ms:
+                self.slow_queries.append((method, sql, elapsed_ms))
+        if elapsed_ms >= self.slow_query_ms and self.log_slow_queries:
+            print(f"Slow query ({elapsed_ms:.1f} ms) in {method}: {' '.join(sql.split())[:300]}")
+
+    def _enter(self, name: str) -> float:
+        stack = self._stack()
+        now = time.perf_counter()
+        self._finish_statement(now)
+        stack.append(name)
+        with self._lock:
+            if name not in self.methods:
+                self.methods[name] = {'calls': 0, 'rows': 0, 'statements': 0, 'seconds': 0.0}
+        return now
+
+    def _exit(self, name: str, started: float, rows: int, call: bool = True):
+        now = time.perf_counter()
+        self._finish_statement(now)
+        stack = self._stack()
+        stack.pop()
+        with self._lock:
+            stats = self.methods[name]
+            stats['calls'] += int(call)
+            stats['rows'] += rows
+            stats['seconds'] += now - started
+            if not stack:
+                self.database_seconds += now - started
+
+    @staticmethod
+    def _row_count(result: Any) -> int:
+        if result is None:
+            return 0
+        if isinstance(result, (list, tuple, dict, set)):
+            return len(result)
+        if isinstance(result, bool):
+            return int(result)
+        return 1
+
+    def wrap(self, name: str, method: Callable) -> Callable:
+        """Returns method instrumented under `name`; generator methods are timed per step."""
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator_wrapper(*args, **kwargs):
+                generator = method(*args, **kwargs)
+                first_step = True
+                try:
+                    while True:
+                        started = self._enter(name)
+                        rows = 0
+                        try:
+                            item = next(generator)
+                            rows = 1
+                        except StopIteration:
+                            return
+                        finally:
+                            self._exit(name, started, rows, call=first_step)
+                            first_step = False
+                        yield item
+                finally:
+                    generator.close()
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = self._enter(name)
+            rows = 0
+            try:
+                result = method(*args, **kwargs)
+                rows = self._row_count(result)
+                return result
+            finally:
+                self._exit(name, started, rows)
+        return wrapper
+
+    def summary(self, top: int = 10) -> str:
+        """Text report: per-method totals, the `top` statements by total time, and the slow-query count."""
+        with self._lock:
+            methods = sorted(self.methods.items(), key=lambda item: -item[1]['seconds'])
+            statements = sorted(self.statements.items(), key=lambda item: -item[1]['seconds'])[:top]
+            slow_count = len(self.slow_queries)
+        lines = ["=== Query Instrumentation ===",
+                 f"Time inside TranscriptDatabase methods: {self.database_seconds:.3f}s",
+                 f"{'Method':<34} {'Calls':>7} {'Rows':>8} {'Stmts':>8} {'Total ms':>10} {'Avg ms':>8}"]
+        for name, stats in methods:
+            if stats['calls']:
+                lines.append(f"{name:<34} {stats['calls']:>7} {stats['rows']:>8} {stats['statements']:>8} "
+                             f"{stats['seconds'] * 1000:>10.1f} {stats['seconds'] * 1000 / stats['calls']:>8.2f}")
+        bucket_labels = [f"<{bound}" for bound in self.LATENCY_BUCKETS_MS] + [f">={self.LATENCY_BUCKETS_MS[-1]}"]
+        lines.append(f"\nTop {len(statements)} statements by total time (histogram buckets in ms: {' '.join(bucket_labels)})")
+        for sql, stats in statements:
+            histogram = ' '.join(str(n) for n in stats['histogram'])
+            lines.append(f"  {stats['count']:>7}x {stats['seconds'] * 1000:>9.1f} ms (max {stats['max_ms']:.1f}) "
+                         f"[{histogram}]  {sql[:100]}")
+        if self.untimed_statements:
+            lines.append(f"  + {self.untimed_statements} statement(s) run outside TranscriptDatabase methods (not timed)")
+        lines.append(f"Slow queries (>= {self.slow_query_ms:g} ms): {slow_count}")
+        return '\n'.join(lines)
+
+
+class PrerequisiteGraph:
+    """
+    Prerequisite edges of one curriculum held in memory.
+    prerequisites: course -> courses it requires; dependents: course -> courses that require it.
+    """
+
+    def __init__(self, curriculum_id: int, edges: List[Tuple[str, str]]):
+        self.curriculum_id = curriculum_id
+        self.prerequisites: Dict[str, List[str]] = {}
+        self.dependents: Dict[str, List[str]] = {}
+        for course_code, prereq_code in edges:
+            self.prerequisites.setdefault(course_code, []).append(prereq_code)
+            self.dependents.setdefault(prereq_code, []).append(course_code)
+
+    def get_prerequisites(self, course_code: str) -> List[str]:
+        """Direct prerequisites of a course (a new list, safe to modify)."""
+        return list(self.prerequisites.get(course_code, ()))
+
+    def get_dependents(self, course_code: str) -> List[str]:
+        """Courses that list course_code as a direct prerequisite."""
+        return list(self.dependents.get(course_code, ()))
+
+    def missing_prerequisites(self, course_code: str, passed_courses) -> List[str]:
+        """Direct prerequisites of course_code that are not in passed_courses."""
+        return [p for p in self.prerequisites.get(course_code, ()) if p not in passed_courses]
+
+
+class RegistrationSession:
+    """
+    In-memory registration state for one student.
+    Loads the student's record once, keeps the passed-course set, attempt counters and
+    (course, semester) pairs in memory, applies enrollments incrementally and writes
+    them all with flush(). Accept/reject messages match TranscriptDatabase.enroll_student.
+    """
+
+    def __init__(self, database: "TranscriptDatabase", student_id: str,
+                 student_info: Optional[Dict[str, Any]] = None,
+                 enrollments: Optional[List[Dict[str, Any]]] = None):
+        self.database = database
+        self.student_id = student_id
+        self.student_info = student_info if student_info is not None else database.get_student_info(student_id)
+        if enrollments is None:
+            enrollments = database.get_student_enrollments(student_id)
+        self.enrollments = enrollments
+
+        is_passing = database.grade_calculator.is_passing_grade
+        self.passed_courses = {e['course_code'] for e in enrollments if is_passing(e['grade'])}
+        self.max_attempts: Dict[str, int] = {}
+        self.taken = set()  # (course_code, semester) pairs, mirrors the UNIQUE constraint
+        for e in enrollments:
+            self.max_attempts[e['course_code']] = max(self.max_attempts.get(e['course_code'], 0), e['attempt_number'] or 0)
+            self.taken.add((e['course_code'], e['semester']))
+        self.pending: List[Tuple[str, str, str, str, int]] = []  # rows waiting for flush()
+        self._suggested_semesters: Optional[Dict[str, int]] = None
+
+    def _suggested_semester(self, course_code: str) -> Optional[int]:
+        if self._suggested_semesters is None:
+            conn = self.database.get_connection()
+            try:
+                rows = conn.execute(self.database.SUGGESTED_SEMESTERS_SQL,
+                                    (self.student_info['curriculum_id'],)).fetchall()
+            finally:
+                conn.close()
+            self._suggested_semesters = dict(rows)
+        return self._suggested_semesters.get(course_code)
+
+    def retake_failed_courses(self, current_semester: str):
+        """Enroll student in courses failed in ALL attempts (never passed)"""
+        courses_to_retake = []
+        for e in self.enrollments:
+            course_code = e['course_code']
+            if course_code in self.passed_courses or course_code in courses_to_retake:
+                continue  # Skip if passed in any attempt
+            if not self.database.grade_calculator.is_passing_grade(e['grade']):
+                courses_to_retake.append(course_code)
+
+        for course_code in courses_to_retake:
+            self.enroll(course_code, current_semester)
+
+    def enroll(self, course_code: str, semester: str) -> Tuple[bool, str]:
+        """Same checks as enroll_student, applied to the in-memory state; the row is written on flush()."""
+        # Step 1: Check if student has already passed the course
+        if course_code in self.passed_courses:
+            return False, f"Student has already passed {course_code} and cannot enroll again."
+
+        # Step 2: Check suggested semester constraint
+        if not self.student_info:
+            return False, "Student not found"
+
+        curriculum_id = self.student_info['curriculum_id']
+        enrollment_year = self.student_info.get('enrollment_year')
+
+        if enrollment_year:
+            # Parse semester string (e.g., "2021-Fall")
+            parts = semester.split('-')
+            if len(parts) == 2:
+                try:
+                    current_year = int(parts[0])
+                    term = parts[1]
+                    # Calculate current semester number
+                    year_diff = current_year - enrollment_year
+                    term_value = 1 if term == 'Fall' else 2
+                    current_semester_num = year_diff * 2 + term_value
+
+                    suggested_semester = self._suggested_semester(course_code)
+                    if suggested_semester is not None and current_semester_num < suggested_semester:
+                        return False, (
+                            f"Cannot take {course_code} in {semester} (semester #{current_semester_num}). "
+                            f"Suggested semester: #{suggested_semester}."
+                        )
+                except ValueError:
+                    pass  # Skip if semester format is invalid
+
+        # Step 3: Check prerequisites
+        missing = self.database.get_prerequisite_graph(curriculum_id).missing_prerequisites(course_code, self.passed_courses)
+        if missing:
+            return False, f"Missing prerequisites: {', '.join(missing)}"
+
+        # Proceed with enrollment (INSERT OR IGNORE semantics: one row per course and semester)
+        if (course_code, semester) in self.taken:
+            return False, "Enrollment failed"
+        attempt_number = self.max_attempts.get(course_code, 0) + 1
+        self.max_attempts[course_code] = attempt_number
+        self.taken.add((course_code, semester))
+        self.pending.append((self.student_id, course_code, semester, 'NA', attempt_number))  # Temporary grade
+        return True, "Enrollment successful"
+
+    def flush(self, conn: Optional[sqlite3.Connection] = None, commit: bool = True) -> int:
+        """
+        Writes all pending enrollments with one executemany. Returns the number of rows written.
+        Pass the caller's connection and commit=False to make the write part of a larger transaction.
+        """
+        if not self.pending:
+            return 0
+        own_conn = conn is None
+        if own_conn:
+            conn = self.database.get_connection()
+        try:
+            c = conn.cursor()
+            c.executemany("""INSERT OR IGNORE INTO student_enrollments
+                             (student_id, course_code, semester, grade, attempt_number, semester_ordinal)
+                             VALUES (?, ?, ?, ?, ?, ?)""",
+                          [row + (semester_ordinal(row[2]),) for row in self.pending])
+            self.database.refresh_gpa_summary(conn, self.student_id)
+            self.database.mark_students_changed(conn, [self.student_id])
+            if commit:
+                conn.commit()
+            written = len(self.pending)
+            self.pending = []
+            return written
+        finally:
+            if own_conn:
+                conn.close()
+
+
+class SchemaMigrationError(sqlite3.DatabaseError):
+    """A read-only open found a database that predates tables or columns added by create_tables."""
+
+    def __init__(self, db_name: str, missing: List[str]):
+        self.missing = missing
+        super().__init__(f"Database '{db_name}' needs migration; open it once without --read_only "
+                         f"(missing: {', '.join(missing)})")
+
 
 class TranscriptDatabase:
     """
@@ -13,26 +461,298 @@ class TranscriptDatabase:
     and enrollments.
     """
 
-    def __init__(self, db_name: str = "transcript_system.db"):
+    # Sample data shared by populate_sample_data and bulk_populate.py
+    SAMPLE_DEPARTMENTS = [
+        ("CNG", "Computer Engineering"),
+        ("EEE", "Electrical & Electronics Engineering"),
+        ("SNG", "Software Engineering"),
+        ("MAT", "Mathematics"),
+        ("GER", "German Language"),
+        ("ME", "Mechanical Engineering"),
+        ("ENG", "English"),
+        ("HST", "History"),
+    ]
+    # Courses outside the three curricula that appear as prerequisites
+    EXTERNAL_PREREQUISITE_COURSES = [
+        {'code': '3570100', 'name': 'Pre-Calculus', 'dept_id': 'MAT'},
+        {'code': '3660271', 'name': 'German Language and Culture I', 'dept_id': 'GER'},
+        {'code': '3660272', 'name': 'German Language and Culture II', 'dept_id': 'GER'},
+        {'code': '6040201', 'name': 'Advanced German I', 'dept_id': 'GER'},
+        {'code': '6040202', 'name': 'Advanced German II', 'dept_id': 'GER'},
+        {'code': '2360119', 'name': 'Calculus for Technical Programs', 'dept_id': 'MAT'},
+        {'code': '2360117', 'name': 'Applied Calculus', 'dept_id': 'MAT'},
+        {'code': '6390101', 'name': 'English for Academic Purposes I', 'dept_id': 'ENG'},
+        {'code': '2402201', 'name': 'History of the Turkish Republic I', 'dept_id': 'HST'},
+    ]
+    SAMPLE_FIRST_NAMES = ["Ali", "Ayşe", "Mehmet", "Zeynep", "Can", "Elif", "Cem", "Deniz", "Emir", "Selin"]
+    SAMPLE_LAST_NAMES = ["Yilmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yildiz", "Özdemir", "Arslan", "Koç", "Aydin"]
+    # Consistent semesters for academic progression
+    SAMPLE_SEMESTERS = [
+        "2021-Fall", "2022-Spring",
+        "2022-Fall", "2023-Spring",
+        "2023-Fall", "2024-Spring",
+        "2024-Fall", "2025-Spring"
+    ]
+    # Simulated grades: weighted letter grades (90% pass rate) for credit courses, S/U for 0-credit ones
+    SIMULATED_LETTER_GRADES = ["AA", "BA", "BB", "CB", "CC", "DC", "DD", "FF"]
+    SIMULATED_LETTER_GRADE_WEIGHTS = [0.15, 0.15, 0.15, 0.15, 0.15, 0.1, 0.05, 0.1]
+    SIMULATED_PASS_FAIL_GRADES = ["S", "U"]
+
+    # Queries on the per-transcript / per-registration hot path.
+    # explain_hot_queries() checks their query plans for full table scans.
+    STUDENT_INFO_SQL = """SELECT s.student_id, s.first_name, s.last_name, s.dept_id,
+                                 d.dept_name, s.curriculum_id, cv.version_number, cv.version_name
+                          FROM students s
+                          JOIN departments d ON s.dept_id = d.dept_id
+                          JOIN curriculum_versions cv ON s.curriculum_id = cv.curriculum_id
+                          WHERE s.student_id = ?"""
+    # Keys of an enrollment dict, in the column order of the enrollment queries below
+    ENROLLMENT_FIELDS = ('course_code', 'course_name', 'semester', 'grade', 'attempt_number',
+                         'metu_credits', 'ects_credits', 'credit_hours')
+    STUDENT_ENROLLMENTS_SQL = """SELECT se.course_code, cn.course_name, se.semester, se.grade,
+                                        se.attempt_number, cc.metu_credits, cc.ects_credits, cc.credit_hours
+                                 FROM student_enrollments se
+                                 JOIN course_names cn ON se.course_code = cn.course_code
+                                 LEFT JOIN students s ON se.student_id = s.student_id
+                                 LEFT JOIN curriculum_courses cc ON (s.curriculum_id = cc.curriculum_id AND se.course_code = cc.course_code)
+                                 WHERE se.student_id = ?
+                                 ORDER BY se.semester_ordinal, se.semester, cn.course_name, se.attempt_number"""
+    STUDENTS_BY_DEPARTMENT_SQL = "SELECT student_id FROM students WHERE dept_id = ?"
+    CURRICULUM_PREREQUISITES_SQL = ("SELECT course_code, prerequisite_code FROM prerequisites "
+                                    "WHERE curriculum_id = ? ORDER BY course_code, prerequisite_code")
+    # RegistrationSession preloads these once per student/curriculum instead of querying per course
+    SUGGESTED_SEMESTERS_SQL = ("SELECT course_code, semester_suggested FROM curriculum_courses "
+                               "WHERE curriculum_id = ?")
+    UPDATE_GRADE_SQL = ("UPDATE student_enrollments SET grade=? "
+                        "WHERE student_id=? AND course_code=? AND semester=?")
+    # Bulk versions take a WHERE clause over students aliased as `s` (see _bulk_scopes)
+    BULK_STUDENT_INFO_SQL = """SELECT s.student_id, s.first_name, s.last_name, s.dept_id,
+                                      d.dept_name, s.curriculum_id, cv.version_number, cv.version_name
+                               FROM students s
+                               JOIN departments d ON s.dept_id = d.dept_id
+                               JOIN curriculum_versions cv ON s.curriculum_id = cv.curriculum_id
+                               WHERE {where}
+                               ORDER BY s.student_id"""
+    BULK_ENROLLMENTS_SQL = """SELECT se.student_id, se.course_code, cn.course_name, se.semester, se.grade,
+                                     se.attempt_number, cc.metu_credits, cc.ects_credits, cc.credit_hours
+                              FROM student_enrollments se
+                              JOIN students s ON se.student_id = s.student_id
+                              JOIN course_names cn ON se.course_code = cn.course_code
+                              LEFT JOIN curriculum_courses cc ON (s.curriculum_id = cc.curriculum_id AND se.course_code = cc.course_code)
+                              WHERE {where}
+                              ORDER BY se.student_id, se.semester_ordinal, se.semester, cn.course_name, se.attempt_number"""
+
+    TERM_ENROLLMENTS_SQL = """SELECT se.student_id, se.course_code, se.semester, se.grade, se.attempt_number
+                              FROM student_enrollments se
+                              WHERE se.semester_ordinal BETWEEN ? AND ?
+                              ORDER BY se.semester_ordinal, se.student_id, se.course_code"""
+    # Students get_student_info can resolve, with their stored CGPA (NULL if no summary row yet)
+    STATISTICS_STUDENTS_SQL = """SELECT s.student_id, s.dept_id, d.dept_name, g.cgpa
+                                 FROM students s
+                                 JOIN departments d ON s.dept_id = d.dept_id
+                                 JOIN curriculum_versions cv ON s.curriculum_id = cv.curriculum_id
+                                 LEFT JOIN student_gpa_summary g ON s.student_id = g.student_id
+                                 ORDER BY s.student_id"""
+    # Count of each grade over the latest attempt of every (student, course): SQLite takes the bare
+    # grade column from the row holding the MAX, i.e. the highest (semester ordinal, attempt number)
+    LATEST_GRADE_COUNTS_SQL = """SELECT latest.grade, COUNT(*)
+                                 FROM (SELECT student_id, course_code, grade,
+                                              MAX(semester_ordinal * 1000 + attempt_number)
+                                       FROM student_enrollments GROUP BY student_id, course_code) latest
+                                 JOIN students s ON latest.student_id = s.student_id
+                                 JOIN departments d ON s.dept_id = d.dept_id
+                                 JOIN curriculum_versions cv ON s.curriculum_id = cv.curriculum_id
+                                 JOIN course_names cn ON latest.course_code = cn.course_code
+                                 GROUP BY latest.grade"""
+
+    # name -> (sql, number of parameters); used by explain_hot_queries()
+    HOT_QUERIES = {
+        'get_student_info': (STUDENT_INFO_SQL, 1),
+        'get_student_enrollments': (STUDENT_ENROLLMENTS_SQL, 1),
+        'get_students_by_department': (STUDENTS_BY_DEPARTMENT_SQL, 1),
+        'get_prerequisite_graph': (CURRICULUM_PREREQUISITES_SQL, 1),
+        'RegistrationSession (suggested semesters)': (SUGGESTED_SEMESTERS_SQL, 1),
+        'RegistrationSession (enrollments)': (STUDENT_ENROLLMENTS_SQL, 1),
+        'register_cohort_for_semester (enrollments)': (BULK_ENROLLMENTS_SQL.format(where="s.student_id IN (?)"), 1),
+        'update_grade': (UPDATE_GRADE_SQL, 4),
+        'get_students_info_bulk (department)': (BULK_STUDENT_INFO_SQL.format(where="s.dept_id = ?"), 1),
+        'get_enrollments_bulk (department)': (BULK_ENROLLMENTS_SQL.format(where="s.dept_id = ?"), 1),
+        'get_term_enrollments': (TERM_ENROLLMENTS_SQL, 2),
+    }
+
+    # Tables and columns added to older databases by create_tables. A read-only open can't
+    # add them, so it checks for them instead (see missing_schema)
+    REQUIRED_SCHEMA = {
+        'student_enrollments': ('semester_ordinal',),
+        'curriculum_courses': ('credit_hours', 'lecture_hours', 'lab_hours'),
+        'student_gpa_summary': (),
+        'student_semester_gpa': (),
+        'student_changes': (),
+    }
+
+    def __init__(self, db_name: str = "transcript_system.db", pool_size: int = 5,
+                 wal: bool = False, busy_timeout_ms: int = 5000, read_only: bool = False,
+                 instrument: bool = False, slow_query_ms: float = 100.0):
         """
         Initializes the database connection and ensures tables are created.
+        pool_size > 0 keeps that many connections open and reuses them across calls;
+        pool_size = 0 opens a fresh connection for every call (the old behaviour).
+        wal switches the database file to WAL journal mode so readers and writers
+        don't block each other; busy_timeout_ms is how long a connection waits on a lock.
+        read_only opens the file with mode=ro (no schema changes, no writes), for
+        transcript workers running alongside registrar writes.
+        instrument records per-method and per-statement timings in self.query_stats
+        (see QueryStats) and logs statements slower than slow_query_ms.
         """
         self.db_name = db_name
-        db_dir = os.path.dirname(db_name)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-        self.create_tables()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.read_only = read_only
+        if not read_only:
+            db_dir = os.path.dirname(db_name)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir, exist_ok=True)
+        self.pool = ConnectionPool(self._connect, pool_size) if pool_size > 0 else None
+        self._unpooled_connections_opened = 0
+        # Without pooling, snapshot() routes this thread's connections through a one-connection pool
+        self._snapshot_local = threading.local()
+        # curriculum_id -> PrerequisiteGraph; prerequisites only change through add_prerequisite
+        self._prerequisite_graphs: Dict[int, PrerequisiteGraph] = {}
+        self._prerequisite_graphs_lock = threading.Lock()
+        self.prerequisite_graph_loads = 0
+        self.query_stats = QueryStats(slow_query_ms) if instrument else None
+        if self.query_stats is not None:
+            self._instrument_methods()
         self.grade_calculator = GradeCalculator()  # Initialize here instead of in populate_sample_data
+        if not read_only:
+            if wal:
+                self.set_journal_mode("WAL")
+            self.create_tables()
+        else:
+            # Queries would fail on every student and leave empty transcripts, so refuse to start
+            missing = self.missing_schema()
+            if missing:
+                self.close()
+                raise SchemaMigrationError(db_name, missing)
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Establishes and returns a database connection with foreign keys enabled."""
-        conn = sqlite3.connect(self.db_name)
+    def missing_schema(self) -> List[str]:
+        """REQUIRED_SCHEMA entries absent from the database, as 'table' or 'table.column'."""
+        missing = []
+        with self.connection() as conn:
+            for table, columns in self.REQUIRED_SCHEMA.items():
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if not existing:
+                    missing.append(table)
+                else:
+                    missing.extend(f"{table}.{column}" for column in columns if column not in existing)
+        return missing
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a new physical connection with this database's settings."""
+        if self.read_only:
+            uri = Path(self.db_name).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
         conn.execute("PRAGMA foreign_keys = 1")
+        if self.query_stats is not None:
+            self.query_stats.install(conn)
         return conn
 
+    # Connection plumbing and pure helpers are not wrapped by the instrumentation
+    UNINSTRUMENTED_METHODS = {'get_connection', 'connection', 'snapshot', 'close', 'explain_hot_queries'}
+
+    def _instrument_methods(self):
+        """Replaces every public method on this instance with a QueryStats-timed wrapper."""
+        for name, member in inspect.getmembers(type(self), inspect.isfunction):
+            if not name.startswith('_') and name not in self.UNINSTRUMENTED_METHODS:
+                setattr(self, name, self.query_stats.wrap(name, getattr(self, name)))
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Returns a database connection with foreign keys enabled.
+        With pooling enabled this is a pooled connection; calling close() on it
+        returns it to the pool.
+        """
+        if self.pool is not None:
+            return self.pool.acquire()
+        snapshot_pool = getattr(self._snapshot_local, 'pool', None)
+        if snapshot_pool is not None:
+            return snapshot_pool.acquire()
+        self._unpooled_connections_opened += 1
+        return self._connect()
+
+    def set_journal_mode(self, mode: str = "WAL") -> Optional[str]:
+        """
+        Sets the journal mode (WAL, DELETE, ...) and returns the mode SQLite reports back.
+        WAL is stored in the database file, so it stays on for every later connection.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            row = conn.execute(f"PRAGMA journal_mode = {mode}").fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e: print(f"Database error setting journal mode {mode}: {e}"); return None
+        finally:
+            if conn: conn.close()
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Runs every read made inside the block (on this thread) in one read transaction,
+        so they all see the same committed state even while other connections write.
+        Nested get_connection() calls reuse the snapshot's connection; with pool_size = 0
+        the block gets one dedicated connection of its own.
+        """
+        snapshot_pool = None
+        if self.pool is None and getattr(self._snapshot_local, 'pool', None) is None:
+            snapshot_pool = ConnectionPool(self._connect, 1)
+            self._snapshot_local.pool = snapshot_pool
+        try:
+            conn = self.get_connection()
+            try:
+                conn.execute("BEGIN")
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.commit()
+                conn.close()
+        finally:
+            if snapshot_pool is not None:
+                self._snapshot_local.pool = None
+                self._unpooled_connections_opened += snapshot_pool.connections_opened
+                snapshot_pool.close_all()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager form of get_connection(): `with db.connection() as conn: ...`"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @property
+    def connections_opened(self) -> int:
+        """Number of physical sqlite3 connections opened so far."""
+        if self.pool is not None:
+            return self.pool.connections_opened
+        return self._unpooled_connections_opened
+
+    def close(self):
+        """Closes all pooled connections."""
+        if self.pool is not None:
+            self.pool.close_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def create_tables(self):
         """Creates all necessary tables for the transcript system if they don't already exist."""
         conn = None
+        migrated_semester_ordinals = False
         try:
             conn = self.get_connection()
             c = conn.cursor()
@@ -55,10 +775,20 @@ class TranscriptDatabase:
             c.execute("""CREATE TABLE IF NOT EXISTS curriculum_courses (
                 curriculum_id INTEGER NOT NULL, course_code TEXT NOT NULL, metu_credits TEXT NOT NULL,
                 ects_credits REAL NOT NULL, semester_suggested INTEGER DEFAULT 1, is_required BOOLEAN DEFAULT TRUE,
+                credit_hours REAL NOT NULL DEFAULT 0, lecture_hours REAL NOT NULL DEFAULT 0, lab_hours REAL NOT NULL DEFAULT 0,
                 PRIMARY KEY (curriculum_id, course_code),
                 FOREIGN KEY (curriculum_id) REFERENCES curriculum_versions(curriculum_id),
                 FOREIGN KEY (course_code) REFERENCES course_names(course_code)
             )""")
+            # Databases created before the numeric credit columns existed: add them and parse metu_credits once
+            curriculum_columns = [row[1] for row in c.execute("PRAGMA table_info(curriculum_courses)")]
+            if 'credit_hours' not in curriculum_columns:
+                for column in ('credit_hours', 'lecture_hours', 'lab_hours'):
+                    c.execute(f"ALTER TABLE curriculum_courses ADD COLUMN {column} REAL NOT NULL DEFAULT 0")
+                metu_credit_values = [row[0] for row in c.execute("SELECT DISTINCT metu_credits FROM curriculum_courses")]
+                c.executemany("""UPDATE curriculum_courses SET credit_hours = ?, lecture_hours = ?, lab_hours = ?
+                                 WHERE metu_credits = ?""",
+                              [self.grade_calculator.parse_metu_credits(value) + (value,) for value in metu_credit_values])
             # Prerequisites table
             c.execute("""CREATE TABLE IF NOT EXISTS prerequisites (
                 curriculum_id INTEGER NOT NULL, course_code TEXT NOT NULL, prerequisite_code TEXT NOT NULL,
@@ -78,16 +808,63 @@ class TranscriptDatabase:
             c.execute("""CREATE TABLE IF NOT EXISTS student_enrollments (
                 enrollment_id INTEGER PRIMARY KEY AUTOINCREMENT, student_id TEXT NOT NULL, course_code TEXT NOT NULL,
                 semester TEXT NOT NULL, grade TEXT, attempt_number INTEGER DEFAULT 1, enrollment_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                semester_ordinal INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (student_id) REFERENCES students(student_id),
                 FOREIGN KEY (course_code) REFERENCES course_names(course_code),
                 UNIQUE(student_id, course_code, semester)
             )""")
+            # Databases created before semester_ordinal existed: add and backfill it (see semester.py)
+            enrollment_columns = [row[1] for row in c.execute("PRAGMA table_info(student_enrollments)")]
+            if 'semester_ordinal' not in enrollment_columns:
+                c.execute("ALTER TABLE student_enrollments ADD COLUMN semester_ordinal INTEGER NOT NULL DEFAULT 0")
+                semesters = [row[0] for row in c.execute("SELECT DISTINCT semester FROM student_enrollments")]
+                c.executemany("UPDATE student_enrollments SET semester_ordinal = ? WHERE semester = ?",
+                              [(semester_ordinal(semester), semester) for semester in semesters])
+                migrated_semester_ordinals = True
+            # Materialized GPA summary, kept up to date by add_enrollment / update_grade / registration
+            c.execute("""CREATE TABLE IF NOT EXISTS student_gpa_summary (
+                student_id TEXT PRIMARY KEY, cgpa REAL NOT NULL, total_points REAL NOT NULL, total_credits REAL NOT NULL,
+                completed_credits REAL NOT NULL, passed_credits REAL NOT NULL, academic_standing TEXT NOT NULL,
+                updated_date TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (student_id) REFERENCES students(student_id)
+            )""")
+            c.execute("""CREATE TABLE IF NOT EXISTS student_semester_gpa (
+                student_id TEXT NOT NULL, semester TEXT NOT NULL,
+                semester_gpa REAL NOT NULL, semester_points REAL NOT NULL, semester_credits REAL NOT NULL,
+                cumulative_gpa REAL NOT NULL, cumulative_points REAL NOT NULL, cumulative_credits REAL NOT NULL,
+                PRIMARY KEY (student_id, semester),
+                FOREIGN KEY (student_id) REFERENCES students(student_id)
+            )""")
+            # Change tracking for incremental transcript runs: one row per student, bumped on every write
+            tracking_exists = c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_changes'").fetchone()
+            c.execute("""CREATE TABLE IF NOT EXISTS student_changes (
+                student_id TEXT PRIMARY KEY, change_seq INTEGER NOT NULL, modified_at TEXT NOT NULL,
+                FOREIGN KEY (student_id) REFERENCES students(student_id)
+            )""")
+            if not tracking_exists:
+                # Students that predate change tracking start at sequence 0
+                c.execute("""INSERT OR IGNORE INTO student_changes (student_id, change_seq, modified_at)
+                             SELECT student_id, 0, ? FROM students""", (self._change_timestamp(),))
+            # Secondary indexes for the hot lookups (see HOT_QUERIES / explain_hot_queries)
+            c.execute("CREATE INDEX IF NOT EXISTS idx_students_dept ON students(dept_id, student_id)")
+            c.execute("DROP INDEX IF EXISTS idx_enrollments_student_semester")
+            c.execute("""CREATE INDEX IF NOT EXISTS idx_enrollments_student_term
+                         ON student_enrollments(student_id, semester_ordinal, attempt_number)""")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_term ON student_enrollments(semester_ordinal)")
+            c.execute("""CREATE INDEX IF NOT EXISTS idx_enrollments_student_course_attempt
+                         ON student_enrollments(student_id, course_code, attempt_number)""")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_gpa_summary_cgpa ON student_gpa_summary(cgpa)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_student_changes_seq ON student_changes(change_seq)")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_student_changes_modified ON student_changes(modified_at)")
             conn.commit()
         except sqlite3.Error as e:
             print(f"Database error during table creation: {e}")
         finally:
             if conn:
                 conn.close()
+        if migrated_semester_ordinals:
+            # Latest attempts are now picked by semester ordinal, so stored summaries may be stale
+            self.rebuild_gpa_summaries()
 
     def add_department(self, dept_id: str, dept_name: str) -> bool:
         """Adds a new department, ignoring if it already exists."""
@@ -144,10 +921,13 @@ class TranscriptDatabase:
         try:
             conn = self.get_connection()
             c = conn.cursor()
+            credit_hours, lecture_hours, lab_hours = self.grade_calculator.parse_metu_credits(metu_credits)
             c.execute("""INSERT OR IGNORE INTO curriculum_courses
-                         (curriculum_id, course_code, metu_credits, ects_credits, is_required, semester_suggested)
-                         VALUES (?, ?, ?, ?, ?, ?)""",
-                      (curriculum_id, course_code, metu_credits, ects_credits, is_required, semester_suggested))
+                         (curriculum_id, course_code, metu_credits, ects_credits, is_required, semester_suggested,
+                          credit_hours, lecture_hours, lab_hours)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                      (curriculum_id, course_code, metu_credits, ects_credits, is_required, semester_suggested,
+                       credit_hours, lecture_hours, lab_hours))
             conn.commit()
             return c.rowcount > 0
         except sqlite3.Error as e: print(f"Database error in add_course_to_curriculum: {e}"); return False
@@ -165,6 +945,8 @@ class TranscriptDatabase:
                          VALUES (?, ?, ?)""",
                       (curriculum_id, course_code, prereq_code))
             conn.commit()
+            if c.rowcount > 0:
+                self.invalidate_prerequisite_graph(curriculum_id)
             return c.rowcount > 0
         except sqlite3.Error as e: print(f"Database error adding prerequisite: {e}"); return False
         finally:
@@ -181,6 +963,8 @@ class TranscriptDatabase:
                          (student_id, first_name, last_name, dept_id, curriculum_id, enrollment_year)
                          VALUES (?, ?, ?, ?, ?, ?)""",
                       (student_id, first_name, last_name, dept_id, curriculum_id, enrollment_year))
+            self.refresh_gpa_summary(conn, student_id)
+            self.mark_students_changed(conn, [student_id])
             conn.commit()
             return True
         except sqlite3.IntegrityError: return False
@@ -196,9 +980,12 @@ class TranscriptDatabase:
             conn = self.get_connection()
             c = conn.cursor()
             c.execute("""INSERT OR IGNORE INTO student_enrollments
-                         (student_id, course_code, semester, grade, attempt_number)
-                         VALUES (?, ?, ?, ?, ?)""",
-                      (student_id, course_code, semester, grade, attempt_number))
+                         (student_id, course_code, semester, grade, attempt_number, semester_ordinal)
+                         VALUES (?, ?, ?, ?, ?, ?)""",
+                      (student_id, course_code, semester, grade, attempt_number, semester_ordinal(semester)))
+            if c.rowcount > 0:
+                self.refresh_gpa_summary(conn, student_id)
+                self.mark_students_changed(conn, [student_id])
             conn.commit()
             return c.rowcount > 0
         except sqlite3.Error as e: print(f"Database error in add_enrollment for {student_id}, {course_code}: {e}"); return False
@@ -211,12 +998,7 @@ class TranscriptDatabase:
         try:
             conn = self.get_connection()
             c = conn.cursor()
-            c.execute("""SELECT s.student_id, s.first_name, s.last_name, s.dept_id,
-                               d.dept_name, s.curriculum_id, cv.version_number, cv.version_name
-                         FROM students s
-                         JOIN departments d ON s.dept_id = d.dept_id
-                         JOIN curriculum_versions cv ON s.curriculum_id = cv.curriculum_id
-                         WHERE s.student_id = ?""", (student_id,))
+            c.execute(self.STUDENT_INFO_SQL, (student_id,))
             row = c.fetchone()
             if row: return {'student_id': row[0], 'first_name': row[1], 'last_name': row[2],'dept_id': row[3], 'dept_name': row[4], 'curriculum_id': row[5],'curriculum_version': row[6], 'curriculum_name': row[7]}
             return None
@@ -231,28 +1013,149 @@ class TranscriptDatabase:
         try:
             conn = self.get_connection()
             c = conn.cursor()
-            c.execute("""SELECT se.course_code, cn.course_name, se.semester, se.grade,
-                               se.attempt_number, cc.metu_credits, cc.ects_credits
-                         FROM student_enrollments se
-                         JOIN course_names cn ON se.course_code = cn.course_code
-                         LEFT JOIN students s ON se.student_id = s.student_id
-                         LEFT JOIN curriculum_courses cc ON (s.curriculum_id = cc.curriculum_id AND se.course_code = cc.course_code)
-                         WHERE se.student_id = ?
-                         ORDER BY se.semester, cn.course_name, se.attempt_number""", (student_id,))
+            c.execute(self.STUDENT_ENROLLMENTS_SQL, (student_id,))
             rows = c.fetchall()
-            for row in rows: enrollments.append({'course_code': row[0], 'course_name': row[1], 'semester': row[2], 'grade': row[3], 'attempt_number': row[4], 'metu_credits': row[5], 'ects_credits': row[6]})
+            for row in rows: enrollments.append(dict(zip(self.ENROLLMENT_FIELDS, row)))
             return enrollments
         except sqlite3.Error as e: print(f"Database error in get_student_enrollments for {student_id}: {e}"); return []
         finally:
             if conn: conn.close()
 
+    # --- Bulk data access (used by TranscriptGenerator for department/campus runs) ---
+
+    BULK_ID_CHUNK_SIZE = 500  # Stays well below SQLite's bound-parameter limit
+
+    def _bulk_scopes(self, dept_id: Optional[str], student_ids: Optional[List[str]]) -> List[Tuple[str, tuple]]:
+        """
+        Builds the WHERE clauses for a bulk query over students aliased as `s`.
+        One clause for a department or the whole campus; one per chunk for an ID list.
+        """
+        if student_ids is not None:
+            ids = list(dict.fromkeys(student_ids))
+            scopes = []
+            for i in range(0, len(ids), self.BULK_ID_CHUNK_SIZE):
+                chunk = tuple(ids[i:i + self.BULK_ID_CHUNK_SIZE])
+                scopes.append((f"s.student_id IN ({', '.join('?' * len(chunk))})", chunk))
+            return scopes
+        if dept_id is not None:
+            return [("s.dept_id = ?", (dept_id,))]
+        return [("1 = 1", ())]
+
+    def get_students_info_bulk(self, dept_id: Optional[str] = None,
+                               student_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves student headers (same fields as get_student_info) for a department,
+        an explicit list of IDs, or the whole campus when neither is given.
+        Returns a dict keyed by student_id, ordered by student_id.
+        """
+        conn = None
+        students: Dict[str, Dict[str, Any]] = {}
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            for where_clause, params in self._bulk_scopes(dept_id, student_ids):
+                c.execute(self.BULK_STUDENT_INFO_SQL.format(where=where_clause), params)
+                for row in c.fetchall():
+                    students[row[0]] = {'student_id': row[0], 'first_name': row[1], 'last_name': row[2], 'dept_id': row[3], 'dept_name': row[4], 'curriculum_id': row[5], 'curriculum_version': row[6], 'curriculum_name': row[7]}
+            if student_ids is not None:
+                students = {sid: students[sid] for sid in sorted(students)}
+            return students
+        except sqlite3.Error as e: print(f"Database error in get_students_info_bulk: {e}"); return {}
+        finally:
+            if conn: conn.close()
+
+    def get_enrollments_bulk(self, dept_id: Optional[str] = None,
+                             student_ids: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieves enrollments (same fields and per-student order as get_student_enrollments)
+        for a department, an explicit list of IDs, or the whole campus, grouped by student_id.
+        Students without enrollments are absent from the result.
+        """
+        conn = None
+        enrollments_by_student: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            for where_clause, params in self._bulk_scopes(dept_id, student_ids):
+                c.execute(self.BULK_ENROLLMENTS_SQL.format(where=where_clause), params)
+                current_id, current_list = None, None
+                for row in c:
+                    if row[0] != current_id:
+                        current_id = row[0]
+                        current_list = enrollments_by_student.setdefault(current_id, [])
+                    current_list.append(dict(zip(self.ENROLLMENT_FIELDS, row[1:])))
+            return enrollments_by_student
+        except sqlite3.Error as e: print(f"Database error in get_enrollments_bulk: {e}"); return {}
+        finally:
+            if conn: conn.close()
+
+    def iter_student_records(self, dept_id: Optional[str] = None, student_ids: Optional[List[str]] = None
+                             ) -> Iterator[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Streams (student_id, student_info, enrollments) in student_id order for a department,
+        an explicit list of IDs, or the whole campus. Walks a student cursor and an enrollment
+        cursor side by side (both ordered by student_id), so only one student's rows are held
+        in memory at a time. All rows come from one read snapshot, held until the iterator
+        is exhausted or closed.
+        """
+        if student_ids is not None:
+            student_ids = sorted(set(student_ids))
+        with self.snapshot() as conn:
+            for where_clause, params in self._bulk_scopes(dept_id, student_ids):
+                student_cursor = conn.execute(self.BULK_STUDENT_INFO_SQL.format(where=where_clause), params)
+                enrollment_cursor = conn.execute(self.BULK_ENROLLMENTS_SQL.format(where=where_clause), params)
+                enrollment_row = enrollment_cursor.fetchone()
+                for row in student_cursor:
+                    student_id = row[0]
+                    student_info = {'student_id': row[0], 'first_name': row[1], 'last_name': row[2], 'dept_id': row[3], 'dept_name': row[4], 'curriculum_id': row[5], 'curriculum_version': row[6], 'curriculum_name': row[7]}
+                    # Skip enrollments of students the header query dropped (e.g. missing department)
+                    while enrollment_row is not None and enrollment_row[0] < student_id:
+                        enrollment_row = enrollment_cursor.fetchone()
+                    enrollments = []
+                    while enrollment_row is not None and enrollment_row[0] == student_id:
+                        enrollments.append(dict(zip(self.ENROLLMENT_FIELDS, enrollment_row[1:])))
+                        enrollment_row = enrollment_cursor.fetchone()
+                    yield student_id, student_info, enrollments
+
+    def get_term_enrollments(self, first_semester: str, last_semester: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        All enrollments from first_semester through last_semester (default: just first_semester),
+        in term order. Uses the semester_ordinal index instead of comparing semester strings.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute(self.TERM_ENROLLMENTS_SQL, (Semester.parse(first_semester).ordinal,
+                                                  Semester.parse(last_semester or first_semester).ordinal))
+            return [{'student_id': row[0], 'course_code': row[1], 'semester': row[2], 'grade': row[3], 'attempt_number': row[4]} for row in c.fetchall()]
+        except sqlite3.Error as e: print(f"Database error in get_term_enrollments: {e}"); return []
+        finally:
+            if conn: conn.close()
+
+    def get_curriculum_courses(self, curriculum_id: int) -> List[Dict[str, Any]]:
+        """All courses of a curriculum with their pre-parsed credit hours, in suggested-semester order."""
+        conn = None
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute("""SELECT cc.course_code, cn.course_name, cc.metu_credits, cc.ects_credits, cc.credit_hours,
+                                cc.lecture_hours, cc.lab_hours, cc.semester_suggested, cc.is_required
+                         FROM curriculum_courses cc JOIN course_names cn ON cc.course_code = cn.course_code
+                         WHERE cc.curriculum_id = ?
+                         ORDER BY cc.semester_suggested, cc.course_code""", (curriculum_id,))
+            return [{'course_code': row[0], 'course_name': row[1], 'metu_credits': row[2], 'ects_credits': row[3], 'credit_hours': row[4], 'lecture_hours': row[5], 'lab_hours': row[6], 'semester_suggested': row[7], 'is_required': bool(row[8])} for row in c.fetchall()]
+        except sqlite3.Error as e: print(f"Database error in get_curriculum_courses for {curriculum_id}: {e}"); return []
+        finally:
+            if conn: conn.close()
+
     def get_students_by_department(self, dept_id: str) -> List[str]:
         """Retrieves a list of student IDs for a given department."""
         conn = None
         try:
             conn = self.get_connection()
             c = conn.cursor()
-            c.execute("SELECT student_id FROM students WHERE dept_id = ?", (dept_id,))
+            c.execute(self.STUDENTS_BY_DEPARTMENT_SQL, (dept_id,))
             rows = c.fetchall()
             return [row[0] for row in rows]
         except sqlite3.Error as e: print(f"Database error in get_students_by_department: {e}"); return []
@@ -272,21 +1175,57 @@ class TranscriptDatabase:
         finally:
             if conn: conn.close()
             
-    def get_course_prerequisites(self, curriculum_id: int, course_code: str) -> List[str]:
-        """Retrieves a list of prerequisite course codes for a given course."""
+    def get_active_students(self, dept_id: Optional[str] = None) -> List[str]:
+        """Student IDs with status 'ACTIVE', for a department or the whole campus, in ID order."""
         conn = None
         try:
             conn = self.get_connection()
             c = conn.cursor()
-            c.execute("SELECT prerequisite_code FROM prerequisites WHERE curriculum_id = ? AND course_code = ?", (curriculum_id, course_code))
-            rows = c.fetchall()
-            return [row[0] for row in rows]
+            if dept_id is not None:
+                c.execute("SELECT student_id FROM students WHERE status = 'ACTIVE' AND dept_id = ? ORDER BY student_id", (dept_id,))
+            else:
+                c.execute("SELECT student_id FROM students WHERE status = 'ACTIVE' ORDER BY student_id")
+            return [row[0] for row in c.fetchall()]
+        except sqlite3.Error as e: print(f"Database error in get_active_students: {e}"); return []
+        finally:
+            if conn: conn.close()
+
+    def get_prerequisite_graph(self, curriculum_id: int) -> PrerequisiteGraph:
+        """
+        Returns the cached prerequisite graph of a curriculum, loading it with one query
+        the first time. The cache is per TranscriptDatabase instance.
+        """
+        graph = self._prerequisite_graphs.get(curriculum_id)
+        if graph is not None:
+            return graph
+        conn = None
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute(self.CURRICULUM_PREREQUISITES_SQL, (curriculum_id,))
+            graph = PrerequisiteGraph(curriculum_id, c.fetchall())
         except sqlite3.Error as e:
-            print(f"Database error in get_course_prerequisites: {e}")
-            return []
+            print(f"Database error loading prerequisites for curriculum {curriculum_id}: {e}")
+            return PrerequisiteGraph(curriculum_id, [])  # Not cached, so the next call retries
         finally:
             if conn:
                 conn.close()
+        with self._prerequisite_graphs_lock:
+            self._prerequisite_graphs[curriculum_id] = graph
+            self.prerequisite_graph_loads += 1
+        return graph
+
+    def invalidate_prerequisite_graph(self, curriculum_id: Optional[int] = None):
+        """Drops the cached graph of one curriculum, or of all curricula when None."""
+        with self._prerequisite_graphs_lock:
+            if curriculum_id is None:
+                self._prerequisite_graphs.clear()
+            else:
+                self._prerequisite_graphs.pop(curriculum_id, None)
+
+    def get_course_prerequisites(self, curriculum_id: int, course_code: str) -> List[str]:
+        """Retrieves a list of prerequisite course codes for a given course."""
+        return self.get_prerequisite_graph(curriculum_id).get_prerequisites(course_code)
 
     def get_student_passed_courses(self, student_id: str) -> List[str]:
         """Retrieves a list of course codes for courses a student has passed."""
@@ -332,122 +1271,50 @@ class TranscriptDatabase:
         # In TranscriptDatabase class
     def are_prerequisites_satisfied(self, student_id: str, curriculum_id: int, course_code: str) -> Tuple[bool, List[str]]:
         """Check if student has passed all prerequisites for a course"""
-        prerequisites = self.get_course_prerequisites(curriculum_id, course_code)
-        if not prerequisites:
+        graph = self.get_prerequisite_graph(curriculum_id)
+        if not graph.prerequisites.get(course_code):
             return True, []  # No prerequisites
         
         passed_courses = self.get_student_passed_courses(student_id)
-        missing = [p for p in prerequisites if p not in passed_courses]
+        missing = graph.missing_prerequisites(course_code, passed_courses)
         return (len(missing) == 0, missing)
     
     # In TranscriptDatabase class
     def retake_failed_courses(self, student_id: str, current_semester: str):
         """Enroll student in courses failed in ALL attempts (never passed)"""
-        enrollments = self.get_student_enrollments(student_id)
-        passed_courses = set(self.get_student_passed_courses(student_id))
-        courses_to_retake = set()
-        
-        # Identify courses failed in all attempts (never passed)
-        for e in enrollments:
-            course_code = e['course_code']
-            if course_code in passed_courses:
-                continue  # Skip if passed in any attempt
-            if not self.grade_calculator.is_passing_grade(e['grade']):
-                courses_to_retake.add(course_code)
-        
-        # Enroll using enroll_student (handles prerequisites/attempts)
-        for course_code in courses_to_retake:
-            self.enroll_student(student_id, course_code, current_semester)
+        session = RegistrationSession(self, student_id)
+        session.retake_failed_courses(current_semester)
+        session.flush()
 
     # In TranscriptDatabase class
     def enroll_student(self, student_id: str, course_code: str, semester: str) -> Tuple[bool, str]:
         """Enroll student in course with prerequisite checks and retake logic"""
-        # Step 1: Check if student has already passed the course
-        passed_courses = self.get_student_passed_courses(student_id)
-        if course_code in passed_courses:
-            return False, f"Student has already passed {course_code} and cannot enroll again."
-
-        # Step 2: Check suggested semester constraint
-        student_info = self.get_student_info(student_id)
-        if not student_info:
-            return False, "Student not found"
-        
-        curriculum_id = student_info['curriculum_id']
-        enrollment_year = student_info.get('enrollment_year')
-        
-        if enrollment_year:
-            # Parse semester string (e.g., "2021-Fall")
-            parts = semester.split('-')
-            if len(parts) == 2:
-                try:
-                    current_year = int(parts[0])
-                    term = parts[1]
-                    # Calculate current semester number
-                    year_diff = current_year - enrollment_year
-                    term_value = 1 if term == 'Fall' else 2
-                    current_semester_num = year_diff * 2 + term_value
-                    
-                    # Fetch suggested semester from curriculum
-                    conn = self.get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "SELECT semester_suggested FROM curriculum_courses "
-                        "WHERE curriculum_id=? AND course_code=?",
-                        (curriculum_id, course_code)
-                    )
-                    row = cursor.fetchone()
-                    conn.close()
-                    
-                    if row:
-                        suggested_semester = row[0]
-                        if current_semester_num < suggested_semester:
-                            return False, (
-                                f"Cannot take {course_code} in {semester} (semester #{current_semester_num}). "
-                                f"Suggested semester: #{suggested_semester}."
-                            )
-                except ValueError:
-                    pass  # Skip if semester format is invalid
-
-        # Step 3: Check prerequisites
-        prereq_ok, missing = self.are_prerequisites_satisfied(student_id, curriculum_id, course_code)
-        if not prereq_ok:
-            return False, f"Missing prerequisites: {', '.join(missing)}"
-        
-        # Proceed with enrollment
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT MAX(attempt_number) FROM student_enrollments "
-            "WHERE student_id=? AND course_code=?",
-            (student_id, course_code)
-        )
-        max_attempt = cursor.fetchone()[0] or 0
-        conn.close()
-        
-        success = self.add_enrollment(
-            student_id,
-            course_code,
-            semester,
-            'NA',  # Temporary grade
-            attempt_number=max_attempt + 1
-        )
-        return (True, "Enrollment successful") if success else (False, "Enrollment failed")
+        session = RegistrationSession(self, student_id)
+        success, message = session.enroll(course_code, semester)
+        session.flush()
+        return success, message
     
     def register_for_semester(self, student_id: str, semester: str, courses: List[str]):
-        """Handle full semester registration with prerequisites and retakes"""
+        """
+        Handle full semester registration with prerequisites and retakes.
+        The whole registration (retakes and new courses) is one transaction with a single commit.
+        """
         conn = self.get_connection()
         try:
-            conn.execute("BEGIN TRANSACTION")
+            conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading, so checks and writes are atomic
             results = []
+            # The session reads the student's record once and writes all enrollments at the end
+            session = RegistrationSession(self, student_id)
             
             # First retake any failed courses
-            self.retake_failed_courses(student_id, semester)
+            session.retake_failed_courses(semester)
             
             # Then process new course requests
             for course_code in courses:
-                success, message = self.enroll_student(student_id, course_code, semester)
+                success, message = session.enroll(course_code, semester)
                 results.append((course_code, success, message))
             
+            session.flush(conn, commit=False)
             conn.commit()
             return results
         except Exception as e:
@@ -456,6 +1323,50 @@ class TranscriptDatabase:
             return [(course, False, str(e)) for course in courses]
         finally:
             conn.close()
+
+    def register_cohort_for_semester(self, semester: str,
+                                     registrations: Dict[str, List[str]]) -> Dict[str, List[Tuple[str, bool, str]]]:
+        """
+        Registers many students for a semester in one transaction.
+        registrations maps student_id -> requested course codes. Each student gets the same
+        treatment as register_for_semester (retakes first, then the requested courses).
+        Returns student_id -> [(course_code, success, message), ...]. If anything fails, nothing
+        is written and every requested course is reported as failed with the error.
+        """
+        if not registrations:
+            return {}
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            student_ids = list(registrations)
+            students = self.get_students_info_bulk(student_ids=student_ids)
+            enrollments_by_student = self.get_enrollments_bulk(student_ids=student_ids)
+
+            results: Dict[str, List[Tuple[str, bool, str]]] = {}
+            sessions = []
+            for student_id, courses in registrations.items():
+                student_info = students.get(student_id)
+                if student_info is None:
+                    results[student_id] = [(course_code, False, "Student not found") for course_code in courses]
+                    continue
+                session = RegistrationSession(self, student_id, student_info,
+                                              enrollments_by_student.get(student_id, []))
+                session.retake_failed_courses(semester)
+                results[student_id] = [(course_code, *session.enroll(course_code, semester)) for course_code in courses]
+                sessions.append(session)
+
+            for session in sessions:
+                session.flush(conn, commit=False)
+            conn.commit()
+            return results
+        except Exception as e:
+            conn.rollback()
+            print(f"Error in register_cohort_for_semester: {e}")
+            return {student_id: [(course, False, str(e)) for course in courses]
+                    for student_id, courses in registrations.items()}
+        finally:
+            conn.close()
+
     def populate_sample_data(self):
         """
         Populates the database using all three curriculum datasets.
@@ -463,18 +1374,8 @@ class TranscriptDatabase:
         print("--- Starting Sample Data Population ---")
 
         # 1. Add Departments
-        departments_data = [
-            ("CNG", "Computer Engineering"),
-            ("EEE", "Electrical & Electronics Engineering"),
-            ("SNG", "Software Engineering"),
-            ("MAT", "Mathematics"),
-            ("GER", "German Language"),
-            ("ME", "Mechanical Engineering"),
-            ("ENG", "English"),
-            ("HST", "History"),
-        ]
         print("1. Adding departments...")
-        for dept_id, dept_name in departments_data:
+        for dept_id, dept_name in self.SAMPLE_DEPARTMENTS:
             self.add_department(dept_id, dept_name)
         print("   Departments processed.")
 
@@ -489,18 +1390,7 @@ class TranscriptDatabase:
         all_courses = set()
         
         # Add external prerequisites first
-        external_prereqs = [
-            {'code': '3570100', 'name': 'Pre-Calculus', 'dept_id': 'MAT'},
-            {'code': '3660271', 'name': 'German Language and Culture I', 'dept_id': 'GER'},
-            {'code': '3660272', 'name': 'German Language and Culture II', 'dept_id': 'GER'},
-            {'code': '6040201', 'name': 'Advanced German I', 'dept_id': 'GER'},
-            {'code': '6040202', 'name': 'Advanced German II', 'dept_id': 'GER'},
-            {'code': '2360119', 'name': 'Calculus for Technical Programs', 'dept_id': 'MAT'},
-            {'code': '2360117', 'name': 'Applied Calculus', 'dept_id': 'MAT'},
-            {'code': '6390101', 'name': 'English for Academic Purposes I', 'dept_id': 'ENG'},
-            {'code': '2402201', 'name': 'History of the Turkish Republic I', 'dept_id': 'HST'},
-        ]
-        for course_data in external_prereqs:
+        for course_data in self.EXTERNAL_PREREQUISITE_COURSES:
             all_courses.add((course_data['code'], course_data['name'], course_data['dept_id']))
 
         # Add courses from main curricula
@@ -548,16 +1438,9 @@ class TranscriptDatabase:
         # INDENTATION FIXED: This entire section should be indented under populate_sample_data
         print("\n4. Adding students and their enrollments...")
         student_counter = 1
-        first_names = ["Ali", "Ayşe", "Mehmet", "Zeynep", "Can", "Elif", "Cem", "Deniz", "Emir", "Selin"]
-        last_names = ["Yilmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yildiz", "Özdemir", "Arslan", "Koç", "Aydin"]
-        
-        # Consistent semesters for academic progression
-        semesters = [
-            "2021-Fall", "2022-Spring", 
-            "2022-Fall", "2023-Spring", 
-            "2023-Fall", "2024-Spring", 
-            "2024-Fall", "2025-Spring"
-        ]
+        first_names = self.SAMPLE_FIRST_NAMES
+        last_names = self.SAMPLE_LAST_NAMES
+        semesters = self.SAMPLE_SEMESTERS
         
         for dept_id_loop, dept_name_loop in [("CNG", "Computer Engineering"), ("EEE", "Electrical & Electronics Engineering"), ("SNG", "Software Engineering")]:
             print(f"  Populating 25 students for department: {dept_name_loop}")
@@ -615,9 +1498,7 @@ class TranscriptDatabase:
                             enrollments = self.get_student_enrollments(student_id)
                             for enrollment in enrollments:
                                 if enrollment['semester'] == actual_semester and enrollment['grade'] == 'NA':
-                                    credit_hours = self.grade_calculator.extract_credit_hours(
-                                        enrollment['metu_credits']
-                                    )
+                                    credit_hours = enrollment['credit_hours'] or 0.0
                                     
                                     # Select appropriate grading system based on credit hours
                                     if credit_hours == 0:
@@ -638,6 +1519,12 @@ class TranscriptDatabase:
                 
                 student_counter += 1
         
+        # Grades above were written with plain UPDATEs, so rebuild the stored GPA summaries once
+        self.rebuild_gpa_summaries()
+        with self.connection() as conn:
+            self.mark_students_changed(conn, self.get_all_students())
+            conn.commit()
+
         print(f"\nProcessed {student_counter - 1} student profiles.")
         print("--- Sample Data Population Completed ---")
 
@@ -689,21 +1576,14 @@ class TranscriptDatabase:
         enrollments = self.get_student_enrollments(student_id)
         for enrollment in enrollments:
             if enrollment['semester'] == semester and enrollment['grade'] == 'NA':
-                credit_hours = self.grade_calculator.extract_credit_hours(enrollment['metu_credits'])
+                credit_hours = enrollment['credit_hours'] or 0.0
                 
                 # Select appropriate grade scale based on credit hours
-                if credit_hours == 0:
-                    grades = ["S", "U"]  # Pass/Fail
-                else:
-                    grades = ["AA", "BA", "BB", "CB", "CC", "DC", "DD", "FF"]
-                
-                # Weight grades to make passing more common than failing (optional)
-                weights = [0.15, 0.15, 0.15, 0.15, 0.15, 0.1, 0.05, 0.1]  # 90% pass rate
-                
-                if len(grades) == 2:  # For pass/fail courses
-                    grade = random.choice(grades)
+                if credit_hours == 0:  # Pass/Fail
+                    grade = random.choice(self.SIMULATED_PASS_FAIL_GRADES)
                 else:
-                    grade = random.choices(grades, weights=weights)[0]
+                    # Weight grades to make passing more common than failing
+                    grade = random.choices(self.SIMULATED_LETTER_GRADES, weights=self.SIMULATED_LETTER_GRADE_WEIGHTS)[0]
                 
                 self.update_grade(student_id, enrollment['course_code'], semester, grade)
 
@@ -713,11 +1593,10 @@ class TranscriptDatabase:
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE student_enrollments SET grade=? "
-                "WHERE student_id=? AND course_code=? AND semester=?",
-                (new_grade, student_id, course_code, semester)
-            )
+            cursor.execute(self.UPDATE_GRADE_SQL, (new_grade, student_id, course_code, semester))
+            if cursor.rowcount > 0:
+                self.refresh_gpa_summary(conn, student_id)
+                self.mark_students_changed(conn, [student_id])
             conn.commit()
             return cursor.rowcount > 0
         except sqlite3.Error as e:
@@ -727,6 +1606,289 @@ class TranscriptDatabase:
             if conn:
                 conn.close()
 
+    # --- Materialized GPA summary (student_gpa_summary / student_semester_gpa) ---
+
+    def compute_gpa_summary(self, enrollments: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Computes a student's summary row and per-semester rows with GradeCalculator,
+        the same way TranscriptGenerator does for a transcript.
+        """
+        calc = self.grade_calculator
+        course_grades = calc.process_course_grades(enrollments) if enrollments else []
+        cgpa, total_points, total_credits = calc.calculate_cgpa(course_grades)
+        completion_status = calc.calculate_completion_status(course_grades)
+        summary = {'cgpa': cgpa, 'total_points': total_points, 'total_credits': total_credits,
+                   'completed_credits': completion_status['completed_credits'],
+                   'passed_credits': completion_status['passed_credits'],
+                   'academic_standing': calc.get_academic_standing(cgpa)}
+        semester_rows = []
+        for semester, data in calc.calculate_semester_summary(calc.group_grades_by_semester(course_grades)).items():
+            semester_rows.append({'semester': semester, 'semester_gpa': data['semester_gpa'],
+                                  'semester_points': data['semester_points'], 'semester_credits': data['semester_credits'],
+                                  'cumulative_gpa': data['cumulative_gpa'], 'cumulative_points': data['cumulative_points'],
+                                  'cumulative_credits': data['cumulative_credits']})
+        return summary, semester_rows
+
+    def _write_gpa_summaries(self, conn, summaries: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]):
+        """Replaces the stored summary and semester rows of the given students (no commit)."""
+        student_keys = [(student_id,) for student_id in summaries]
+        conn.executemany("DELETE FROM student_semester_gpa WHERE student_id = ?", student_keys)
+        conn.executemany("""INSERT OR REPLACE INTO student_gpa_summary
+                            (student_id, cgpa, total_points, total_credits, completed_credits, passed_credits,
+                             academic_standing, updated_date)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+                         [(student_id, s['cgpa'], s['total_points'], s['total_credits'], s['completed_credits'],
+                           s['passed_credits'], s['academic_standing'])
+                          for student_id, (s, _) in summaries.items()])
+        conn.executemany("""INSERT INTO student_semester_gpa
+                            (student_id, semester, semester_gpa, semester_points, semester_credits,
+                             cumulative_gpa, cumulative_points, cumulative_credits)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                         [(student_id, r['semester'], r['semester_gpa'], r['semester_points'], r['semester_credits'],
+                           r['cumulative_gpa'], r['cumulative_points'], r['cumulative_credits'])
+                          for student_id, (_, rows) in summaries.items() for r in rows])
+
+    def refresh_gpa_summary(self, conn, student_id: str):
+        """
+        Recomputes one student's stored summary from their enrollments, on the caller's
+        connection and inside the caller's transaction (the caller commits).
+        Called after every single-row enrollment change, so the cost is one student's record.
+        """
+        rows = conn.execute(self.STUDENT_ENROLLMENTS_SQL, (student_id,)).fetchall()
+        enrollments = [dict(zip(self.ENROLLMENT_FIELDS, row)) for row in rows]
+        self._write_gpa_summaries(conn, {student_id: self.compute_gpa_summary(enrollments)})
+
+    def rebuild_gpa_summaries(self, student_ids: Optional[List[str]] = None) -> int:
+        """
+        Recomputes the stored summaries of the given students (default: everyone) in one
+        transaction. Use after bulk loads or writes made outside this class.
+        Returns the number of students rebuilt.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            if student_ids is None:
+                conn.execute("DELETE FROM student_semester_gpa")
+                conn.execute("DELETE FROM student_gpa_summary")
+                ids = [row[0] for row in conn.execute("SELECT student_id FROM students ORDER BY student_id")]
+            else:
+                ids = list(student_ids)
+            enrollments_by_student = self.get_enrollments_bulk(student_ids=student_ids)
+            summaries = {student_id: self.compute_gpa_summary(enrollments_by_student.get(student_id, []))
+                         for student_id in ids}
+            self._write_gpa_summaries(conn, summaries)
+            conn.commit()
+            return len(summaries)
+        except sqlite3.Error as e:
+            if conn: conn.rollback()
+            print(f"Database error in rebuild_gpa_summaries: {e}")
+            return 0
+        finally:
+            if conn: conn.close()
+
+    def get_gpa_summary(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """Reads a student's stored summary, with per-semester rows under 'semesters'."""
+        conn = None
+        try:
+            conn = self.get_connection()
+            row = conn.execute("""SELECT cgpa, total_points, total_credits, completed_credits, passed_credits,
+                                         academic_standing, updated_date
+                                  FROM student_gpa_summary WHERE student_id = ?""", (student_id,)).fetchone()
+            if not row:
+                return None
+            semesters = conn.execute("""SELECT semester, semester_gpa, semester_points, semester_credits,
+                                               cumulative_gpa, cumulative_points, cumulative_credits
+                                        FROM student_semester_gpa WHERE student_id = ?""", (student_id,)).fetchall()
+            return {'student_id': student_id, 'cgpa': row[0], 'total_points': row[1], 'total_credits': row[2],
+                    'completed_credits': row[3], 'passed_credits': row[4], 'academic_standing': row[5],
+                    'updated_date': row[6],
+                    'semesters': {r[0]: {'semester_gpa': r[1], 'semester_points': r[2], 'semester_credits': r[3],
+                                         'cumulative_gpa': r[4], 'cumulative_points': r[5], 'cumulative_credits': r[6]}
+                                  for r in semesters}}
+        except sqlite3.Error as e: print(f"Database error in get_gpa_summary for {student_id}: {e}"); return None
+        finally:
+            if conn: conn.close()
+
+    def get_honor_list(self, dept_id: Optional[str] = None, min_cgpa: float = 3.0) -> List[Dict[str, Any]]:
+        """Students with a stored CGPA >= min_cgpa (3.0 = Honor), best first, optionally for one department."""
+        conn = None
+        try:
+            conn = self.get_connection()
+            sql = """SELECT s.student_id, s.first_name, s.last_name, s.dept_id, g.cgpa, g.academic_standing
+                     FROM student_gpa_summary g JOIN students s ON g.student_id = s.student_id
+                     WHERE g.cgpa >= ?"""
+            params: tuple = (min_cgpa,)
+            if dept_id is not None:
+                sql += " AND s.dept_id = ?"
+                params += (dept_id,)
+            rows = conn.execute(sql + " ORDER BY g.cgpa DESC, s.student_id", params).fetchall()
+            return [{'student_id': r[0], 'first_name': r[1], 'last_name': r[2], 'dept_id': r[3],
+                     'cgpa': r[4], 'academic_standing': r[5]} for r in rows]
+        except sqlite3.Error as e: print(f"Database error in get_honor_list: {e}"); return []
+        finally:
+            if conn: conn.close()
+
+    def get_ranking_rows(self, student_ids: Optional[List[str]] = None) -> List[Tuple[str, str, int, int, float]]:
+        """
+        (student_id, dept_id, curriculum_id, enrollment_year, stored cgpa) for every student with
+        a GPA summary, or only for student_ids; used to build ClassRanking.
+        """
+        conn = None
+        rows = []
+        try:
+            conn = self.get_connection()
+            for where_clause, params in self._bulk_scopes(None, student_ids):
+                rows.extend(conn.execute(f"""SELECT s.student_id, s.dept_id, s.curriculum_id, s.enrollment_year, g.cgpa
+                                             FROM students s JOIN student_gpa_summary g ON s.student_id = g.student_id
+                                             WHERE {where_clause}""", params).fetchall())
+            return rows
+        except sqlite3.Error as e: print(f"Database error in get_ranking_rows: {e}"); return []
+        finally:
+            if conn: conn.close()
+
+    def get_statistics_aggregates(self) -> Optional[Dict[str, Any]]:
+        """
+        Inputs for campus-wide statistics, read in one snapshot: 'total_students', 'students'
+        as (student_id, dept_id, dept_name, stored cgpa) rows in student ID order, and
+        'grade_counts' (grade -> count over every latest attempt). Returns None if any student
+        lacks a stored GPA summary, or on a database error.
+        """
+        try:
+            with self.snapshot() as conn:
+                total_students = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+                students = conn.execute(self.STATISTICS_STUDENTS_SQL).fetchall()
+                if any(row[3] is None for row in students):
+                    return None
+                grade_counts = dict(conn.execute(self.LATEST_GRADE_COUNTS_SQL).fetchall())
+            return {'total_students': total_students, 'students': students, 'grade_counts': grade_counts}
+        except sqlite3.Error as e: print(f"Database error in get_statistics_aggregates: {e}"); return None
+
+    def check_gpa_summaries(self) -> List[Tuple[str, str, Any, Any]]:
+        """
+        Compares every stored summary with a fresh GradeCalculator computation.
+        Returns (student_id, field, stored, expected) for each difference; empty means consistent.
+        """
+        mismatches = []
+        enrollments_by_student = self.get_enrollments_bulk()
+        conn = None
+        try:
+            conn = self.get_connection()
+            stored = {r[0]: r[1:] for r in conn.execute(
+                """SELECT s.student_id, g.cgpa, g.total_points, g.total_credits, g.completed_credits,
+                          g.passed_credits, g.academic_standing
+                   FROM students s LEFT JOIN student_gpa_summary g ON s.student_id = g.student_id""")}
+            stored_semesters: Dict[str, Dict[str, tuple]] = {}
+            for r in conn.execute("SELECT * FROM student_semester_gpa"):
+                stored_semesters.setdefault(r[0], {})[r[1]] = tuple(r[2:])
+        except sqlite3.Error as e:
+            print(f"Database error in check_gpa_summaries: {e}")
+            return mismatches
+        finally:
+            if conn: conn.close()
+
+        fields = ['cgpa', 'total_points', 'total_credits', 'completed_credits', 'passed_credits', 'academic_standing']
+        semester_fields = ['semester_gpa', 'semester_points', 'semester_credits',
+                           'cumulative_gpa', 'cumulative_points', 'cumulative_credits']
+        for student_id, stored_row in stored.items():
+            summary, semester_rows = self.compute_gpa_summary(enrollments_by_student.get(student_id, []))
+            if stored_row[0] is None:
+                mismatches.append((student_id, 'summary', None, 'missing'))
+                continue
+            for field, value in zip(fields, stored_row):
+                if value != summary[field]:
+                    mismatches.append((student_id, field, value, summary[field]))
+            expected_semesters = {r['semester']: tuple(r[f] for f in semester_fields) for r in semester_rows}
+            if stored_semesters.get(student_id, {}) != expected_semesters:
+                mismatches.append((student_id, 'semesters', stored_semesters.get(student_id, {}), expected_semesters))
+        return mismatches
+
+    # --- Change tracking (student_changes) ---
+
+    @staticmethod
+    def _change_timestamp() -> str:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def mark_students_changed(self, conn, student_ids: List[str]) -> int:
+        """
+        Bumps the change sequence of the given students, on the caller's connection and inside
+        the caller's transaction (the caller commits). All students marked by one call share
+        the new sequence number, which is returned.
+        """
+        change_seq = conn.execute("SELECT COALESCE(MAX(change_seq), 0) + 1 FROM student_changes").fetchone()[0]
+        modified_at = self._change_timestamp()
+        conn.executemany("""INSERT OR REPLACE INTO student_changes (student_id, change_seq, modified_at)
+                            VALUES (?, ?, ?)""",
+                         [(student_id, change_seq, modified_at) for student_id in student_ids])
+        return change_seq
+
+    def get_change_watermark(self) -> int:
+        """The latest change sequence number (0 if nothing has been recorded)."""
+        conn = None
+        try:
+            conn = self.get_connection()
+            return conn.execute("SELECT COALESCE(MAX(change_seq), 0) FROM student_changes").fetchone()[0]
+        except sqlite3.Error as e: print(f"Database error in get_change_watermark: {e}"); return 0
+        finally:
+            if conn: conn.close()
+
+    def get_changed_students(self, since_seq: Optional[int] = None, since_time: Optional[str] = None,
+                             dept_id: Optional[str] = None) -> List[str]:
+        """
+        Student IDs changed after change sequence since_seq and/or at or after since_time
+        ("YYYY-MM-DD[ HH:MM:SS]", local time), optionally limited to one department.
+        """
+        conn = None
+        try:
+            conn = self.get_connection()
+            sql = "SELECT ch.student_id FROM student_changes ch"
+            conditions, params = [], []
+            if dept_id is not None:
+                sql += " JOIN students s ON s.student_id = ch.student_id"
+                conditions.append("s.dept_id = ?")
+                params.append(dept_id)
+            if since_seq is not None:
+                conditions.append("ch.change_seq > ?")
+                params.append(since_seq)
+            if since_time is not None:
+                conditions.append("ch.modified_at >= ?")
+                params.append(since_time)
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            return [row[0] for row in conn.execute(sql + " ORDER BY ch.student_id", params)]
+        except sqlite3.Error as e: print(f"Database error in get_changed_students: {e}"); return []
+        finally:
+            if conn: conn.close()
+
+    def explain_hot_queries(self, verbose: bool = True) -> List[Dict[str, Any]]:
+        """
+        Runs EXPLAIN QUERY PLAN on every query in HOT_QUERIES and flags full table scans
+        (plan steps that SCAN a table instead of SEARCHing an index).
+        Returns one dict per query: {'name', 'plan', 'full_scans'}.
+        """
+        report = []
+        conn = None
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            for name, (sql, param_count) in self.HOT_QUERIES.items():
+                c.execute("EXPLAIN QUERY PLAN " + sql, ('',) * param_count)
+                plan = [row[3] for row in c.fetchall()]
+                full_scans = [step for step in plan if step.startswith('SCAN ') and 'USING' not in step]
+                report.append({'name': name, 'plan': plan, 'full_scans': full_scans})
+        except sqlite3.Error as e:
+            print(f"Database error in explain_hot_queries: {e}")
+        finally:
+            if conn: conn.close()
+
+        if verbose:
+            for entry in report:
+                status = "FULL SCAN" if entry['full_scans'] else "ok"
+                print(f"[{status:>9}] {entry['name']}")
+                for step in entry['plan']:
+                    print(f"              {step}")
+        return report
+
 if __name__ == "__main__":
     db_file_name = "transcript_system.db"
     
@@ -737,6 +1899,9 @@ if __name__ == "__main__":
     db = TranscriptDatabase(db_name=db_file_name)
     db.populate_sample_data()
 
+    print("\n=== Hot Query Plans ===")
+    db.explain_hot_queries()
+
     print("\n=== Database Test Queries ===")
     all_students = db.get_all_students()
     print(f"Total students found in DB: {len(all_students)}")
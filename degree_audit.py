@@ -0,0 +1,160 @@
+# degree_audit.py
+"""
+Degree audit: compares a student's latest grades with the courses of their curriculum.
+
+Each curriculum's courses get bit positions (in suggested-semester order) and a student's
+passed courses become one integer bitmask, so missing requirements are a single
+`required & ~passed`. Credit and ECTS totals of a mask are summed from per-byte lookup
+tables (one lookup per 8 courses) instead of looping over courses.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from database import TranscriptDatabase
+from grade_calculator import CourseGrade, GradeCalculator
+
+
+@dataclass
+class DegreeAudit:
+    """Result of auditing one student against their curriculum"""
+    curriculum_id: int
+    required_courses: int
+    passed_required_courses: int
+    missing_courses: List[str]  # Required courses not yet passed, in suggested-semester order
+    completed_credits: float    # Credits / ECTS of passed curriculum courses
+    completed_ects: float
+    remaining_credits: float    # Credits / ECTS of missing_courses
+    remaining_ects: float
+    cgpa_requirement_met: bool
+    eligible_for_graduation: bool
+    # (course_code, course_name, semester_suggested, credit_hours) of each missing course
+    missing_details: List[Tuple[str, str, int, float]] = field(default_factory=list)
+
+
+class CurriculumRequirements:
+    """The courses of one curriculum encoded as bit positions."""
+
+    def __init__(self, curriculum_id: int, courses: List[Dict[str, Any]]):
+        self.curriculum_id = curriculum_id
+        self.course_codes = [course['course_code'] for course in courses]
+        self.bits = {code: 1 << i for i, code in enumerate(self.course_codes)}
+        self.details = {course['course_code']: (course['course_code'], course['course_name'], course['semester_suggested'],
+                                                course['credit_hours'] or 0.0) for course in courses}
+        self.all_mask = (1 << len(courses)) - 1
+        self.required_mask = 0
+        for i, course in enumerate(courses):
+            if course['is_required']:
+                self.required_mask |= 1 << i
+        self.required_count = bin(self.required_mask).count('1')
+        self.credit_tables = self._byte_tables([course['credit_hours'] or 0.0 for course in courses])
+        self.ects_tables = self._byte_tables([course['ects_credits'] or 0.0 for course in courses])
+
+    @staticmethod
+    def _byte_tables(values: List[float]) -> List[List[float]]:
+        """tables[k][b] = sum of values[8k + i] for every bit i set in byte b."""
+        tables = []
+        for start in range(0, len(values), 8):
+            chunk = values[start:start + 8]
+            table = [0.0] * 256
+            for byte in range(1, 256):
+                low = byte & -byte
+                i = low.bit_length() - 1
+                table[byte] = table[byte ^ low] + (chunk[i] if i < len(chunk) else 0.0)
+            tables.append(table)
+        return tables
+
+    @staticmethod
+    def _sum(tables: List[List[float]], mask: int) -> float:
+        total = 0.0
+        for table in tables:
+            if mask == 0:
+                break
+            total += table[mask & 0xFF]
+            mask >>= 8
+        return total
+
+    def credits(self, mask: int) -> float:
+        return self._sum(self.credit_tables, mask)
+
+    def ects(self, mask: int) -> float:
+        return self._sum(self.ects_tables, mask)
+
+    def courses(self, mask: int) -> List[str]:
+        """Course codes of the set bits, in bit (suggested-semester) order."""
+        codes = []
+        while mask:
+            low = mask & -mask
+            codes.append(self.course_codes[low.bit_length() - 1])
+            mask ^= low
+        return codes
+
+    def passed_mask(self, latest_grades: Dict[str, CourseGrade], grade_calculator: GradeCalculator) -> int:
+        """Bitmask of curriculum courses whose latest grade is a passing grade."""
+        mask = 0
+        for course_code, grade in latest_grades.items():
+            bit = self.bits.get(course_code)
+            if bit is not None and grade_calculator.is_passing_grade(grade.grade):
+                mask |= bit
+        return mask
+
+
+class DegreeAuditor:
+    """
+    Audits students against their curriculum. Curriculum encodings are loaded with one
+    query the first time they are needed and cached per auditor (see invalidate).
+    """
+    GRADUATION_MIN_CGPA = 2.0
+
+    def __init__(self, database: TranscriptDatabase, grade_calculator: Optional[GradeCalculator] = None):
+        self.database = database
+        self.grade_calculator = grade_calculator or GradeCalculator()
+        self._requirements: Dict[int, CurriculumRequirements] = {}
+        self._requirements_lock = threading.Lock()
+
+    def get_requirements(self, curriculum_id: int) -> CurriculumRequirements:
+        requirements = self._requirements.get(curriculum_id)
+        if requirements is None:
+            requirements = CurriculumRequirements(curriculum_id, self.database.get_curriculum_courses(curriculum_id))
+            with self._requirements_lock:
+                self._requirements[curriculum_id] = requirements
+        return requirements
+
+    def invalidate(self, curriculum_id: Optional[int] = None):
+        """Drops the cached encoding of one curriculum, or of all curricula when None."""
+        with self._requirements_lock:
+            if curriculum_id is None:
+                self._requirements.clear()
+            else:
+                self._requirements.pop(curriculum_id, None)
+
+    def audit(self, curriculum_id: int, latest_grades: Dict[str, CourseGrade], cgpa: float) -> DegreeAudit:
+        """Audits one student from their latest grades (course_code -> CourseGrade) and CGPA."""
+        requirements = self.get_requirements(curriculum_id)
+        passed = requirements.passed_mask(latest_grades, self.grade_calculator)
+        missing = requirements.required_mask & ~passed
+        missing_courses = requirements.courses(missing)
+        cgpa_requirement_met = cgpa >= self.GRADUATION_MIN_CGPA
+        return DegreeAudit(
+            curriculum_id=curriculum_id,
+            required_courses=requirements.required_count,
+            passed_required_courses=requirements.required_count - len(missing_courses),
+            missing_courses=missing_courses,
+            completed_credits=requirements.credits(passed),
+            completed_ects=requirements.ects(passed),
+            remaining_credits=requirements.credits(missing),
+            remaining_ects=requirements.ects(missing),
+            cgpa_requirement_met=cgpa_requirement_met,
+            eligible_for_graduation=not missing and requirements.required_count > 0 and cgpa_requirement_met,
+            missing_details=[requirements.details[code] for code in missing_courses],
+        )
+
+    def audit_students(self, dept_id: Optional[str] = None,
+                       student_ids: Optional[List[str]] = None) -> Iterator[Tuple[str, DegreeAudit]]:
+        """Audits a department, a list of students, or the whole campus in one streaming pass."""
+        for student_id, student_info, enrollments in self.database.iter_student_records(dept_id=dept_id,
+                                                                                        student_ids=student_ids):
+            # RunningCGPA gives the latest grade of each course and the CGPA in one pass
+            running = self.grade_calculator.projection_base(self.grade_calculator.process_course_grades(enrollments))
+            yield student_id, self.audit(student_info['curriculum_id'], running.latest, running.cgpa()[0])
@@ -1,6 +1,6 @@
-import functools
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
+from semester import semester_ordinal
 
 @dataclass
 class CourseGrade:
@@ -15,6 +15,74 @@ class CourseGrade:
     credit_hours: float = 0.0  # Extracted from metu_credits
     grade_points: float = 0.0  # Calculated based on grade
 
+    def __reduce__(self):
+        # Positional fields unpickle about twice as fast as the default __dict__ state (see transcript_cache.py)
+        return (CourseGrade, (self.course_code, self.course_name, self.semester, self.grade, self.metu_credits,
+                              self.ects_credits, self.attempt_number, self.credit_hours, self.grade_points))
+
+class RunningCGPA:
+    """
+    Cumulative points/credits over the latest attempt of each course, updated one grade
+    at a time. Folding in a repeat swaps the replaced attempt's contribution out of the
+    totals, so a whole record costs O(n) instead of re-deduplicating it every semester.
+    Picks the same latest attempt as GradeCalculator.get_latest_grades.
+    """
+
+    def __init__(self, calculator: 'GradeCalculator'):
+        self.calculator = calculator
+        self.latest: Dict[str, CourseGrade] = {}
+        self.total_points = 0.0
+        self.total_credits = 0.0
+
+    def _contribution(self, grade: CourseGrade) -> Tuple[float, float]:
+        return self._grade_contribution(grade.grade, grade.credit_hours)
+
+    def _grade_contribution(self, grade: str, credit_hours: float) -> Tuple[float, float]:
+        if self.calculator.is_gpa_grade(grade):
+            grade_point_value = self.calculator.get_grade_points(grade)
+            if grade_point_value is not None:
+                return grade_point_value * credit_hours, credit_hours
+        return 0.0, 0.0
+
+    def add(self, grade: CourseGrade):
+        current = self.latest.get(grade.course_code)
+        if current is not None:
+            # On a tie the attempt seen first stays, like the stable sort in get_latest_grades
+            if self.calculator.attempt_order_key(grade) <= self.calculator.attempt_order_key(current):
+                return
+            points, credits = self._contribution(current)
+            self.total_points -= points
+            self.total_credits -= credits
+        self.latest[grade.course_code] = grade
+        points, credits = self._contribution(grade)
+        self.total_points += points
+        self.total_credits += credits
+
+    def cgpa(self) -> Tuple[float, float, float]:
+        """Same (cgpa, total_points, total_credits) as calculate_cgpa over every grade added so far."""
+        cgpa = self.total_points / self.total_credits if self.total_credits > 0 else 0.0
+        return round(cgpa, 2), self.total_points, self.total_credits
+
+    def project(self, hypothetical: Dict[str, Tuple[str, float]]) -> Tuple[float, float, float]:
+        """
+        (cgpa, total_points, total_credits) if every course in hypothetical were taken again with
+        the given (grade, credit_hours), as a new latest attempt. Leaves the totals unchanged;
+        costs O(len(hypothetical)).
+        """
+        total_points, total_credits = self.total_points, self.total_credits
+        for course_code, (grade, credit_hours) in hypothetical.items():
+            current = self.latest.get(course_code)
+            if current is not None:
+                points, credits = self._contribution(current)
+                total_points -= points
+                total_credits -= credits
+            points, credits = self._grade_contribution(grade, credit_hours)
+            total_points += points
+            total_credits += credits
+        cgpa = total_points / total_credits if total_credits > 0 else 0.0
+        return round(cgpa, 2), total_points, total_credits
+
+
 class GradeCalculator:
     """
     Handles all grade calculations according to METU NCC regulations
@@ -41,6 +109,20 @@ class GradeCalculator:
         except (ValueError, IndexError):
             return 0.0
 
+    def parse_metu_credits(self, metu_credits: Optional[str]) -> Tuple[float, float, float]:
+        """Splits "4(3-2)" into (credit hours, lecture hours, lab hours); missing parts are 0.0."""
+        credit_hours = self.extract_credit_hours(metu_credits)
+        lecture_hours = lab_hours = 0.0
+        metu_credits_str = str(metu_credits or '')
+        if '(' in metu_credits_str:
+            try:
+                lecture, _, lab = metu_credits_str.split('(', 1)[1].rstrip(')').partition('-')
+                lecture_hours = float(lecture) if lecture else 0.0
+                lab_hours = float(lab) if lab else 0.0
+            except ValueError:
+                lecture_hours = lab_hours = 0.0
+        return credit_hours, lecture_hours, lab_hours
+
     def get_grade_points(self, grade: str) -> Optional[float]:
         """Get grade points for a given grade"""
         return self.GRADE_SCALE.get(grade.upper())
@@ -70,7 +152,10 @@ class GradeCalculator:
         """Process raw enrollment data into a list of CourseGrade objects"""
         course_grades = []
         for enrollment in enrollments:
-            credit_hours = self.extract_credit_hours(enrollment.get('metu_credits'))
+            # Enrollments from the database carry pre-parsed credit hours (curriculum_courses.credit_hours)
+            credit_hours = enrollment.get('credit_hours')
+            if credit_hours is None:
+                credit_hours = self.extract_credit_hours(enrollment.get('metu_credits'))
             grade_points_value = self.get_grade_points(enrollment['grade'])
             
             course_grade = CourseGrade(
@@ -89,28 +174,17 @@ class GradeCalculator:
 
     def _compare_semesters(self, sem1: str, sem2: str) -> int:
         """Compare two semesters (e.g., "2023-Fall" > "2023-Spring")."""
-        try:
-            year1, season1 = sem1.split('-')
-            year2, season2 = sem2.split('-')
-            year1, year2 = int(year1), int(year2)
+        ordinal1, ordinal2 = semester_ordinal(sem1), semester_ordinal(sem2)
+        return (ordinal1 > ordinal2) - (ordinal1 < ordinal2)
 
-            if year1 != year2:
-                return 1 if year1 > year2 else -1
-            
-            season_order = {'Spring': 1, 'Summer': 2, 'Fall': 3}
-            season1_val = season_order.get(season1, 0)
-            season2_val = season_order.get(season2, 0)
-
-            if season1_val > season2_val: return 1
-            elif season1_val < season2_val: return -1
-            else: return 0
-        except (ValueError, IndexError):
-            return 0 # Treat as equal if format is unexpected
+    def attempt_order_key(self, grade: CourseGrade) -> Tuple[int, int]:
+        """Sort key deciding which attempt of a course is the latest one: (semester ordinal, attempt number)."""
+        return (semester_ordinal(grade.semester), grade.attempt_number)
 
     def get_latest_grades(self, course_grades: List[CourseGrade]) -> Dict[str, CourseGrade]:
         """Get the latest grade for each course (handles repeated courses)"""
         latest_grades: Dict[str, CourseGrade] = {}
-        sorted_grades = sorted(course_grades, key=lambda g: (g.semester, g.attempt_number), reverse=True)
+        sorted_grades = sorted(course_grades, key=self.attempt_order_key, reverse=True)
 
         for grade in sorted_grades:
             if grade.course_code not in latest_grades:
@@ -162,16 +236,17 @@ class GradeCalculator:
         if not semester_grades:
             return summary_output
             
-        sorted_semester_keys = sorted(semester_grades.keys(), key=functools.cmp_to_key(self._compare_semesters))
-        all_grades_processed_chronologically: List[CourseGrade] = []
+        sorted_semester_keys = sorted(semester_grades.keys(), key=semester_ordinal)
+        running_cgpa = RunningCGPA(self)
 
         for semester_key in sorted_semester_keys:
             grades_this_semester = semester_grades.get(semester_key, [])
             
             sem_gpa, sem_points, sem_credits = self.calculate_semester_gpa(grades_this_semester)
-            all_grades_processed_chronologically.extend(grades_this_semester)
+            for grade in grades_this_semester:
+                running_cgpa.add(grade)
             
-            cgpa, cum_points, cum_credits = self.calculate_cgpa(all_grades_processed_chronologically)
+            cgpa, cum_points, cum_credits = running_cgpa.cgpa()
 
             # FIX: Use consistent, simple keys for the dictionary
             summary_output[semester_key] = {
@@ -185,6 +260,45 @@ class GradeCalculator:
             }
         return summary_output
     
+    def projection_base(self, course_grades: List[CourseGrade]) -> RunningCGPA:
+        """Latest-attempt aggregates of a record, for repeated what-if projections (project_cgpa)."""
+        base = RunningCGPA(self)
+        for grade in sorted(course_grades, key=lambda g: semester_ordinal(g.semester)):
+            base.add(grade)
+        return base
+
+    def project_cgpa(self, base: RunningCGPA, hypothetical_grades: Dict[str, str],
+                     credit_hours: Optional[Dict[str, float]] = None) -> Tuple[float, float, float]:
+        """
+        What-if CGPA: (cgpa, total_points, total_credits) if each course in hypothetical_grades
+        (course_code -> grade) were taken again and got that grade; the last grade counts.
+        Credit hours come from credit_hours, else from the student's existing attempt.
+        """
+        hypothetical = {}
+        for course_code, grade in hypothetical_grades.items():
+            if credit_hours is not None and course_code in credit_hours:
+                hours = credit_hours[course_code]
+            elif course_code in base.latest:
+                hours = base.latest[course_code].credit_hours
+            else:
+                raise ValueError(f"No credit hours known for {course_code}")
+            hypothetical[course_code] = (grade.upper(), hours)
+        return base.project(hypothetical)
+
+    def lowest_grade_for_target(self, base: RunningCGPA, course_codes: List[str], target_cgpa: float,
+                                credit_hours: Optional[Dict[str, float]] = None) -> Optional[Tuple[str, float]]:
+        """
+        Lowest letter grade that, earned in every one of course_codes, brings the CGPA to at
+        least target_cgpa. Returns (grade, projected cgpa), or None if even AA falls short.
+        """
+        letter_grades = sorted((g for g, points in self.GRADE_SCALE.items() if points is not None and g in self.PASSING_GRADES),
+                               key=lambda g: self.GRADE_SCALE[g])
+        for grade in letter_grades:
+            cgpa, _, _ = self.project_cgpa(base, {code: grade for code in course_codes}, credit_hours)
+            if cgpa >= target_cgpa:
+                return grade, cgpa
+        return None
+
     def get_academic_standing(self, cgpa: float) -> str:
         """Determine academic standing based on CGPA."""
         if cgpa >= 3.5: return "High Honor"
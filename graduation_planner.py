@@ -0,0 +1,275 @@
+# graduation_planner.py
+"""
+Earliest-graduation planner: schedules a student's remaining required courses (and any
+unpassed prerequisites they need) into Fall/Spring semesters.
+
+Rules:
+  * a course can be taken once every direct prerequisite was passed in an earlier semester;
+  * a semester holds at most max_credits credit hours (a single course above the cap
+    still gets a semester of its own);
+  * a course is offered in the term of its suggested semester: odd suggested semesters
+    are Fall, even ones Spring (semester #1 is a Fall, as in RegistrationSession.enroll).
+
+Minimum-semester scheduling with a credit cap is NP-hard in general, so the planner uses
+critical-path list scheduling: each term it fills the cap with available courses that have
+the longest chain of remaining courses depending on them. Every plan carries a lower
+bound (longest prerequisite chain, total credits / cap); plans that reach it are minimal.
+
+Requires NumPy (through prerequisite_closure):  pip install numpy
+
+    python graduation_planner.py --db_path transcript_system.db --student_id 2600001
+    python graduation_planner.py --db_path transcript_system.db --dept_id SNG --max_credits 21
+"""
+
+import argparse
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from database import TranscriptDatabase
+from degree_audit import DegreeAuditor
+from grade_calculator import GradeCalculator
+from prerequisite_closure import EligibilityEngine
+from semester import Semester, next_regular_semester
+
+
+@dataclass
+class GraduationPlan:
+    """Semester-by-semester plan of a student's remaining courses"""
+    student_id: str
+    curriculum_id: int
+    semesters: List[Tuple[str, List[str], float]]  # (semester, course codes, credit hours)
+    remaining_credits: float
+    lower_bound_semesters: int
+    unplaceable: List[str] = field(default_factory=list)  # Courses whose prerequisites can't be met
+
+    @property
+    def semester_count(self) -> int:
+        return len(self.semesters)
+
+    @property
+    def graduation_semester(self) -> Optional[str]:
+        return self.semesters[-1][0] if self.semesters and not self.unplaceable else None
+
+    @property
+    def is_minimal(self) -> bool:
+        return not self.unplaceable and len(self.semesters) <= self.lower_bound_semesters
+
+
+class GraduationPlanner:
+    """Plans remaining semesters from the degree audit, the prerequisite closure and suggested semesters."""
+    DEFAULT_MAX_CREDITS = 21.0
+    MAX_PLANNED_TERMS = 40  # Safety stop; a feasible plan never gets close
+
+    def __init__(self, database: TranscriptDatabase, grade_calculator: Optional[GradeCalculator] = None,
+                 max_credits: float = DEFAULT_MAX_CREDITS, follow_offering_terms: bool = True):
+        self.database = database
+        self.grade_calculator = grade_calculator or GradeCalculator()
+        self.max_credits = max_credits
+        self.follow_offering_terms = follow_offering_terms
+        self.degree_auditor = DegreeAuditor(database, self.grade_calculator)
+        self.eligibility_engine = EligibilityEngine(database, self.grade_calculator)
+
+    @staticmethod
+    def default_start_semester(enrollments: List[dict]) -> str:
+        """The term after the student's latest enrollment, or the next term from today."""
+        if enrollments:
+            latest = max((Semester.parse(e['semester']) for e in enrollments), key=lambda s: s.ordinal)
+            if latest.term is not None:
+                return next_regular_semester(latest.text)
+        today = date.today()
+        return f"{today.year}-Fall" if today.month <= 6 else f"{today.year + 1}-Spring"
+
+    @staticmethod
+    def _term_name(first_term: str, offset: int) -> str:
+        """'Fall' or 'Spring' of the term offset regular terms after first_term."""
+        first_is_fall = Semester.parse(first_term).term == 'Fall'
+        return 'Fall' if first_is_fall == (offset % 2 == 0) else 'Spring'
+
+    def _offered(self, semester_suggested: Optional[int], term: str) -> bool:
+        if not self.follow_offering_terms or not semester_suggested:
+            return True
+        return (term == 'Fall') == (semester_suggested % 2 == 1)
+
+    def _lower_bound(self, order: List[str], prerequisites: Dict[str, List[str]], credit_hours: Dict[str, float],
+                     suggested: Dict[str, Optional[int]], first_term: str) -> int:
+        """
+        Fewest semesters any valid plan needs: enough terms for the earliest-possible schedule
+        of the longest prerequisite chain, and enough Fall / Spring / total capacity for the
+        credits (a course above the cap counts as one full term).
+        """
+        earliest: Dict[str, int] = {}
+        for code in order:
+            t = max((earliest[p] + 1 for p in prerequisites[code]), default=0)
+            if not self._offered(suggested[code], self._term_name(first_term, t)):
+                t += 1
+            earliest[code] = t
+        semesters = max(earliest.values(), default=-1) + 1
+        if self.max_credits <= 0:
+            return semesters
+        credits = {'Fall': 0.0, 'Spring': 0.0, 'any': 0.0}
+        for code in order:
+            fall, spring = self._offered(suggested[code], 'Fall'), self._offered(suggested[code], 'Spring')
+            credits['any' if fall == spring else 'Fall' if fall else 'Spring'] += min(credit_hours[code], self.max_credits)
+        needed_fall = math.ceil(credits['Fall'] / self.max_credits)
+        needed_spring = math.ceil(credits['Spring'] / self.max_credits)
+        needed_total = math.ceil(sum(credits.values()) / self.max_credits)
+        while True:
+            fall_terms = sum(self._term_name(first_term, t) == 'Fall' for t in range(semesters))
+            if (fall_terms >= needed_fall and semesters - fall_terms >= needed_spring
+                    and semesters >= needed_total):
+                return semesters
+            semesters += 1
+
+    def plan(self, student_id: str, student_info: Dict, enrollments: List[dict],
+             start_semester: Optional[str] = None) -> GraduationPlan:
+        """Plans one student. Courses blocked by a prerequisite cycle end up in unplaceable."""
+        curriculum_id = student_info['curriculum_id']
+        closure = self.eligibility_engine.get_closure(curriculum_id)
+        requirements = self.degree_auditor.get_requirements(curriculum_id)
+        course_grades = self.grade_calculator.process_course_grades(enrollments)
+        running = self.grade_calculator.projection_base(course_grades)
+        audit = self.degree_auditor.audit(curriculum_id, running.latest, running.cgpa()[0])
+        passed_any = {grade.course_code for grade in course_grades if self.grade_calculator.is_passing_grade(grade.grade)}
+
+        # Required courses still missing, plus every unpassed prerequisite they depend on
+        to_plan: Set[str] = set(audit.missing_courses)
+        for course_code in audit.missing_courses:
+            to_plan.update(code for code in closure.all_prerequisites(course_code) if code not in passed_any)
+        # Courses on or behind a prerequisite cycle can never be scheduled
+        blocked = {code for code in to_plan if closure.is_blocked(code)}
+        order = [code for code in closure.order if code in to_plan and code not in blocked]  # Prerequisites first
+        order += sorted(to_plan - set(closure.index))
+
+        prerequisites = {code: [p for p in closure.codes(closure.direct[closure.index[code]]) if p not in passed_any]
+                         if code in closure.index else [] for code in order}
+        dependents: Dict[str, List[str]] = {}
+        for code in order:
+            for prereq_code in prerequisites[code]:
+                dependents.setdefault(prereq_code, []).append(code)
+        credit_hours = {code: requirements.details[code][3] if code in requirements.details else 0.0 for code in order}
+        suggested = {code: requirements.details[code][2] if code in requirements.details else None for code in order}
+        total_credits = sum(credit_hours.values()) + sum(
+            requirements.details[code][3] for code in blocked if code in requirements.details)
+        first_term = start_semester or self.default_start_semester(enrollments)
+
+        # Critical path: terms from taking a course in a Fall / Spring until its last dependent is done
+        tail: Dict[str, Dict[str, int]] = {}
+        for code in reversed(order):
+            tail[code] = {}
+            for term_name, other in (('Fall', 'Spring'), ('Spring', 'Fall')):
+                longest = 1
+                for dependent in dependents.get(code, ()):
+                    delta, dependent_term = (1, other) if self._offered(suggested[dependent], other) else (2, term_name)
+                    longest = max(longest, delta + tail[dependent][dependent_term])
+                tail[code][term_name] = longest
+
+        lower_bound = self._lower_bound(order, prerequisites, credit_hours, suggested, first_term)
+        unmet = {code: len(prerequisites[code]) for code in order}
+
+        semesters: List[Tuple[str, List[str], float]] = []
+        remaining = set(order)
+        term = first_term
+        idle_terms = 0
+        while remaining and len(semesters) < self.MAX_PLANNED_TERMS and idle_terms < 2:
+            term_name = Semester.parse(term).term
+            available = sorted((code for code in remaining if unmet[code] == 0 and self._offered(suggested[code], term_name)),
+                               key=lambda code: (-tail[code][term_name], suggested[code] or 0, code))
+            taken, credits = [], 0.0
+            for code in available:
+                if credits + credit_hours[code] <= self.max_credits or not taken:
+                    taken.append(code)
+                    credits += credit_hours[code]
+            idle_terms = 0 if taken else idle_terms + 1
+            semesters.append((term, taken, credits))
+            for code in taken:
+                remaining.discard(code)
+                for dependent in dependents.get(code, ()):
+                    unmet[dependent] -= 1
+            term = next_regular_semester(term)
+        # Drop trailing empty terms left by the idle guard
+        while semesters and not semesters[-1][1]:
+            semesters.pop()
+        return GraduationPlan(student_id=student_id, curriculum_id=curriculum_id, semesters=semesters,
+                              remaining_credits=total_credits, lower_bound_semesters=lower_bound,
+                              unplaceable=sorted(remaining | blocked))
+
+    def plan_student(self, student_id: str, start_semester: Optional[str] = None) -> Optional[GraduationPlan]:
+        student_info = self.database.get_student_info(student_id)
+        if not student_info:
+            print(f"Error: Student {student_id} not found")
+            return None
+        return self.plan(student_id, student_info, self.database.get_student_enrollments(student_id), start_semester)
+
+    def plan_students(self, dept_id: Optional[str] = None, student_ids: Optional[List[str]] = None,
+                      start_semester: Optional[str] = None, active_only: bool = True) -> Iterator[GraduationPlan]:
+        """
+        Plans every student with remaining courses in a department, a list of students or the
+        whole campus, in one streaming pass. active_only skips students whose status isn't 'ACTIVE'.
+        """
+        if active_only:
+            active = self.database.get_active_students(dept_id)
+            student_ids = active if student_ids is None else sorted(set(student_ids) & set(active))
+            if not student_ids:
+                return
+        for student_id, student_info, enrollments in self.database.iter_student_records(dept_id=dept_id,
+                                                                                        student_ids=student_ids):
+            plan = self.plan(student_id, student_info, enrollments, start_semester)
+            if plan.semesters or plan.unplaceable:
+                yield plan
+
+
+def print_plan(plan: GraduationPlan):
+    print(f"Plan for {plan.student_id} (curriculum {plan.curriculum_id}): {plan.remaining_credits:.1f} credits in "
+          f"{plan.semester_count} semester(s), lower bound {plan.lower_bound_semesters}"
+          f"{' (minimal)' if plan.is_minimal else ''}")
+    for semester, course_codes, credits in plan.semesters:
+        print(f"  {semester:<12} {credits:5.1f} cr  {' '.join(course_codes) if course_codes else '(nothing offered)'}")
+    if plan.unplaceable:
+        print(f"  Cannot be scheduled (unmet prerequisites): {', '.join(plan.unplaceable)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Earliest-graduation planner")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Path to the database file")
+    parser.add_argument("--student_id", help="Plan one student and print the plan")
+    parser.add_argument("--dept_id", help="Plan every active student with remaining courses in a department")
+    parser.add_argument("--all_students", action="store_true", help="Plan every active student with remaining courses on campus")
+    parser.add_argument("--include_inactive", action="store_true", help="With --dept_id/--all_students: also plan students whose status isn't ACTIVE")
+    parser.add_argument("--start", metavar="SEMESTER", help="First planned semester, e.g. 2025-Fall (default: the term after each student's latest)")
+    parser.add_argument("--max_credits", type=float, default=GraduationPlanner.DEFAULT_MAX_CREDITS, help="Credit hours allowed per semester (default: 21)")
+    parser.add_argument("--any_term", action="store_true", help="Ignore Fall/Spring offering patterns")
+    parser.add_argument("--verbose", action="store_true", help="With --dept_id/--all_students: print every plan")
+    args = parser.parse_args()
+
+    database = TranscriptDatabase(args.db_path)
+    planner = GraduationPlanner(database, max_credits=args.max_credits, follow_offering_terms=not args.any_term)
+    try:
+        if args.student_id:
+            plan = planner.plan_student(args.student_id, args.start)
+            if plan:
+                print_plan(plan)
+        elif args.dept_id or args.all_students:
+            start = time.perf_counter()
+            plans = minimal = 0
+            semester_counts: Dict[int, int] = {}
+            for plan in planner.plan_students(dept_id=args.dept_id, start_semester=args.start,
+                                              active_only=not args.include_inactive):
+                plans += 1
+                minimal += plan.is_minimal
+                semester_counts[plan.semester_count] = semester_counts.get(plan.semester_count, 0) + 1
+                if args.verbose:
+                    print_plan(plan)
+            elapsed = time.perf_counter() - start
+            print(f"Planned {plans} student(s) in {elapsed:.2f}s; {minimal} plan(s) provably minimal.")
+            print("Semesters to graduation: " + ", ".join(f"{count} x {n}" for n, count in sorted(semester_counts.items())))
+        else:
+            parser.print_help()
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
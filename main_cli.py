@@ -1,8 +1,192 @@
 # main_cli.py
 import argparse
+import contextlib
+import io
+import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Tuple
 from transcript_generator import TranscriptGenerator, TranscriptData
 from transcript_formatter import TranscriptFormatter
+from grade_calculator import GradeCalculator
+from class_ranking import ClassRanking
+from transcript_cache import TranscriptCache
+from database import SchemaMigrationError
+
+WATERMARK_FILE = ".transcript_watermarks.json"
+
+def load_watermark(output_dir: str, scope: str):
+    """Change sequence recorded by the last successful run for this scope ('all' or 'dept:<ID>'), or None."""
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(scope)
+
+def save_watermark(output_dir: str, scope: str, change_seq: int):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    watermarks = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            watermarks = json.load(f)
+    watermarks[scope] = change_seq
+    with open(path, 'w') as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+
+def print_statistics(stats: dict) -> None:
+    """Prints the result of TranscriptGenerator.get_transcript_statistics."""
+    print(f"Students: {stats['total_students']}   Average CGPA: {stats['average_cgpa']:.2f}")
+    for dept_id, dept_info in sorted(stats['departments'].items()):
+        print(f"  {dept_id:<6} {dept_info['name']:<40} {dept_info['count']:>6}  avg CGPA {dept_info['avg_cgpa']:.2f}")
+    distribution = sorted(stats['grade_distribution'].items(),
+                          key=lambda item: (-(GradeCalculator.GRADE_SCALE.get(item[0]) or 0.0), item[0]))
+    print("Latest-attempt grades: " + ", ".join(f"{grade} {count}" for grade, count in distribution))
+
+
+def print_what_if(generator: TranscriptGenerator, student_id: str, grade_args: List[str],
+                  target_cgpa: Optional[float]) -> None:
+    """Prints current vs projected CGPA for hypothetical grades given as COURSE=GRADE strings."""
+    database, calculator = generator.database, generator.grade_calculator
+    student_info = database.get_student_info(student_id)
+    if not student_info:
+        print(f"Error: Student {student_id} not found.")
+        return
+    hypothetical_grades = {}
+    for grade_arg in grade_args:
+        course_code, _, grade = grade_arg.partition('=')
+        if not course_code.strip() or grade.strip().upper() not in calculator.GRADE_SCALE:
+            print(f"Error: Expected COURSE=GRADE with a known grade, got '{grade_arg}'.")
+            return
+        hypothetical_grades[course_code.strip().upper()] = grade.strip().upper()
+
+    base = calculator.projection_base(calculator.process_course_grades(database.get_student_enrollments(student_id)))
+    credit_hours = {course['course_code']: course['credit_hours']
+                    for course in database.get_curriculum_courses(student_info['curriculum_id'])}
+    unknown = [code for code in hypothetical_grades if code not in credit_hours and code not in base.latest]
+    if unknown:
+        print(f"Error: Not in the curriculum of {student_id}: {', '.join(unknown)}")
+        return
+
+    cgpa, _, total_credits = base.cgpa()
+    print(f"Current CGPA:   {cgpa:.2f} over {total_credits:g} credits ({calculator.get_academic_standing(cgpa)})")
+    if hypothetical_grades:
+        projected, _, projected_credits = calculator.project_cgpa(base, hypothetical_grades, credit_hours)
+        changes = ", ".join(f"{code}={grade}" for code, grade in hypothetical_grades.items())
+        print(f"Projected CGPA: {projected:.2f} over {projected_credits:g} credits "
+              f"({calculator.get_academic_standing(projected)}) with {changes}")
+    if target_cgpa is not None:
+        if not hypothetical_grades:
+            print("Error: --target_cgpa needs at least one --grade course.")
+            return
+        needed = calculator.lowest_grade_for_target(base, list(hypothetical_grades), target_cgpa, credit_hours)
+        if needed:
+            print(f"Lowest grade in {', '.join(hypothetical_grades)} for CGPA >= {target_cgpa:.2f}: "
+                  f"{needed[0]} (projected {needed[1]:.2f})")
+        else:
+            print(f"CGPA {target_cgpa:.2f} is out of reach with {', '.join(hypothetical_grades)} alone.")
+
+
+def format_transcript(formatter: TranscriptFormatter, data_item: TranscriptData, output_format: str) -> Tuple[int, int]:
+    """Writes the HTML and/or PDF transcript of one student. Returns (files generated, errors)."""
+    generated, errors = 0, 0
+    student_id_for_file = data_item.student_id
+    print(f"Processing formatting for student: {student_id_for_file}")
+
+    if output_format == 'html' or output_format == 'both':
+        try:
+            filepath = formatter.generate_html_transcript(data_item)
+            print(f"  Generated HTML transcript: {filepath}")
+            generated += 1
+        except Exception as e:
+            print(f"  Error generating HTML for {student_id_for_file}: {e}")
+            errors += 1
+
+    if output_format == 'pdf' or output_format == 'both':
+        try:
+            filepath = formatter.generate_pdf_transcript(data_item)
+            if filepath: # generate_pdf_transcript returns None on error
+                print(f"  Generated PDF transcript: {filepath}")
+                generated += 1
+            else: # generate_pdf_transcript prints its own errors
+                errors += 1
+        except Exception as e: # Should ideally be caught within generate_pdf_transcript
+            print(f"  Unexpected error during PDF formatting for {student_id_for_file}: {e}")
+            errors += 1
+    return generated, errors
+
+
+# Per-process state of --jobs workers, set up once by _init_worker
+_worker_generator: Optional[TranscriptGenerator] = None
+_worker_formatter: Optional[TranscriptFormatter] = None
+
+def _init_worker(db_path: str, read_only: bool, output_dir: str, cache_path: Optional[str], cache_max_bytes: int):
+    global _worker_generator, _worker_formatter
+    _worker_generator = TranscriptGenerator(db_path=db_path, pool_size=1, read_only=read_only,
+                                            cache_path=cache_path, cache_max_bytes=cache_max_bytes)
+    _worker_formatter = TranscriptFormatter(output_dir=output_dir)
+
+def _process_chunk(student_ids: List[str], output_format: str) -> Tuple[int, int, int, float, str]:
+    """
+    Generates and formats one chunk of students in a worker process. Output is captured so the
+    parent can print chunks in order. Returns (students, files, errors, format seconds, output).
+    """
+    students = files = errors = 0
+    format_seconds = 0.0
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            for data_item in _worker_generator.iter_transcripts(student_ids=student_ids):
+                students += 1
+                format_started = time.perf_counter()
+                generated, failed = format_transcript(_worker_formatter, data_item, output_format)
+                files += generated
+                errors += failed
+                format_seconds += time.perf_counter() - format_started
+        except Exception as e:
+            # The rest of this chunk is lost, the other chunks carry on
+            print(f"  Error processing students {student_ids[0]}..{student_ids[-1]}: {e}")
+            errors += 1 if students == len(student_ids) else 0
+    # Students that were never formatted (a build error reported by iter_transcripts, or the
+    # exception above) are errors too, so an incremental run doesn't advance past them
+    errors += len(student_ids) - students
+    return students, files, errors, format_seconds, output.getvalue()
+
+def run_parallel_jobs(student_ids: List[str], jobs: int, db_path: str, read_only: bool,
+                      output_dir: str, output_format: str, cache_path: Optional[str] = None,
+                      cache_max_bytes: int = TranscriptCache.DEFAULT_MAX_BYTES) -> Tuple[int, int, float]:
+    """
+    Splits student_ids into chunks and generates and formats them in a pool of jobs processes,
+    each with its own database connection and formatter. Progress is printed in chunk order.
+    Returns (files generated, errors, format seconds summed over workers).
+    """
+    # Several small chunks per worker keep every core busy when some students take longer
+    chunk_size = max(1, min(50, -(-len(student_ids) // (jobs * 4))))
+    chunks = [student_ids[i:i + chunk_size] for i in range(0, len(student_ids), chunk_size)]
+    print(f"Processing {len(student_ids)} student(s) in {len(chunks)} chunk(s) with {jobs} worker processes.")
+    generated_files_count = formatting_errors = done = 0
+    format_seconds = 0.0
+    # spawn: workers must not inherit the parent's open SQLite connections
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(db_path, read_only, output_dir, cache_path, cache_max_bytes)) as executor:
+        futures = [executor.submit(_process_chunk, chunk, output_format) for chunk in chunks]
+        for number, (chunk, future) in enumerate(zip(chunks, futures), start=1):
+            try:
+                students, files, errors, seconds, output = future.result()
+            except Exception as e: # The worker process died
+                print(f"  Error: worker failed on students {chunk[0]}..{chunk[-1]}: {e}")
+                formatting_errors += len(chunk)
+                continue
+            print(output, end="")
+            done += len(chunk)
+            generated_files_count += files
+            formatting_errors += errors
+            format_seconds += seconds
+            print(f"[{number}/{len(chunks)}] {done}/{len(student_ids)} students, "
+                  f"{generated_files_count} file(s), {formatting_errors} error(s)")
+    return generated_files_count, formatting_errors, format_seconds
+
 
 def main():
     parser = argparse.ArgumentParser(description="METU NCC Transcript Generation System")
@@ -12,6 +196,26 @@ def main():
     parser.add_argument("--format", choices=['html', 'pdf', 'both'], default='pdf', help="Output format (default: pdf)")
     parser.add_argument("--output_dir", default="transcripts", help="Directory to save transcripts (default: transcripts)")
     parser.add_argument("--db_path", default="transcript_system.db", help="Path to the database file (default: transcript_system.db)")
+    parser.add_argument("--incremental", action="store_true", help="With --all_students/--dept_id: only regenerate students changed since the last run into --output_dir")
+    parser.add_argument("--changed_since", "--changed-since", metavar="TIMESTAMP", help="With --all_students/--dept_id: only regenerate students changed at or after TIMESTAMP ('YYYY-MM-DD[ HH:MM:SS]')")
+    parser.add_argument("--profile", action="store_true", help="Instrument database queries and print a timing summary at the end of the run")
+    parser.add_argument("--slow_query_ms", type=float, default=100.0, help="With --profile: log queries slower than this many milliseconds (default: 100)")
+    parser.add_argument("--rebuild_gpa_summary", action="store_true", help="Recompute the stored GPA summary of every student and exit")
+    parser.add_argument("--check_gpa_summary", action="store_true", help="Compare stored GPA summaries with a fresh calculation and exit")
+    parser.add_argument("--honor_list", action="store_true", help="List students with CGPA >= 3.00 from the stored summaries (optionally per --dept_id) and exit")
+    parser.add_argument("--rank", metavar="STUDENT_ID", help="Print the class rank and percentile of STUDENT_ID (campus, department, curriculum, cohort) and exit")
+    parser.add_argument("--top", type=int, metavar="K", help="List the K best CGPAs on campus, in --dept_id, or in the --dept_id/--entry_year cohort and exit")
+    parser.add_argument("--entry_year", type=int, help="With --top and --dept_id: rank only students who entered in this year")
+    parser.add_argument("--degree_audit", action="store_true", help="Audit every student (or --dept_id) against their curriculum, print remaining requirements and exit")
+    parser.add_argument("--statistics", action="store_true", help="Print campus statistics (department averages, grade distribution) and exit")
+    parser.add_argument("--check_statistics", action="store_true", help="Compare the fast statistics with ones computed from full transcripts and exit")
+    parser.add_argument("--what_if", metavar="STUDENT_ID", help="Project the CGPA of STUDENT_ID with the hypothetical grades given by --grade and exit")
+    parser.add_argument("--grade", action="append", default=[], metavar="COURSE=GRADE", help="With --what_if: a hypothetical (re)take, e.g. --grade MAT120=BB (repeatable)")
+    parser.add_argument("--target_cgpa", type=float, help="With --what_if: the lowest grade needed in every --grade course to reach this CGPA")
+    parser.add_argument("--read_only", action="store_true", help="Open the database read-only (safe to run while grades are being written; best with WAL mode)")
+    parser.add_argument("--cache_path", metavar="FILE", help="Reuse transcript data computed by earlier runs from this cache file when a student's records are unchanged")
+    parser.add_argument("--cache_max_mb", type=float, default=TranscriptCache.DEFAULT_MAX_BYTES / 2**20, help="With --cache_path: evict least recently used entries beyond this size (default: 256)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N", help="With --all_students/--dept_id: generate and format transcripts in N worker processes (default: 1)")
 
     args = parser.parse_args()
 
@@ -22,67 +226,201 @@ def main():
         print("or specify the correct path using --db_path.")
         return
 
-    generator = TranscriptGenerator(db_path=args.db_path)
+    run_started = time.perf_counter()
+    cache_max_bytes = int(args.cache_max_mb * 2**20)
+    try:
+        generator = TranscriptGenerator(db_path=args.db_path, read_only=args.read_only,
+                                        instrument=args.profile, slow_query_ms=args.slow_query_ms,
+                                        cache_path=args.cache_path, cache_max_bytes=cache_max_bytes)
+    except SchemaMigrationError as e:
+        print(f"Error: {e}")
+        return
     formatter = TranscriptFormatter(output_dir=args.output_dir)
     # ensure_output_directory is called in formatter's __init__
 
-    transcripts_data_to_process: list[TranscriptData] = []
+    if args.rebuild_gpa_summary:
+        rebuilt = generator.database.rebuild_gpa_summaries()
+        print(f"Rebuilt GPA summaries for {rebuilt} student(s).")
+        return
+    if args.check_gpa_summary:
+        mismatches = generator.database.check_gpa_summaries()
+        for student_id, field, stored, expected in mismatches:
+            print(f"  {student_id}: {field} stored={stored!r} expected={expected!r}")
+        print(f"GPA summary check: {len(mismatches)} mismatch(es).")
+        return
+    if args.honor_list:
+        for entry in generator.database.get_honor_list(dept_id=args.dept_id):
+            print(f"  {entry['student_id']}  {entry['first_name']} {entry['last_name']:<12} "
+                  f"{entry['dept_id']}  {entry['cgpa']:.2f}  {entry['academic_standing']}")
+        return
+
+    if args.rank or args.top:
+        if args.entry_year is not None and not args.dept_id:
+            print("Error: --entry_year needs --dept_id (cohorts are per department).")
+            return
+        ranking = ClassRanking(generator.database, generator.grade_calculator)
+        if args.rank:
+            if args.rank not in ranking.students:
+                print(f"Error: No stored GPA summary for student {args.rank}.")
+                return
+            for scope in ClassRanking.SCOPES:
+                entry = ranking.rank(args.rank, scope)
+                group = entry['group']
+                label = 'all' if group is None else ' '.join(map(str, group)) if isinstance(group, tuple) else str(group)
+                print(f"  {scope:<10} {label:<16} "
+                      f"rank {entry['rank']:>5} of {entry['group_size']:<6} percentile {entry['percentile']:5.1f}  (CGPA {entry['cgpa']:.2f})")
+        if args.top:
+            if args.dept_id and args.entry_year:
+                scope, group = 'cohort', (args.dept_id, args.entry_year)
+            elif args.dept_id:
+                scope, group = 'department', args.dept_id
+            else:
+                scope, group = 'campus', None
+            for position, (student_id, cgpa) in enumerate(ranking.top(args.top, scope, group), start=1):
+                print(f"  {position:>4}. {student_id}  {cgpa:.2f}  {generator.grade_calculator.get_academic_standing(cgpa)}")
+        return
+    if args.degree_audit:
+        audited = eligible = 0
+        for student_id, audit in generator.degree_auditor.audit_students(dept_id=args.dept_id):
+            audited += 1
+            eligible += audit.eligible_for_graduation
+            print(f"  {student_id}  {audit.passed_required_courses:>3}/{audit.required_courses:<3} required passed, "
+                  f"{audit.remaining_credits:5.1f} credits / {audit.remaining_ects:5.1f} ECTS remaining"
+                  f"{'  ELIGIBLE' if audit.eligible_for_graduation else ''}")
+        print(f"Degree audit: {audited} student(s), {eligible} eligible for graduation.")
+        return
+    if args.statistics:
+        print_statistics(generator.get_transcript_statistics())
+        return
+    if args.check_statistics:
+        fast, full = generator.get_transcript_statistics(), generator.get_transcript_statistics_full()
+        differences = [key for key in full if fast.get(key) != full[key]]
+        for key in differences:
+            print(f"  {key}: fast={fast.get(key)!r} full={full[key]!r}")
+        print(f"Statistics check: {len(differences)} difference(s).")
+        return
+    if args.what_if:
+        print_what_if(generator, args.what_if, args.grade, args.target_cgpa)
+        return
+
+    transcripts_data_to_process: Iterable[TranscriptData] = []
+    watermark_scope = None
+    job_student_ids: Optional[List[str]] = None  # With --jobs: the workers generate these students themselves
+    if args.jobs > 1 and args.student_id:
+        print("Note: --jobs is ignored for a single --student_id.")
 
-    if args.student_id:
+    if (args.incremental or args.changed_since) and not args.student_id:
+        watermark_scope = f"dept:{args.dept_id}" if args.dept_id else "all"
+        # Read the watermark before generating so changes made during this run are picked up next time
+        run_change_seq = generator.database.get_change_watermark()
+        since_seq = load_watermark(args.output_dir, watermark_scope) if args.incremental else None
+        if args.incremental and since_seq is None and not args.changed_since:
+            print(f"No previous run recorded in '{args.output_dir}'; regenerating every transcript in scope.")
+            if args.jobs > 1:
+                job_student_ids = (generator.database.get_students_by_department(args.dept_id) if args.dept_id
+                                   else generator.database.get_all_students())
+            else:
+                data_list = (generator.generate_department_transcripts(args.dept_id) if args.dept_id
+                             else generator.generate_all_transcripts())
+        else:
+            print(f"Selecting students changed since "
+                  f"{'change #' + str(since_seq) if since_seq is not None else args.changed_since}")
+            if args.jobs > 1:
+                job_student_ids = generator.database.get_changed_students(since_seq=since_seq, since_time=args.changed_since,
+                                                                          dept_id=args.dept_id)
+            else:
+                data_list = generator.generate_changed_transcripts(since_seq=since_seq, since_time=args.changed_since,
+                                                                   dept_id=args.dept_id)
+        if job_student_ids is None:
+            transcripts_data_to_process.extend(data_list)
+        if not transcripts_data_to_process and not job_student_ids:
+            if generator.build_failures:
+                print(f"{len(generator.build_failures)} transcript(s) could not be generated; "
+                      f"they will be retried on the next run.")
+                return
+            if args.incremental:
+                save_watermark(args.output_dir, watermark_scope, run_change_seq)
+            print("All transcripts are up to date.")
+            return
+    elif args.student_id:
         print(f"Attempting to generate transcript data for student: {args.student_id}")
         data = generator.generate_student_transcript(args.student_id)
         if data:
             transcripts_data_to_process.append(data)
         # generate_student_transcript prints errors/warnings if student/enrollments not found
     elif args.dept_id:
+        # Department and campus runs stream: each transcript is formatted as soon as it is built
         print(f"Attempting to generate transcript data for department: {args.dept_id}")
-        department_data_list = generator.generate_department_transcripts(args.dept_id)
-        transcripts_data_to_process.extend(department_data_list)
+        if args.jobs > 1:
+            job_student_ids = generator.database.get_students_by_department(args.dept_id)
+        else:
+            expected_count = len(generator.database.get_students_by_department(args.dept_id))
+            transcripts_data_to_process = generator.iter_department_transcripts(args.dept_id)
     elif args.all_students:
         print("Attempting to generate transcript data for all students...")
-        all_students_data_list = generator.generate_all_transcripts()
-        transcripts_data_to_process.extend(all_students_data_list)
+        if args.jobs > 1:
+            job_student_ids = generator.database.get_all_students()
+        else:
+            expected_count = len(generator.database.get_all_students())
+            transcripts_data_to_process = generator.iter_all_transcripts()
     else:
         parser.print_help()
         return
 
-    if not transcripts_data_to_process:
+    if job_student_ids is not None:
+        expected_count = len(job_student_ids)
+    elif isinstance(transcripts_data_to_process, list):
+        expected_count = len(transcripts_data_to_process)
+    if not expected_count:
         print("No students found matching the criteria, or no data to generate transcripts for.")
         return
 
     generated_files_count = 0
-    print(f"\nFound {len(transcripts_data_to_process)} transcript(s) to format.")
+    formatting_errors = 0
+    format_seconds = 0.0
+    print(f"\nFound {expected_count} transcript(s) to format.")
 
+    if job_student_ids is not None:
+        generated_files_count, formatting_errors, format_seconds = run_parallel_jobs(
+            job_student_ids, args.jobs, args.db_path, args.read_only, args.output_dir, args.format,
+            args.cache_path, cache_max_bytes)
     for data_item in transcripts_data_to_process:
         if not isinstance(data_item, TranscriptData):
             print(f"Warning: Expected TranscriptData object, got {type(data_item)}. Skipping.")
             continue
+        format_started = time.perf_counter()
+        files, errors = format_transcript(formatter, data_item, args.format)
+        generated_files_count += files
+        formatting_errors += errors
+        format_seconds += time.perf_counter() - format_started
 
-        student_id_for_file = data_item.student_id
-        print(f"Processing formatting for student: {student_id_for_file}")
-
-        if args.format == 'html' or args.format == 'both':
-            try:
-                filepath = formatter.generate_html_transcript(data_item)
-                print(f"  Generated HTML transcript: {filepath}")
-                generated_files_count += 1
-            except Exception as e:
-                print(f"  Error generating HTML for {student_id_for_file}: {e}")
-        
-        if args.format == 'pdf' or args.format == 'both':
-            try:
-                filepath = formatter.generate_pdf_transcript(data_item)
-                if filepath: # generate_pdf_transcript returns None on error
-                    print(f"  Generated PDF transcript: {filepath}")
-                    generated_files_count += 1
-                # else: generate_pdf_transcript prints its own errors
-            except Exception as e: # Should ideally be caught within generate_pdf_transcript
-                print(f"  Unexpected error during PDF formatting for {student_id_for_file}: {e}")
+    # Students skipped because their transcript data failed to build count as errors too
+    if generator.build_failures:
+        failed_ids = [student_id for student_id, _ in generator.build_failures]
+        print(f"\n{len(failed_ids)} transcript(s) could not be generated: "
+              f"{', '.join(failed_ids[:10])}{' ...' if len(failed_ids) > 10 else ''}")
+        formatting_errors += len(generator.build_failures)
+    # Only advance the watermark when every transcript was written, so failures are retried next run
+    if args.incremental and watermark_scope and formatting_errors == 0:
+        save_watermark(args.output_dir, watermark_scope, run_change_seq)
 
     if generated_files_count > 0:
         print(f"\nSuccessfully generated {generated_files_count} transcript file(s) in the '{os.path.abspath(args.output_dir)}' directory.")
     else:
         print("\nNo transcript files were generated in this run (check for previous errors or warnings).")
 
+    if args.profile and job_student_ids is not None:
+        # Worker queries are not instrumented; rendering time is summed over the workers
+        print(f"\nRun time {time.perf_counter() - run_started:.3f}s with {args.jobs} workers: "
+              f"rendering {format_seconds:.3f}s of worker time")
+    elif args.profile:
+        total_seconds = time.perf_counter() - run_started
+        database_seconds = generator.database.query_stats.database_seconds
+        print(f"\n{generator.database.query_stats.summary()}")
+        print(f"\nRun time {total_seconds:.3f}s: database {database_seconds:.3f}s, "
+              f"rendering {format_seconds:.3f}s, grade calculation and other {total_seconds - database_seconds - format_seconds:.3f}s")
+        if generator.cache is not None:
+            print(f"Transcript cache: {generator.cache.hits} hit(s), {generator.cache.misses} miss(es)")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
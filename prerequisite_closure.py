@@ -0,0 +1,297 @@
+# prerequisite_closure.py
+"""
+Transitive prerequisite closure per curriculum and batch eligibility queries.
+
+For each curriculum the prerequisite edges are topologically sorted and turned into two
+boolean matrices over the curriculum's courses: direct[c, p] (p is a direct prerequisite
+of c) and closure[c, p] (p is needed for c directly or indirectly). Eligibility of every
+student for every candidate course is then one boolean matrix product per curriculum.
+
+Courses on a prerequisite cycle, and every course depending on one, are marked blocked
+and are never eligible; the rest of the curriculum is unaffected. check_acyclic (and
+--check_cycles) raises PrerequisiteCycleError naming the courses of a cycle.
+
+Eligibility follows RegistrationSession.enroll: a course is open to a student who has
+not passed it and has passed (in any attempt) each of its direct prerequisites.
+
+Requires NumPy:  pip install numpy
+
+    python prerequisite_closure.py --db_path transcript_system.db --dept_id SNG --eligible 3550242
+    python prerequisite_closure.py --db_path transcript_system.db --student_id 2600001 --blocking 3550242
+"""
+
+import argparse
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from database import PrerequisiteGraph, TranscriptDatabase
+from grade_calculator import GradeCalculator
+
+
+class PrerequisiteCycleError(ValueError):
+    """The prerequisites of a curriculum contain a cycle (cycle lists the courses, first == last)."""
+
+    def __init__(self, curriculum_id: int, cycle: List[str]):
+        self.curriculum_id = curriculum_id
+        self.cycle = cycle
+        super().__init__(f"Prerequisite cycle in curriculum {curriculum_id}: {' -> '.join(cycle)}")
+
+
+class PrerequisiteClosure:
+    """
+    Direct and transitive prerequisites of one curriculum as boolean matrices. Courses on or
+    behind a prerequisite cycle are listed last in order and flagged in blocked.
+    """
+
+    def __init__(self, graph: PrerequisiteGraph, course_codes: Iterable[str] = ()):
+        nodes = set(course_codes) | set(graph.prerequisites) | set(graph.dependents)
+        self.curriculum_id = graph.curriculum_id
+        acyclic, blocked = self._topological_order(graph, sorted(nodes))
+        self.cycle = self._find_cycle(graph, blocked) if blocked else None
+        self.order = acyclic + blocked  # Prerequisites before the courses needing them, then blocked courses
+        self.index = {code: i for i, code in enumerate(self.order)}
+        n = len(self.order)
+        self.blocked = np.zeros(n, dtype=bool)
+        self.blocked[len(acyclic):] = True
+        self.direct = np.zeros((n, n), dtype=bool)
+        for course_code, prerequisites in graph.prerequisites.items():
+            for prereq_code in prerequisites:
+                self.direct[self.index[course_code], self.index[prereq_code]] = True
+        # In topological order every prerequisite row is final before it is needed
+        self.closure = self.direct.copy()
+        for i in range(len(acyclic)):
+            direct_prereqs = self.direct[i]
+            if direct_prereqs.any():
+                self.closure[i] |= self.closure[direct_prereqs].any(axis=0)
+        # Blocked rows have no such order: extend them until nothing changes
+        if blocked:
+            rows = slice(len(acyclic), n)
+            while True:
+                grown = self.closure[rows] | (self.closure[rows].astype(np.int32) @ self.closure.astype(np.int32) > 0)
+                if (grown == self.closure[rows]).all():
+                    break
+                self.closure[rows] = grown
+
+    @staticmethod
+    def _topological_order(graph: PrerequisiteGraph, nodes: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Kahn's algorithm (ties by course code). Returns (ordered courses, courses left over),
+        the latter being the courses on a cycle or depending on one, by course code.
+        """
+        remaining = {node: len(graph.prerequisites.get(node, ())) for node in nodes}
+        ready = [node for node in nodes if remaining[node] == 0]
+        order = []
+        while ready:
+            ready.sort(reverse=True)
+            node = ready.pop()
+            order.append(node)
+            for dependent in graph.dependents.get(node, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return order, [node for node in nodes if remaining[node] > 0]
+
+    @staticmethod
+    def _find_cycle(graph: PrerequisiteGraph, candidates: List[str]) -> List[str]:
+        # Every course left over by Kahn's algorithm has an unprocessed prerequisite that is
+        # also left over, so following those edges must revisit a course
+        left_over = set(candidates)
+        path, position = [], {}
+        node = candidates[0]
+        while node not in position:
+            position[node] = len(path)
+            path.append(node)
+            node = next(p for p in graph.prerequisites[node] if p in left_over)
+        return path[position[node]:] + [node]
+
+    def check_acyclic(self):
+        """Raises PrerequisiteCycleError if the curriculum's prerequisites contain a cycle."""
+        if self.cycle:
+            raise PrerequisiteCycleError(self.curriculum_id, self.cycle)
+
+    def is_blocked(self, course_code: str) -> bool:
+        """True for courses that can never be taken because of a prerequisite cycle."""
+        i = self.index.get(course_code)
+        return i is not None and bool(self.blocked[i])
+
+    def codes(self, row: np.ndarray) -> List[str]:
+        """Course codes of the True entries of a row, in topological order."""
+        return [self.order[i] for i in np.flatnonzero(row)]
+
+    def all_prerequisites(self, course_code: str) -> List[str]:
+        """Direct and indirect prerequisites of a course, prerequisites first."""
+        i = self.index.get(course_code)
+        return self.codes(self.closure[i]) if i is not None else []
+
+    def passed_vector(self, passed_courses: Iterable[str]) -> np.ndarray:
+        passed = np.zeros(len(self.order), dtype=bool)
+        for course_code in passed_courses:
+            i = self.index.get(course_code)
+            if i is not None:
+                passed[i] = True
+        return passed
+
+    def blocking(self, course_code: str, passed_courses: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        What keeps a student from course_code: (unpassed direct prerequisites, every unpassed
+        prerequisite including indirect ones), both in topological order.
+        """
+        i = self.index.get(course_code)
+        if i is None:
+            return [], []
+        not_passed = ~self.passed_vector(passed_courses)
+        return self.codes(self.direct[i] & not_passed), self.codes(self.closure[i] & not_passed)
+
+    def eligibility(self, passed: np.ndarray, candidate_courses: List[str]) -> np.ndarray:
+        """
+        passed: (students, courses) bool matrix over self.order. Returns a (students, candidates)
+        bool matrix: not passed yet, not blocked by a cycle and every direct prerequisite passed.
+        """
+        eligible = np.ones((passed.shape[0], len(candidate_courses)), dtype=bool)
+        known = [j for j, code in enumerate(candidate_courses) if code in self.index]
+        if known:
+            columns = [self.index[candidate_courses[j]] for j in known]
+            # (students x courses) @ (courses x candidates): True where some direct prerequisite is unpassed
+            unmet = (~passed).astype(np.int32) @ self.direct[columns].T.astype(np.int32) > 0
+            eligible[:, known] = ~unmet & ~passed[:, columns] & ~self.blocked[columns]
+        return eligible
+
+
+class EligibilityEngine:
+    """
+    Batch prerequisite queries over many students. Closures are built once per curriculum
+    from the cached PrerequisiteGraph and curriculum courses (see invalidate).
+    """
+
+    def __init__(self, database: TranscriptDatabase, grade_calculator: Optional[GradeCalculator] = None):
+        self.database = database
+        self.grade_calculator = grade_calculator or GradeCalculator()
+        self._closures: Dict[int, PrerequisiteClosure] = {}
+        self._closures_lock = threading.Lock()
+
+    def get_closure(self, curriculum_id: int) -> PrerequisiteClosure:
+        """The closure of a curriculum (built even if its prerequisites have a cycle, see check_acyclic)."""
+        closure = self._closures.get(curriculum_id)
+        if closure is None:
+            courses = [course['course_code'] for course in self.database.get_curriculum_courses(curriculum_id)]
+            closure = PrerequisiteClosure(self.database.get_prerequisite_graph(curriculum_id), courses)
+            with self._closures_lock:
+                self._closures[curriculum_id] = closure
+        return closure
+
+    def invalidate(self, curriculum_id: Optional[int] = None):
+        """Drops the cached closure (and prerequisite graph) of one curriculum, or of all when None."""
+        self.database.invalidate_prerequisite_graph(curriculum_id)
+        with self._closures_lock:
+            if curriculum_id is None:
+                self._closures.clear()
+            else:
+                self._closures.pop(curriculum_id, None)
+
+    def load_passed_courses(self, dept_id: Optional[str] = None, student_ids: Optional[List[str]] = None
+                            ) -> Dict[int, Dict[str, Set[str]]]:
+        """curriculum_id -> student_id -> courses passed in any attempt, read in one streaming pass."""
+        is_passing = self.grade_calculator.is_passing_grade
+        by_curriculum: Dict[int, Dict[str, Set[str]]] = {}
+        for student_id, student_info, enrollments in self.database.iter_student_records(dept_id=dept_id,
+                                                                                        student_ids=student_ids):
+            by_curriculum.setdefault(student_info['curriculum_id'], {})[student_id] = {
+                e['course_code'] for e in enrollments if is_passing(e['grade'])}
+        return by_curriculum
+
+    def eligible_students(self, candidate_courses: List[str], dept_id: Optional[str] = None,
+                          student_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """
+        candidate course -> students (in ID order) who could register for it next term,
+        for a department, a list of students, or the whole campus. Courses blocked by a
+        prerequisite cycle have no eligible students.
+        """
+        eligible: Dict[str, List[str]] = {course_code: [] for course_code in candidate_courses}
+        for curriculum_id, passed_courses in self.load_passed_courses(dept_id, student_ids).items():
+            closure = self.get_closure(curriculum_id)
+            students = list(passed_courses)
+            passed = np.zeros((len(students), len(closure.order)), dtype=bool)
+            for row, student_id in enumerate(students):
+                passed[row] = closure.passed_vector(passed_courses[student_id])
+            matrix = closure.eligibility(passed, candidate_courses)
+            for j, course_code in enumerate(candidate_courses):
+                if course_code not in closure.index:
+                    # Not in this curriculum and no prerequisites: open to anyone who hasn't passed it
+                    column = [course_code not in passed_courses[student_id] for student_id in students]
+                else:
+                    column = matrix[:, j]
+                eligible[course_code].extend(student_id for student_id, ok in zip(students, column) if ok)
+        for course_code in eligible:
+            eligible[course_code].sort()
+        return eligible
+
+    def blocking_prerequisites(self, student_id: str, course_code: str) -> Optional[Tuple[List[str], List[str]]]:
+        """(unpassed direct prerequisites, all unpassed prerequisites) of course_code, or None if the student is unknown."""
+        student_info = self.database.get_student_info(student_id)
+        if not student_info:
+            return None
+        closure = self.get_closure(student_info['curriculum_id'])
+        return closure.blocking(course_code, self.database.get_student_passed_courses(student_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerequisite closure and batch eligibility")
+    parser.add_argument("--db_path", default="transcript_system.db", help="Path to the database file")
+    parser.add_argument("--dept_id", help="Limit --eligible to one department (default: whole campus)")
+    parser.add_argument("--eligible", nargs="+", metavar="COURSE", help="List students eligible for these courses next term")
+    parser.add_argument("--student_id", help="Student for --blocking")
+    parser.add_argument("--blocking", metavar="COURSE", help="With --student_id: show unpassed direct and indirect prerequisites")
+    parser.add_argument("--check_cycles", action="store_true", help="Build the closure of every curriculum and report cycles")
+    args = parser.parse_args()
+
+    database = TranscriptDatabase(args.db_path)
+    engine = EligibilityEngine(database)
+    try:
+        if args.check_cycles:
+            with database.connection() as conn:
+                curriculum_ids = [row[0] for row in conn.execute(
+                    "SELECT curriculum_id FROM curriculum_versions ORDER BY curriculum_id")]
+            cycles = 0
+            for curriculum_id in curriculum_ids:
+                closure = engine.get_closure(curriculum_id)
+                try:
+                    closure.check_acyclic()
+                    print(f"  curriculum {curriculum_id}: {len(closure.order)} courses, "
+                          f"{int(closure.direct.sum())} direct / {int(closure.closure.sum())} transitive prerequisite pairs")
+                except PrerequisiteCycleError as e:
+                    cycles += 1
+                    print(f"  {e} ({int(closure.blocked.sum())} course(s) blocked: "
+                          f"{', '.join(closure.codes(closure.blocked))})")
+            print(f"{len(curriculum_ids)} curricula checked, {cycles} with cycles.")
+        if args.eligible:
+            start = time.perf_counter()
+            eligible = engine.eligible_students(args.eligible, dept_id=args.dept_id)
+            elapsed = time.perf_counter() - start
+            for course_code, student_ids in eligible.items():
+                print(f"{course_code}: {len(student_ids)} eligible student(s)")
+                for i in range(0, len(student_ids), 8):
+                    print("    " + " ".join(student_ids[i:i + 8]))
+            print(f"Eligibility computed in {elapsed * 1000:.1f}ms.")
+        if args.blocking:
+            if not args.student_id:
+                print("Error: --blocking needs --student_id.")
+                return
+            result = engine.blocking_prerequisites(args.student_id, args.blocking)
+            if result is None:
+                print(f"Error: Student {args.student_id} not found.")
+                return
+            direct, transitive = result
+            if not transitive:
+                print(f"{args.student_id} has every prerequisite of {args.blocking}.")
+            else:
+                print(f"Unpassed direct prerequisites of {args.blocking}: {', '.join(direct) or 'none'}")
+                print(f"All unpassed prerequisites (including indirect): {', '.join(transitive)}")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
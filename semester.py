@@ -0,0 +1,98 @@
+# semester.py
+"""
+Interned semester values ("2021-Fall") with a precomputed integer ordinal.
+
+Every distinct semester string is parsed once; Semester.parse returns the same object
+for the same text, so semesters can be compared, sorted and hashed without
+re-parsing. The ordinal is year * 10 + term (Spring 1, Summer 2, Fall 3), e.g.
+"2021-Fall" -> 20213, and is also stored in student_enrollments.semester_ordinal.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+class Semester:
+    """A parsed semester label. Create with Semester.parse(text), never directly."""
+    TERM_ORDER = {'Spring': 1, 'Summer': 2, 'Fall': 3}
+    UNKNOWN_ORDINAL = 0  # Labels that don't parse sort before every real semester
+
+    __slots__ = ('text', 'year', 'term', 'ordinal')
+    _interned: Dict[str, 'Semester'] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, text: str, year: Optional[int], term: Optional[str], ordinal: int):
+        self.text = text
+        self.year = year
+        self.term = term
+        self.ordinal = ordinal
+
+    @classmethod
+    def parse(cls, text: str) -> 'Semester':
+        """Returns the interned Semester for text (parsing it on first use)."""
+        semester = cls._interned.get(text)
+        if semester is not None:
+            return semester
+        year, term, ordinal = None, None, cls.UNKNOWN_ORDINAL
+        try:
+            year_str, term_str = text.split('-')
+            if term_str in cls.TERM_ORDER:
+                year, term = int(year_str), term_str
+                ordinal = year * 10 + cls.TERM_ORDER[term]
+        except (ValueError, AttributeError):
+            pass
+        with cls._lock:
+            return cls._interned.setdefault(text, cls(text, year, term, ordinal))
+
+    @classmethod
+    def from_ordinal(cls, ordinal: int) -> 'Semester':
+        """Inverse of .ordinal for real semesters (e.g. 20213 -> "2021-Fall")."""
+        year, term_number = divmod(ordinal, 10)
+        for term, number in cls.TERM_ORDER.items():
+            if number == term_number:
+                return cls.parse(f"{year}-{term}")
+        raise ValueError(f"Not a semester ordinal: {ordinal}")
+
+    def __lt__(self, other: 'Semester') -> bool:
+        return (self.ordinal, self.text) < (other.ordinal, other.text)
+
+    def __le__(self, other: 'Semester') -> bool:
+        return (self.ordinal, self.text) <= (other.ordinal, other.text)
+
+    def __gt__(self, other: 'Semester') -> bool:
+        return (self.ordinal, self.text) > (other.ordinal, other.text)
+
+    def __ge__(self, other: 'Semester') -> bool:
+        return (self.ordinal, self.text) >= (other.ordinal, other.text)
+
+    def __hash__(self) -> int:
+        return hash(self.text)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Semester) and self.text == other.text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Semester({self.text!r})"
+
+
+def semester_ordinal(text: str) -> int:
+    """Ordinal of a semester label (0 if it doesn't parse)."""
+    return Semester.parse(text).ordinal
+
+
+def sort_semester_labels(labels: Iterable[str]) -> List[str]:
+    """Semester labels in chronological order (labels that don't parse first, in their given order)."""
+    return sorted(labels, key=semester_ordinal)
+
+
+def next_regular_semester(text: str) -> str:
+    """The Fall or Spring term after a semester label (Fall -> next year's Spring, Spring/Summer -> Fall)."""
+    semester = Semester.parse(text)
+    if semester.term is None:
+        raise ValueError(f"Not a semester label: {text!r}")
+    if semester.term == 'Fall':
+        return f"{semester.year + 1}-Spring"
+    return f"{semester.year}-Fall"
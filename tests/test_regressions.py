@@ -0,0 +1,141 @@
+# tests/test_regressions.py
+"""
+Regression tests for edge cases found in review: an empty scope in the batch GPA engine,
+simulating more semesters than TranscriptDatabase.SAMPLE_SEMESTERS lists, and a
+transcript that fails to build during an incremental run.
+
+    python -m pytest tests        (or: python -m unittest discover -s tests -t .)
+
+The NumPy tests are skipped when NumPy isn't installed.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import TranscriptDatabase
+
+try:
+    import numpy  # noqa: F401
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+_sample_dir = None
+
+
+def setUpModule():
+    # Populating the sample data takes a few seconds, so it's done once and copied per test
+    global _sample_dir
+    _sample_dir = tempfile.mkdtemp(prefix="transcript_tests_")
+    with contextlib.redirect_stdout(io.StringIO()):
+        database = TranscriptDatabase(os.path.join(_sample_dir, "sample.db"))
+        database.populate_sample_data()
+        database.close()
+
+
+def tearDownModule():
+    shutil.rmtree(_sample_dir, ignore_errors=True)
+
+
+class SampleDatabaseTestCase(unittest.TestCase):
+    """Each test gets its own copy of the sample database."""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix="transcript_test_")
+        self.db_path = os.path.join(self.work_dir, "transcript_system.db")
+        shutil.copyfile(os.path.join(_sample_dir, "sample.db"), self.db_path)
+        self.database = TranscriptDatabase(self.db_path)
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+@unittest.skipUnless(HAS_NUMPY, "needs NumPy")
+class BatchGPAEmptyScopeTest(SampleDatabaseTestCase):
+
+    def test_department_without_students(self):
+        from batch_gpa import BatchGPAEngine, load_enrollment_columns
+        result = BatchGPAEngine().compute(load_enrollment_columns(self.database, dept_id="NONE"))
+        self.assertEqual(result.student_ids, [])
+        self.assertEqual(result.semesters, [])
+        self.assertEqual(result.cgpa.shape, (0,))
+
+    def test_students_without_enrollments(self):
+        from batch_gpa import BatchGPAEngine, load_enrollment_columns
+        with self.database.connection() as conn:
+            curriculum_id = conn.execute("SELECT curriculum_id FROM curriculum_versions WHERE dept_id = 'SNG'").fetchone()[0]
+            conn.execute("INSERT INTO students (student_id, first_name, last_name, dept_id, curriculum_id, enrollment_year) "
+                         "VALUES ('2999999', 'No', 'Enrollments', 'SNG', ?, 2025)", (curriculum_id,))
+            conn.commit()
+        result = BatchGPAEngine().compute(load_enrollment_columns(self.database, student_ids=["2999999"]))
+        self.assertEqual(result.student_ids, ["2999999"])
+        self.assertEqual(result.cgpa.tolist(), [0.0])
+        self.assertEqual(result.has_semester.shape, (1, 0))
+
+
+@unittest.skipUnless(HAS_NUMPY, "needs NumPy")
+class CohortSimulatorSemestersTest(SampleDatabaseTestCase):
+
+    def test_more_semesters_than_sample_labels(self):
+        from cohort_simulator import CohortSimulator
+        num_semesters = len(TranscriptDatabase.SAMPLE_SEMESTERS) + 2
+        simulator = CohortSimulator(self.database, 1, seed=7)
+        result = simulator.simulate(20, num_semesters)
+        self.assertEqual(result.semesters[:len(TranscriptDatabase.SAMPLE_SEMESTERS)], TranscriptDatabase.SAMPLE_SEMESTERS)
+        self.assertEqual(result.semesters[-2:], ["2025-Fall", "2026-Spring"])
+        self.assertEqual(len(simulator.statistics(result)['seats_per_semester']), num_semesters)
+
+        student_ids = simulator.write_to_database(result)
+        with self.database.connection() as conn:
+            written = {row[0] for row in conn.execute(
+                f"SELECT DISTINCT semester FROM student_enrollments WHERE student_id IN ({', '.join('?' * len(student_ids))})",
+                student_ids)}
+        self.assertTrue(written <= set(result.semesters))
+
+    def test_run_many_in_batches(self):
+        from cohort_simulator import CohortSimulator
+        simulator = CohortSimulator(self.database, 1, seed=7)
+        simulator.MAX_BATCH_STUDENTS = 25  # 2 cohorts of 10 per pass
+        summary = simulator.run_many(10, 5, num_semesters=4)
+        self.assertEqual(summary['runs'], 5)
+        self.assertLessEqual(summary['average_cgpa_min'], summary['average_cgpa_max'])
+
+
+class IncrementalBuildFailureTest(SampleDatabaseTestCase):
+
+    def run_incremental(self):
+        import main_cli
+        output_dir = os.path.join(self.work_dir, "transcripts")
+        argv = ["main_cli.py", "--db_path", self.db_path, "--dept_id", "SNG", "--incremental",
+                "--format", "html", "--output_dir", output_dir]
+        with mock.patch.object(sys, "argv", argv), contextlib.redirect_stdout(io.StringIO()):
+            main_cli.main()
+        return os.path.exists(os.path.join(output_dir, main_cli.WATERMARK_FILE))
+
+    def test_failed_build_keeps_watermark(self):
+        from transcript_generator import TranscriptGenerator
+        failing_id = self.database.get_students_by_department("SNG")[0]
+        compute = TranscriptGenerator._compute_transcript_data
+
+        def failing_compute(generator, student_id, *args):
+            if student_id == failing_id:
+                raise ValueError("simulated build failure")
+            return compute(generator, student_id, *args)
+
+        with mock.patch.object(TranscriptGenerator, "_compute_transcript_data", failing_compute):
+            self.assertFalse(self.run_incremental())
+        # The next clean run retries everything and advances the watermark
+        self.assertTrue(self.run_incremental())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+# transcript_cache.py
+"""
+Persistent, content-addressed cache of TranscriptData.
+
+An entry is keyed by a SHA-256 of everything a transcript is computed from: the student
+header, the enrollment rows (in query order), the curriculum's courses and the grade rules
+(the grade tables plus the source of the classes that apply them). Any real change gives a
+new key, so entries never have to be invalidated; stale ones simply age out. Entries live
+in a SQLite side file next to (not inside) the transcript database, so a --read_only run
+can still use it, and the least recently used ones are evicted when the file grows past
+max_bytes.
+
+Entries are pickles, and unpickling can run arbitrary code: keep the cache file in a
+directory only the transcript service can write to, and never point --cache_path at a
+file from elsewhere.
+"""
+
+import dataclasses
+import hashlib
+import inspect
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from database import TranscriptDatabase
+from degree_audit import CurriculumRequirements, DegreeAudit, DegreeAuditor
+from grade_calculator import CourseGrade, GradeCalculator, RunningCGPA
+
+
+class TranscriptCache:
+    """TranscriptData pickles in a SQLite file, keyed by a hash of their inputs."""
+    # Bump when TranscriptData or the way it is built changes outside the hashed classes
+    FORMAT_VERSION = 1
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    # Eviction trims the cache to this fraction of max_bytes so it doesn't run on every put
+    EVICT_TO = 0.9
+    # Other processes write to the same file, so the real total is re-read after this
+    # fraction of max_bytes has been written by this process
+    SYNC_EVERY = 0.05
+    # Seconds between last_used updates of an entry; LRU order only needs to be roughly right
+    TOUCH_INTERVAL = 3600
+
+    def __init__(self, cache_path: str = "transcript_cache.db", max_bytes: int = DEFAULT_MAX_BYTES,
+                 busy_timeout_ms: int = 30000):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._curriculum_digests: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.rules_digest = self._rules_digest()
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcript_cache (
+                cache_key TEXT PRIMARY KEY,
+                student_id TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_transcript_cache_last_used ON transcript_cache(last_used)")
+        conn.commit()
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()[0]
+        self._written_since_sync = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; --jobs workers each open their own."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.cache_path, timeout=self.busy_timeout_ms / 1000)
+            # NORMAL only fsyncs at checkpoints in WAL mode; a crash may lose the last
+            # entries (harmless for a cache) but can't corrupt the file
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _rules_digest(self) -> str:
+        """Hash of the grade tables and the code that turns enrollments into a transcript."""
+        rules = hashlib.sha256()
+        rules.update(str(self.FORMAT_VERSION).encode())
+        rules.update(json.dumps([sorted(GradeCalculator.GRADE_SCALE.items(), key=str),
+                                 sorted(GradeCalculator.PASSING_GRADES), sorted(GradeCalculator.NON_GPA_GRADES),
+                                 DegreeAuditor.GRADUATION_MIN_CGPA]).encode())
+        for cls in (GradeCalculator, RunningCGPA, CurriculumRequirements, DegreeAuditor):
+            rules.update(inspect.getsource(cls).encode())
+        # CourseGrade pickles as positional fields, so a changed field list must change every key
+        for cls in (CourseGrade, DegreeAudit):
+            rules.update(repr([field.name for field in dataclasses.fields(cls)]).encode())
+        return rules.hexdigest()
+
+    def curriculum_digest(self, database: TranscriptDatabase, curriculum_id: int) -> str:
+        """Hash of a curriculum's courses (what the degree audit compares against), cached per curriculum."""
+        digest = self._curriculum_digests.get(curriculum_id)
+        if digest is None:
+            courses = database.get_curriculum_courses(curriculum_id)
+            digest = hashlib.sha256(json.dumps(courses, sort_keys=True, default=str).encode()).hexdigest()
+            with self._lock:
+                self._curriculum_digests[curriculum_id] = digest
+        return digest
+
+    def invalidate_curriculum(self, curriculum_id: Optional[int] = None):
+        """Forgets the course digest of one curriculum (or all) after its courses were edited."""
+        with self._lock:
+            if curriculum_id is None:
+                self._curriculum_digests.clear()
+            else:
+                self._curriculum_digests.pop(curriculum_id, None)
+
+    def make_key(self, database: TranscriptDatabase, student_info: Dict[str, Any],
+                 enrollments: List[Dict[str, Any]]) -> str:
+        key = hashlib.sha256(self.rules_digest.encode())
+        key.update(self.curriculum_digest(database, student_info['curriculum_id']).encode())
+        # The loaders build rows with a fixed column order, so the repr of the values is canonical
+        # (and several times faster than json)
+        key.update(repr((tuple(student_info.values()), [tuple(row.values()) for row in enrollments])).encode())
+        return key.hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Any]:
+        """The cached TranscriptData for cache_key, or None (also on any cache error)."""
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT data, last_used FROM transcript_cache WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] > self.TOUCH_INTERVAL:
+                conn.execute("UPDATE transcript_cache SET last_used = ? WHERE cache_key = ?", (now, cache_key))
+                conn.commit()
+            self.hits += 1
+            return pickle.loads(row[0])
+        except Exception as e:
+            # Anything unreadable (a damaged file, a pickle from incompatible code) is just a miss
+            print(f"Transcript cache read error: {e}")
+            self.misses += 1
+            return None
+
+    def put(self, cache_key: str, student_id: str, transcript_data: Any):
+        data = pickle.dumps(transcript_data, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO transcript_cache (cache_key, student_id, data, size, last_used) "
+                         "VALUES (?, ?, ?, ?, ?)", (cache_key, student_id, data, len(data), time.time()))
+            conn.commit()
+            with self._lock:
+                self._total_bytes += len(data)
+                self._written_since_sync += len(data)
+                check = (self._total_bytes > self.max_bytes
+                         or self._written_since_sync > self.max_bytes * self.SYNC_EVERY)
+            if check:
+                self.evict()
+        except sqlite3.Error as e:
+            print(f"Transcript cache write error: {e}")
+
+    def evict(self):
+        """Drops least recently used entries until the cache is below EVICT_TO * max_bytes."""
+        conn = self._connection()
+        # Take the write lock first so concurrent workers don't each evict the same excess,
+        # and start from the real total since other processes add entries too
+        conn.execute("BEGIN IMMEDIATE")
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()[0]
+        target = int(self.max_bytes * self.EVICT_TO)
+        if total > self.max_bytes:
+            excess = total - target
+            doomed, freed = [], 0
+            for cache_key, size in conn.execute("SELECT cache_key, size FROM transcript_cache ORDER BY last_used"):
+                if freed >= excess:
+                    break
+                doomed.append((cache_key,))
+                freed += size
+            conn.executemany("DELETE FROM transcript_cache WHERE cache_key = ?", doomed)
+            total -= freed
+        conn.commit()
+        with self._lock:
+            self._total_bytes = total
+            self._written_since_sync = 0
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM transcript_cache")
+        conn.commit()
+        with self._lock:
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connection()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcript_cache").fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
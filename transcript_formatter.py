@@ -7,6 +7,7 @@ import os
 from typing import List, Optional, Dict, Any # Added Dict for consistency and Any for type annotations
 from transcript_generator import TranscriptData # Corrected import, only TranscriptData is used
 from datetime import datetime
+from semester import sort_semester_labels
 # import webbrowser # webbrowser was not used
 
 # ReportLab imports
@@ -280,6 +281,8 @@ class TranscriptFormatter:
             {self._generate_semester_sections(transcript_data)}
         </div>
 
+        {self._generate_degree_audit_section(transcript_data)}
+
         <div class="footer">
             <p><strong>MIDDLE EAST TECHNICAL UNIVERSITY - NORTHERN CYPRUS CAMPUS</strong></p>
             <p>This transcript is generated electronically and is valid without signature.</p>
@@ -346,6 +349,56 @@ class TranscriptFormatter:
             """
         return sections_html
 
+    def _generate_degree_audit_section(self, transcript_data: TranscriptData) -> str:
+        """Generate HTML for the degree audit (remaining curriculum requirements)"""
+        audit = transcript_data.degree_audit
+        if audit is None:
+            return ""
+        eligibility = "Eligible" if audit.eligible_for_graduation else "Not yet eligible"
+        if audit.missing_details:
+            missing_rows = "".join(f"""
+                        <tr>
+                            <td>{code}</td>
+                            <td>{name}</td>
+                            <td>{semester_suggested}</td>
+                            <td>{credit_hours:.1f}</td>
+                        </tr>""" for code, name, semester_suggested, credit_hours in audit.missing_details)
+            missing_html = f"""
+                <table class="courses-table">
+                    <thead>
+                        <tr>
+                            <th>Course Code</th>
+                            <th>Course Title</th>
+                            <th>Suggested Semester</th>
+                            <th>Credits</th>
+                        </tr>
+                    </thead>
+                    <tbody>{missing_rows}
+                    </tbody>
+                </table>"""
+        else:
+            missing_html = "<p>All required courses have been passed.</p>"
+        return f"""
+        <div class="academic-summary">
+            <div class="summary-title">Degree Audit</div>
+            <div class="summary-grid">
+                <div class="info-item">
+                    <span class="info-label">Required Courses Passed:</span> <span class="summary-value">{audit.passed_required_courses} / {audit.required_courses}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">Graduation:</span> <span class="summary-value">{eligibility}{'' if audit.cgpa_requirement_met else ' (CGPA below 2.00)'}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">Remaining Credits:</span> <span class="summary-value">{audit.remaining_credits:.1f}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">Remaining ECTS:</span> <span class="summary-value">{audit.remaining_ects:.1f}</span>
+                </div>
+            </div>
+            {missing_html}
+        </div>
+        """
+
     def _generate_course_rows(self, courses: List) -> str: # courses is List[CourseGrade]
         """Generate HTML table rows for courses"""
         rows_html = ""
@@ -496,7 +549,38 @@ class TranscriptFormatter:
                 story.append(courses_table)
                 story.append(Spacer(1, 0.15 * inch))
 
-            # 4. Transcript Footer
+            # 4. Degree Audit
+            audit = transcript_data.degree_audit
+            if audit is not None:
+                story.append(Paragraph("Degree Audit", style_heading))
+                eligibility = "Eligible" if audit.eligible_for_graduation else "Not yet eligible"
+                if not audit.cgpa_requirement_met:
+                    eligibility += " (CGPA below 2.00)"
+                story.append(Paragraph(
+                    f"Required courses passed: {audit.passed_required_courses} / {audit.required_courses} | "
+                    f"Remaining credits: {audit.remaining_credits:.1f} | Remaining ECTS: {audit.remaining_ects:.1f} | "
+                    f"Graduation: {eligibility}", style_body))
+                story.append(Spacer(1, 0.05 * inch))
+                if audit.missing_details:
+                    missing_rows = [[Paragraph('Code', style_table_header), Paragraph('Missing Course', style_table_header),
+                                     Paragraph('Sem.', style_table_header), Paragraph('CR', style_table_header)]]
+                    for code, name, semester_suggested, credit_hours in audit.missing_details:
+                        missing_rows.append([Paragraph(code, style_body), Paragraph(name, style_body),
+                                             Paragraph(str(semester_suggested), style_body),
+                                             Paragraph(f"{credit_hours:.1f}", style_body)])
+                    missing_table = Table(missing_rows, colWidths=[0.7*inch, 3.6*inch, 0.5*inch, 0.5*inch])
+                    missing_table.setStyle(TableStyle([
+                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                        ('LEFTPADDING', (0,0), (-1,-1), 3),
+                        ('RIGHTPADDING', (0,0), (-1,-1), 3),
+                        ('TOPPADDING', (0,0), (-1,-1), 2),
+                        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+                    ]))
+                    story.append(missing_table)
+
+            # 5. Transcript Footer
             story.append(Spacer(1, 0.3 * inch))
             footer_line = Paragraph(f"End of Transcript. Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}. METU NCC.", style_footer)
             story.append(footer_line)
@@ -517,25 +601,10 @@ class TranscriptFormatter:
 
 def sort_semesters(semester_list):
     """
-    Sort semesters in academic year order (Fall then Spring)
+    Sort semesters chronologically (2021-Fall, 2022-Spring, 2022-Fall, ...),
+    using the same semester ordinals as GradeCalculator
     """
-    def get_sort_key(semester):
-        # Parse the semester string (e.g., "2021-Fall")
-        try:
-            year_str, term = semester.split('-')
-            year = int(year_str)
-            
-            # Use academic year grouping (Fall 2021 and Spring 2022 are in the same academic year)
-            # This ensures Fall comes before Spring when sorted
-            academic_year = year if term == 'Fall' else year-1
-            term_value = 1 if term == 'Fall' else 2
-            
-            return (academic_year, term_value)
-        except (ValueError, IndexError):
-            # Handle invalid format
-            return (0, 0)
-    
-    return sorted(semester_list, key=get_sort_key)
+    return sort_semester_labels(semester_list)
 
 # For testing, add this temporarily
 test_semesters = ["2021-Fall", "2022-Spring", "2022-Fall", "2023-Spring"]
@@ -3,10 +3,13 @@ Transcript Generator for METU NCC Transcript System
 Main orchestrator that combines database operations with grade calculations
 """
 
-from typing import Dict, List, Optional, Any
+import sqlite3
+from typing import Dict, List, Optional, Any, Iterator, Tuple
 from dataclasses import dataclass
 from database import TranscriptDatabase # Assuming database.py is in the same directory or accessible
 from grade_calculator import GradeCalculator, CourseGrade # Assuming grade_calculator.py is accessible
+from degree_audit import DegreeAudit, DegreeAuditor
+from transcript_cache import TranscriptCache
 import os # os is not directly used in this version, but often kept for path manipulations if needed elsewhere
 from datetime import datetime
 
@@ -41,6 +44,9 @@ class TranscriptData:
     generation_date: str
     transcript_type: str = "Official Academic Transcript"
 
+    # Remaining curriculum requirements (see degree_audit.py)
+    degree_audit: Optional[DegreeAudit] = None
+
 
 class TranscriptGenerator:
     """
@@ -48,9 +54,27 @@ class TranscriptGenerator:
     Orchestrates database queries and grade calculations
     """
 
-    def __init__(self, db_path: str = "transcript_system.db"):
-        self.database = TranscriptDatabase(db_path)
+    def __init__(self, db_path: str = "transcript_system.db", pool_size: int = 5, read_only: bool = False,
+                 instrument: bool = False, slow_query_ms: float = 100.0, cache_path: Optional[str] = None,
+                 cache_max_bytes: int = TranscriptCache.DEFAULT_MAX_BYTES):
+        # read_only=True opens the database with mode=ro so many generator processes can
+        # read (best with the database in WAL mode) while registrars keep writing grades.
+        # instrument=True collects query timings in self.database.query_stats
+        # cache_path keeps computed TranscriptData in a side file (see transcript_cache.py)
+        self.database = TranscriptDatabase(db_path, pool_size=pool_size, read_only=read_only,
+                                           instrument=instrument, slow_query_ms=slow_query_ms)
         self.grade_calculator = GradeCalculator()
+        self.degree_auditor = DegreeAuditor(self.database, self.grade_calculator)
+        # (student_id, error) of every transcript the bulk and streaming paths failed to build;
+        # they skip such students, so callers check this before treating a run as complete
+        self.build_failures: List[Tuple[str, str]] = []
+        self.cache = None
+        if cache_path:
+            try:
+                self.cache = TranscriptCache(cache_path, cache_max_bytes)
+            except (sqlite3.Error, OSError) as e:
+                # The cache only saves time; an unwritable or locked cache file must not stop the run
+                print(f"Transcript cache disabled ({cache_path}): {e}")
 
     def generate_student_transcript(self, student_id: str) -> Optional[TranscriptData]:
         """
@@ -62,10 +86,34 @@ class TranscriptGenerator:
             return None
 
         enrollments = self.database.get_student_enrollments(student_id)
+        return self.build_transcript_data(student_id, student_info, enrollments)
+
+    def build_transcript_data(self, student_id: str, student_info: Dict[str, Any],
+                              enrollments: List[Dict[str, Any]]) -> TranscriptData:
+        """
+        Build TranscriptData from an already fetched student header and enrollment list
+        (as returned by get_student_info / get_student_enrollments or their bulk versions).
+        With a cache, unchanged inputs return the stored result with a fresh generation date.
+        """
         if not enrollments:
             # It's valid for a student to have no enrollments yet.
             # A warning is good, but we should still produce a transcript (empty academic record).
             print(f"Warning: No enrollments found for student {student_id}. Transcript will have an empty academic record.")
+        if self.cache is None:
+            return self._compute_transcript_data(student_id, student_info, enrollments)
+
+        cache_key = self.cache.make_key(self.database, student_info, enrollments)
+        transcript_data = self.cache.get(cache_key)
+        if transcript_data is not None:
+            transcript_data.generation_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            return transcript_data
+        transcript_data = self._compute_transcript_data(student_id, student_info, enrollments)
+        self.cache.put(cache_key, student_id, transcript_data)
+        return transcript_data
+
+    def _compute_transcript_data(self, student_id: str, student_info: Dict[str, Any],
+                                 enrollments: List[Dict[str, Any]]) -> TranscriptData:
+        if not enrollments:
             course_grades = [] # Ensure course_grades is an empty list
         else:
             course_grades = self.grade_calculator.process_course_grades(enrollments)
@@ -80,6 +128,7 @@ class TranscriptGenerator:
         
         semester_grades = self.grade_calculator.group_grades_by_semester(course_grades)
         semester_summaries = self.grade_calculator.calculate_semester_summary(semester_grades)
+        degree_audit = self.degree_auditor.audit(student_info['curriculum_id'], latest_grades, cgpa)
 
         full_name = f"{student_info['first_name']} {student_info['last_name']}"
 
@@ -99,10 +148,56 @@ class TranscriptGenerator:
             semester_summaries=semester_summaries,
             all_grades=course_grades, # Storing all grades (including all attempts)
             latest_grades=latest_grades, # Storing only the latest grade for each course
-            generation_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            generation_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            degree_audit=degree_audit
         )
         return transcript_data
 
+    def generate_transcripts_bulk(self, dept_id: Optional[str] = None,
+                                  student_ids: Optional[List[str]] = None) -> List[TranscriptData]:
+        """
+        Generate transcript data for a department, a list of student IDs, or the whole
+        campus (neither given) using the bulk loaders: two queries in total instead of
+        two per student. Returns TranscriptData objects ordered by student ID.
+        """
+        # Both queries read the same snapshot, even if grades are being written meanwhile
+        with self.database.snapshot():
+            students = self.database.get_students_info_bulk(dept_id=dept_id, student_ids=student_ids)
+            if not students:
+                return []
+            enrollments_by_student = self.database.get_enrollments_bulk(dept_id=dept_id, student_ids=student_ids)
+
+        generated_data_list = []
+        for student_id, student_info in students.items():
+            try:
+                generated_data_list.append(
+                    self.build_transcript_data(student_id, student_info, enrollments_by_student.get(student_id, [])))
+            except Exception as e:
+                print(f"Error generating transcript data for student {student_id}: {e}")
+                self.build_failures.append((student_id, str(e)))
+        return generated_data_list
+
+    def iter_transcripts(self, dept_id: Optional[str] = None,
+                         student_ids: Optional[List[str]] = None) -> Iterator[TranscriptData]:
+        """
+        Streaming form of generate_transcripts_bulk: yields each TranscriptData (in student ID
+        order) as soon as its rows have been read, so memory stays flat for any number of students.
+        """
+        for student_id, student_info, enrollments in self.database.iter_student_records(dept_id=dept_id, student_ids=student_ids):
+            try:
+                yield self.build_transcript_data(student_id, student_info, enrollments)
+            except Exception as e:
+                print(f"Error generating transcript data for student {student_id}: {e}")
+                self.build_failures.append((student_id, str(e)))
+
+    def iter_department_transcripts(self, dept_id: str) -> Iterator[TranscriptData]:
+        """Streaming form of generate_department_transcripts."""
+        return self.iter_transcripts(dept_id=dept_id)
+
+    def iter_all_transcripts(self) -> Iterator[TranscriptData]:
+        """Streaming form of generate_all_transcripts."""
+        return self.iter_transcripts()
+
     def generate_department_transcripts(self, dept_id: str) -> List[TranscriptData]:
         """
         Generate transcript data for all students in a department.
@@ -116,20 +211,9 @@ class TranscriptGenerator:
 
         print(f"Generating transcript data for {len(student_ids)} students in department {dept_id}")
 
-        generated_data_list = []
-        success_count = 0
+        generated_data_list = self.generate_transcripts_bulk(dept_id=dept_id)
 
-        for student_id in student_ids:
-            try:
-                transcript_data = self.generate_student_transcript(student_id)
-                if transcript_data:
-                    generated_data_list.append(transcript_data)
-                    success_count += 1
-                # else: generate_student_transcript already prints an error or warning
-            except Exception as e:
-                print(f"Error generating transcript data for student {student_id}: {e}")
-
-        print(f"Successfully generated data for {success_count} transcripts for department {dept_id}")
+        print(f"Successfully generated data for {len(generated_data_list)} transcripts for department {dept_id}")
         return generated_data_list
 
     def generate_all_transcripts(self) -> List[TranscriptData]:
@@ -145,20 +229,28 @@ class TranscriptGenerator:
 
         print(f"Generating transcript data for {len(all_student_ids)} students")
 
-        generated_data_list = []
-        success_count = 0
+        generated_data_list = self.generate_transcripts_bulk()
 
-        for student_id in all_student_ids:
-            try:
-                transcript_data = self.generate_student_transcript(student_id)
-                if transcript_data:
-                    generated_data_list.append(transcript_data)
-                    success_count += 1
-                # else: generate_student_transcript already prints an error or warning
-            except Exception as e:
-                print(f"Error generating transcript data for student {student_id}: {e}")
+        print(f"Successfully generated data for {len(generated_data_list)} total transcripts")
+        return generated_data_list
 
-        print(f"Successfully generated data for {success_count} total transcripts")
+    def generate_changed_transcripts(self, since_seq: Optional[int] = None, since_time: Optional[str] = None,
+                                     dept_id: Optional[str] = None) -> List[TranscriptData]:
+        """
+        Generate transcript data only for students whose records changed after change
+        sequence since_seq and/or at or after since_time (see TranscriptDatabase.get_changed_students).
+        """
+        changed_ids = self.database.get_changed_students(since_seq=since_seq, since_time=since_time, dept_id=dept_id)
+
+        if not changed_ids:
+            print("No students changed since the last run")
+            return []
+
+        print(f"Generating transcript data for {len(changed_ids)} changed students")
+
+        generated_data_list = self.generate_transcripts_bulk(student_ids=changed_ids)
+
+        print(f"Successfully generated data for {len(generated_data_list)} changed transcripts")
         return generated_data_list
 
     def print_transcript_summary(self, transcript_data: TranscriptData):
@@ -211,7 +303,42 @@ class TranscriptGenerator:
 
     def get_transcript_statistics(self) -> Dict[str, Any]:
         """
-        Get overall statistics about the transcript system
+        Get overall statistics about the transcript system: department counts and average
+        CGPAs from the stored GPA summaries, and the latest-attempt GPA grade distribution
+        from one window query. Same result as get_transcript_statistics_full without building
+        any TranscriptData; falls back to it if some student has no stored summary.
+        """
+        aggregates = self.database.get_statistics_aggregates()
+        if aggregates is None:
+            print("GPA summaries incomplete (run --rebuild_gpa_summary); computing statistics from full transcripts.")
+            return self.get_transcript_statistics_full()
+
+        stats = {
+            'total_students': aggregates['total_students'],
+            'departments': {},
+            'grade_distribution': {grade: count for grade, count in aggregates['grade_counts'].items()
+                                   if self.grade_calculator.is_gpa_grade(grade)},
+            'average_cgpa': 0.0
+        }
+        # Summed per student in student ID order, exactly as the full computation does
+        total_cgpa_sum = 0.0
+        for _, dept_id, dept_name, cgpa in aggregates['students']:
+            if dept_id not in stats['departments']:
+                stats['departments'][dept_id] = {'count': 0, 'avg_cgpa': 0.0, 'total_cgpa_sum': 0.0, 'name': dept_name}
+            stats['departments'][dept_id]['count'] += 1
+            stats['departments'][dept_id]['total_cgpa_sum'] += cgpa
+            total_cgpa_sum += cgpa
+
+        if aggregates['students']:
+            stats['average_cgpa'] = total_cgpa_sum / len(aggregates['students'])
+        for dept_info in stats['departments'].values():
+            dept_info['avg_cgpa'] = dept_info['total_cgpa_sum'] / dept_info['count']
+            del dept_info['total_cgpa_sum']
+        return stats
+
+    def get_transcript_statistics_full(self) -> Dict[str, Any]:
+        """
+        Reference statistics computed by building the full transcript of every student
         """
         all_student_ids = self.database.get_all_students()
 